@@ -1,11 +1,12 @@
-﻿import random
-import math
+﻿import math
 from typing import Optional
 from sqlalchemy.orm import Session
 
 from .models import Agent, Point
 from .crud_points import create_point, delete_point
+from .relationship_graph import get_relationship_graph_cache
 from .. import models
+from ..world.rng import get_rng
 
 ROAD_ZONES: list[tuple[float, float, float, float]] = [
     (34.0, 44.0, 68.0, 66.0),
@@ -13,24 +14,37 @@ ROAD_ZONES: list[tuple[float, float, float, float]] = [
 
 
 def _random_road_point() -> tuple[float, float]:
-    x1, y1, x2, y2 = random.choice(ROAD_ZONES)
-    return random.uniform(x1, x2), random.uniform(y1, y2)
+    rng = get_rng("movement")
+    x1, y1, x2, y2 = rng.choice(ROAD_ZONES)
+    return rng.uniform(x1, x2), rng.uniform(y1, y2)
 
 
 def _random_target_in_zone(x: float, y: float, radius: float) -> tuple[float, float]:
+    rng = get_rng("movement")
     for _ in range(16):
-        angle = random.uniform(0, 2 * math.pi)
+        angle = rng.uniform(0, 2 * math.pi)
         tx = x + radius * math.cos(angle)
         ty = y + radius * math.sin(angle)
         for x1, y1, x2, y2 in ROAD_ZONES:
             if x1 <= tx <= x2 and y1 <= ty <= y2:
                 return tx, ty
     x1, y1, x2, y2 = ROAD_ZONES[0]
-    return random.uniform(x1, x2), random.uniform(y1, y2)
+    return rng.uniform(x1, x2), rng.uniform(y1, y2)
 
 
-def get_agents(db: Session, skip: int = 0, limit: int = 100) -> list[Agent]:
-    return db.query(Agent).offset(skip).limit(limit).all()
+def get_agents(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    emotion: str | None = None,
+    min_emotion: int = 0,
+) -> list[Agent]:
+    """Agents in id order, or only those with ``emotion`` at ``min_emotion``+ percent, strongest first."""
+    query = db.query(Agent)
+    if emotion is not None:
+        level = getattr(Agent, f"mood_{emotion}")
+        query = query.filter(level >= min_emotion).order_by(level.desc(), Agent.id)
+    return query.offset(skip).limit(limit).all()
 
 
 def get_agent(db: Session, agent_id: int) -> Optional[Agent]:
@@ -69,6 +83,7 @@ def create_agent(db: Session, agent: models.AgentCreate) -> Agent:
     db.add(db_agent)
     db.commit()
     db.refresh(db_agent)
+    get_relationship_graph_cache().put_agent(db_agent.id, db_agent.name, db_agent.type)
     return db_agent
 
 
@@ -81,6 +96,8 @@ def update_agent(db: Session, agent_id: int, agent: models.AgentUpdate) -> Optio
         setattr(db_agent, key, value)
     db.commit()
     db.refresh(db_agent)
+    if "name" in data or "type" in data:
+        get_relationship_graph_cache().put_agent(db_agent.id, db_agent.name, db_agent.type)
     return db_agent
 
 
@@ -92,6 +109,7 @@ def delete_agent(db: Session, agent_id: int) -> bool:
         delete_point(db, db_agent.point_id)
     db.delete(db_agent)
     db.commit()
+    get_relationship_graph_cache().remove_agent(agent_id)
     return True
 
 
@@ -1,9 +1,20 @@
 ﻿from sqlalchemy.orm import Session
 
-from .models import Relationship, Agent
+from .models import Relationship
+from .relationship_graph import get_relationship_graph_cache
 from .. import models
 
 
+# Compare-and-set: a row only changes while it still holds the value the cache had.
+_UPDATE_PAIR = "UPDATE relationships SET sympathy = ? WHERE agent_from_id = ? AND agent_to_id = ? AND sympathy = ?"
+_INSERT_PAIR = (
+    "INSERT INTO relationships (sympathy, agent_from_id, agent_to_id) SELECT ?, ?, ? "
+    "WHERE NOT EXISTS (SELECT 1 FROM relationships WHERE agent_from_id = ? AND agent_to_id = ?) "
+    "AND EXISTS (SELECT 1 FROM agents WHERE id = ?) AND EXISTS (SELECT 1 FROM agents WHERE id = ?)"
+)
+_SELECT_PAIR = "SELECT sympathy FROM relationships WHERE agent_from_id = ? AND agent_to_id = ?"
+
+
 def upsert_relationship(db: Session, rel: models.RelationshipCreate) -> Relationship:
     existing = (
         db.query(Relationship)
@@ -17,6 +28,7 @@ def upsert_relationship(db: Session, rel: models.RelationshipCreate) -> Relation
         existing.sympathy = rel.sympathy
         db.commit()
         db.refresh(existing)
+        get_relationship_graph_cache().set_sympathy(rel.agent_from_id, rel.agent_to_id, rel.sympathy)
         return existing
 
     db_rel = Relationship(
@@ -27,31 +39,84 @@ def upsert_relationship(db: Session, rel: models.RelationshipCreate) -> Relation
     db.add(db_rel)
     db.commit()
     db.refresh(db_rel)
+    get_relationship_graph_cache().set_sympathy(rel.agent_from_id, rel.agent_to_id, rel.sympathy)
     return db_rel
 
 
+def _touched(changes: list[tuple], pairs) -> set[tuple[int, int]]:
+    """The ``pairs`` whose sympathy or either agent appears in ``changes``."""
+    cells, agents = set(), set()
+    for _, kind, *change in changes:
+        if kind == "sympathy":
+            cells.add((change[0], change[1]))
+        else:
+            agents.add(change[0])
+    return {pair for pair in pairs if pair in cells or pair[0] in agents or pair[1] in agents}
+
+
+def upsert_sympathies(db: Session, cells: list[tuple[int, int, int]], since: int | None = None) -> int:
+    """Write many ``(from_id, to_id, sympathy)`` cells in one transaction; returns how many were recorded.
+
+    The graph cache says which pairs already have a row, so existing ones are
+    updated by ``(from, to)`` through ``ix_relationships_pair`` and the rest
+    inserted, each as one driver-level executemany. ``since`` is the graph
+    version the values were computed from: cells another writer changed after
+    it are dropped. Updates only apply while the row still holds the cached
+    value and inserts skip pairs that appeared meanwhile, so a sympathy
+    committed concurrently (a chat, ``POST /relationships``) is never
+    overwritten. Cells raced that way are re-read and the cache gets the
+    stored value.
+    """
+    wanted = {(from_id, to_id): sympathy for from_id, to_id, sympathy in cells}
+    cache = get_relationship_graph_cache()
+    with cache.lock:
+        if since is not None and wanted:
+            changes = cache.changes_since(since)
+            if changes is None:
+                return 0
+            for pair in _touched(changes, wanted):
+                del wanted[pair]
+        if not wanted:
+            return 0
+        version = cache.version
+        updates, inserts = [], []
+        for (from_id, to_id), sympathy in wanted.items():
+            current = cache.sympathy(db, from_id, to_id)
+            if current is None:
+                inserts.append((sympathy, from_id, to_id, from_id, to_id, from_id, to_id))
+            else:
+                updates.append((sympathy, from_id, to_id, current))
+
+    conn = db.connection()
+    if updates:
+        conn.exec_driver_sql(_UPDATE_PAIR, updates)
+    if inserts:
+        conn.exec_driver_sql(_INSERT_PAIR, inserts)
+    db.commit()
+
+    with cache.lock:
+        changes = cache.changes_since(version)
+        if changes is None:
+            cache.invalidate()
+            return 0
+        raced = _touched(changes, wanted)
+        settled = {}
+        conn = db.connection()
+        for from_id, to_id in raced:
+            del wanted[(from_id, to_id)]
+            row = conn.exec_driver_sql(_SELECT_PAIR, (from_id, to_id)).first()
+            live = cache.agent_name(db, from_id) is not None and cache.agent_name(db, to_id) is not None
+            if row is not None and live and row[0] != cache.sympathy(db, from_id, to_id):
+                settled[(from_id, to_id)] = row[0]
+        db.commit()
+        # Pairs another writer committed but has not recorded yet get its value when it does.
+        cache.set_sympathies(wanted)
+        cache.set_sympathies(settled)
+    return len(wanted) + len(settled)
+
+
 def get_relationship_graph(db: Session) -> models.RelationshipGraph:
-    relationships = db.query(Relationship).all()
-    agent_ids = set()
-    for r in relationships:
-        agent_ids.add(r.agent_from_id)
-        agent_ids.add(r.agent_to_id)
-
-    agents = db.query(Agent).filter(Agent.id.in_(agent_ids), Agent.type == "agent").all()
-    allowed_agent_ids = {a.id for a in agents}
-
-    nodes = [
-        models.RelationshipGraphNode(id=a.id, name=a.name)
-        for a in agents
-    ]
-
-    edges = [
-        models.RelationshipGraphEdge(from_id=r.agent_from_id, to_id=r.agent_to_id, sympathy=r.sympathy)
-        for r in relationships
-        if r.agent_from_id in allowed_agent_ids and r.agent_to_id in allowed_agent_ids
-    ]
-
-    return models.RelationshipGraph(nodes=nodes, edges=edges)
+    return get_relationship_graph_cache().graph(db)[1]
 
 
 def get_agent_relationships(db: Session, agent_id: int) -> list[Relationship]:
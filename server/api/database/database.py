@@ -1,12 +1,17 @@
-﻿from typing import Generator
+﻿import os
+from typing import Generator
 
 from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./vworld.db"
+from ..metrics import get_metrics
+
+SQLALCHEMY_DATABASE_URL = os.getenv("VWORLD_DATABASE_URL", "sqlite:///./vworld.db")
 
 Base = declarative_base()
 
+DB_COMMITS = get_metrics().counter("vworld_db_commits_total", "Committed transactions.", labels=("database",))
+
 
 def _set_sqlite_pragmas(dbapi_connection, _connection_record):
     cursor = dbapi_connection.cursor()
@@ -16,6 +21,10 @@ def _set_sqlite_pragmas(dbapi_connection, _connection_record):
     cursor.close()
 
 
+def _count_commit(_connection):
+    DB_COMMITS.inc(database="main")
+
+
 class Database:
     _instance = None
     _engine = None
@@ -34,6 +43,7 @@ class Database:
                 connect_args={"check_same_thread": False, "timeout": 30},
             )
             event.listen(self._engine, "connect", _set_sqlite_pragmas)
+            event.listen(self._engine, "commit", _count_commit)
             self._session_factory = sessionmaker(
                 autocommit=False,
                 autoflush=False,
@@ -80,6 +90,36 @@ class Database:
                 conn.execute(text("ALTER TABLE agents ADD COLUMN point_id VARCHAR"))
             if "type" not in columns:
                 conn.execute(text("ALTER TABLE agents ADD COLUMN type VARCHAR DEFAULT 'agent'"))
+            self._migrate_mood_columns(conn, columns)
+
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_memories_agent_id ON memories (agent_id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_memories_created_at ON memories (created_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_events_created_at ON events (created_at)"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_relationships_pair ON relationships (agent_from_id, agent_to_id)"
+            ))
+
+    @staticmethod
+    def _migrate_mood_columns(conn, columns: set[str]):
+        """Split the legacy JSON ``agents.mood`` string into the ``mood_*`` integer columns."""
+        from ..models.mood import EMOTIONS, Mood
+
+        missing = [name for name in EMOTIONS if f"mood_{name}" not in columns]
+        if not missing:
+            return
+        default = Mood().to_dict()
+        for name in missing:
+            conn.execute(text(f"ALTER TABLE agents ADD COLUMN mood_{name} INTEGER NOT NULL DEFAULT {default[name]}"))
+        if "mood" not in columns:
+            return
+        rows = [
+            {"agent_id": agent_id, **Mood.parse(mood).to_dict()}
+            for agent_id, mood in conn.execute(text("SELECT id, mood FROM agents"))
+        ]
+        if rows:
+            assignments = ", ".join(f"mood_{name} = :{name}" for name in EMOTIONS)
+            conn.execute(text(f"UPDATE agents SET {assignments} WHERE id = :agent_id"), rows)
+            print(f"[DB] Migrated mood of {len(rows)} agents to mood_* columns")
 
 
 _db_instance = Database()
@@ -1,9 +1,13 @@
 ﻿
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 
 from .database import Base
+from ..models.mood import EMOTIONS, Mood
+
+
+_DEFAULT_MOOD = Mood()
 
 
 class Agent(Base):
@@ -13,7 +17,11 @@ class Agent(Base):
     name = Column(String, nullable=False)
     type = Column(String, default="agent", nullable=False)
     personality = Column(String, default="")
-    mood = Column(String, default="neutral")
+    mood_joy = Column(Integer, nullable=False, default=_DEFAULT_MOOD.joy, server_default=str(_DEFAULT_MOOD.joy))
+    mood_anger = Column(Integer, nullable=False, default=_DEFAULT_MOOD.anger, server_default=str(_DEFAULT_MOOD.anger))
+    mood_sadness = Column(Integer, nullable=False, default=_DEFAULT_MOOD.sadness, server_default=str(_DEFAULT_MOOD.sadness))
+    mood_fear = Column(Integer, nullable=False, default=_DEFAULT_MOOD.fear, server_default=str(_DEFAULT_MOOD.fear))
+    mood_neutral = Column(Integer, nullable=False, default=_DEFAULT_MOOD.neutral, server_default=str(_DEFAULT_MOOD.neutral))
     current_plan = Column(String, default="")
     point_id = Column(String, ForeignKey("points.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -33,6 +41,15 @@ class Agent(Base):
         cascade="all, delete-orphan",
     )
 
+    @property
+    def mood(self) -> Mood:
+        return Mood(self.mood_joy, self.mood_anger, self.mood_sadness, self.mood_fear, self.mood_neutral)
+
+    @mood.setter
+    def mood(self, value):
+        for name, level in zip(EMOTIONS, Mood.parse(value).as_tuple()):
+            setattr(self, f"mood_{name}", level)
+
 
 class Memory(Base):
     __tablename__ = "memories"
@@ -63,6 +80,7 @@ class Relationship(Base):
 
     __table_args__ = (
         CheckConstraint("sympathy >= -10 AND sympathy <= 10", name="check_sympathy_range"),
+        Index("ix_relationships_pair", "agent_from_id", "agent_to_id"),
     )
 
     agent_from = relationship("Agent", foreign_keys=[agent_from_id], back_populates="relationships_from")
@@ -0,0 +1,249 @@
+"""Relationship analytics kept current from the relationship graph change log.
+
+Covers ``agent``-type agents only, like ``GET /relationships``. Every sympathy
+change adjusts per-agent counters and an integer-sympathy bucket in O(1), so
+stats and top-k bonds never rescan the edge list. Friend and enemy clusters are
+connected components over edges at or beyond the thresholds: added links are
+merged into a union-find as they arrive, and only a removed link marks the
+components for a rebuild over the thresholded links on the next request.
+"""
+
+import heapq
+import os
+import threading
+
+from sqlalchemy.orm import Session
+
+from .relationship_graph import get_relationship_graph_cache
+from .. import models
+
+
+FRIEND_THRESHOLD = int(os.getenv("VWORLD_RELATIONSHIP_FRIEND_THRESHOLD", "5"))
+ENEMY_THRESHOLD = int(os.getenv("VWORLD_RELATIONSHIP_ENEMY_THRESHOLD", "-5"))
+SYMPATHY_MIN, SYMPATHY_MAX = -10, 10
+CLUSTER_KINDS = ("friends", "enemies")
+
+
+class _Components:
+    """Union-find over undirected links, rebuilt lazily after a link disappears."""
+
+    def __init__(self):
+        self.links: dict[tuple[int, int], int] = {}
+        self._parent: dict[int, int] = {}
+        self._dirty = False
+
+    def _find(self, node: int) -> int:
+        parent = self._parent.setdefault(node, node)
+        while parent != node:
+            grand = self._parent[parent]
+            self._parent[node] = grand
+            node, parent = parent, grand
+        return node
+
+    def _union(self, a: int, b: int):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self._parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def add(self, a: int, b: int):
+        pair = (min(a, b), max(a, b))
+        self.links[pair] = self.links.get(pair, 0) + 1
+        if not self._dirty:
+            self._union(*pair)
+
+    def discard(self, a: int, b: int):
+        pair = (min(a, b), max(a, b))
+        count = self.links.get(pair, 0) - 1
+        if count > 0:
+            self.links[pair] = count
+        else:
+            self.links.pop(pair, None)
+            self._dirty = True
+
+    def groups(self) -> list[list[int]]:
+        if self._dirty:
+            self._parent = {}
+            for a, b in self.links:
+                self._union(a, b)
+            self._dirty = False
+        linked = {node for pair in self.links for node in pair}
+        groups: dict[int, list[int]] = {}
+        for node in sorted(linked):
+            groups.setdefault(self._find(node), []).append(node)
+        return sorted(groups.values(), key=lambda group: (-len(group), group[0]))
+
+
+class RelationshipAnalytics:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version: int | None = None
+        self._reset()
+
+    def _reset(self):
+        self._agents: dict[int, tuple[str, str]] = {}
+        self._edges: dict[tuple[int, int], int] = {}
+        self._adjacent: dict[int, set[int]] = {}
+        # agent_id -> [out_degree, in_degree, out_sum, in_sum, friends, enemies]
+        self._stats: dict[int, list[int]] = {}
+        self._buckets: list[set[tuple[int, int]]] = [set() for _ in range(SYMPATHY_MAX - SYMPATHY_MIN + 1)]
+        self._components = {kind: _Components() for kind in CLUSTER_KINDS}
+        self._cached: dict[str, tuple[int, object]] = {}
+
+    def _active(self, from_id: int, to_id: int) -> bool:
+        return self._agents.get(from_id, ("", ""))[1] == "agent" and self._agents.get(to_id, ("", ""))[1] == "agent"
+
+    def _apply(self, from_id: int, to_id: int, sympathy: int, sign: int):
+        """Add (``sign=1``) or withdraw (``sign=-1``) one edge's contribution."""
+        if not self._active(from_id, to_id):
+            return
+        out_stats = self._stats.setdefault(from_id, [0] * 6)
+        in_stats = self._stats.setdefault(to_id, [0] * 6)
+        out_stats[0] += sign
+        out_stats[2] += sign * sympathy
+        in_stats[1] += sign
+        in_stats[3] += sign * sympathy
+        bucket = self._buckets[sympathy - SYMPATHY_MIN]
+        if sign > 0:
+            bucket.add((from_id, to_id))
+        else:
+            bucket.discard((from_id, to_id))
+        for index, kind, hit in (
+            (4, "friends", sympathy >= FRIEND_THRESHOLD),
+            (5, "enemies", sympathy <= ENEMY_THRESHOLD),
+        ):
+            if not hit:
+                continue
+            out_stats[index] += sign
+            if from_id == to_id:
+                continue
+            if sign > 0:
+                self._components[kind].add(from_id, to_id)
+            else:
+                self._components[kind].discard(from_id, to_id)
+
+    def _set_sympathy(self, from_id: int, to_id: int, sympathy: int):
+        previous = self._edges.get((from_id, to_id))
+        if previous == sympathy:
+            return
+        if previous is not None:
+            self._apply(from_id, to_id, previous, -1)
+        self._edges[(from_id, to_id)] = sympathy
+        self._adjacent.setdefault(from_id, set()).add(to_id)
+        self._adjacent.setdefault(to_id, set()).add(from_id)
+        self._apply(from_id, to_id, sympathy, 1)
+
+    def _incident(self, agent_id: int) -> list[tuple[int, int, int]]:
+        edges = []
+        for other in self._adjacent.get(agent_id, ()):
+            if (agent_id, other) in self._edges:
+                edges.append((agent_id, other, self._edges[(agent_id, other)]))
+            if other != agent_id and (other, agent_id) in self._edges:
+                edges.append((other, agent_id, self._edges[(other, agent_id)]))
+        return edges
+
+    def _put_agent(self, agent_id: int, name: str, kind: str):
+        edges = self._incident(agent_id)
+        for edge in edges:
+            self._apply(*edge, -1)
+        self._agents[agent_id] = (name, kind)
+        for edge in edges:
+            self._apply(*edge, 1)
+
+    def _remove_agent(self, agent_id: int):
+        for from_id, to_id, sympathy in self._incident(agent_id):
+            self._apply(from_id, to_id, sympathy, -1)
+            del self._edges[(from_id, to_id)]
+        for other in self._adjacent.pop(agent_id, set()):
+            self._adjacent.get(other, set()).discard(agent_id)
+        self._agents.pop(agent_id, None)
+        self._stats.pop(agent_id, None)
+
+    def _sync(self, db: Session) -> int:
+        graph = get_relationship_graph_cache()
+        changes = None if self._version is None else graph.changes_since(self._version)
+        if changes is None:
+            version, agents, edges = graph.state(db)
+            self._reset()
+            self._agents = agents
+            for edge in edges:
+                self._set_sympathy(*edge)
+            self._version = version
+            return version
+        for version, kind, *change in changes:
+            if kind == "sympathy":
+                self._set_sympathy(*change)
+            elif kind == "agent":
+                self._put_agent(*change)
+            elif kind == "remove":
+                self._remove_agent(change[0])
+            self._version = version
+        return self._version
+
+    def _memo(self, key: str, version: int, build):
+        cached = self._cached.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, build())
+            self._cached[key] = cached
+        return cached[1]
+
+    def _agent_stats(self, agent_id: int) -> models.RelationshipAgentStats:
+        out_degree, in_degree, out_sum, in_sum, friends, enemies = self._stats.get(agent_id, [0] * 6)
+        return models.RelationshipAgentStats(
+            agent_id=agent_id,
+            name=self._agents[agent_id][0],
+            out_degree=out_degree,
+            in_degree=in_degree,
+            mean_sympathy_out=round(out_sum / out_degree, 3) if out_degree else None,
+            mean_sympathy_in=round(in_sum / in_degree, 3) if in_degree else None,
+            friends=friends,
+            enemies=enemies,
+        )
+
+    def stats(self, db: Session) -> tuple[int, list[models.RelationshipAgentStats]]:
+        with self._lock:
+            version = self._sync(db)
+            return version, self._memo("stats", version, lambda: [
+                self._agent_stats(agent_id)
+                for agent_id, (_, kind) in sorted(self._agents.items())
+                if kind == "agent"
+            ])
+
+    def agent_stats(self, db: Session, agent_id: int) -> models.RelationshipAgentStats | None:
+        with self._lock:
+            self._sync(db)
+            if self._agents.get(agent_id, ("", ""))[1] != "agent":
+                return None
+            return self._agent_stats(agent_id)
+
+    def clusters(self, db: Session, kind: str) -> tuple[int, list[models.RelationshipCluster]]:
+        with self._lock:
+            version = self._sync(db)
+            return version, self._memo(f"clusters:{kind}", version, lambda: [
+                models.RelationshipCluster(agent_ids=group, size=len(group))
+                for group in self._components[kind].groups()
+            ])
+
+    def bonds(self, db: Session, limit: int, kind: str = "friends") -> tuple[int, list[models.RelationshipGraphEdge]]:
+        """The ``limit`` warmest (``friends``) or coldest (``enemies``) directed edges."""
+        with self._lock:
+            version = self._sync(db)
+            buckets = reversed(self._buckets) if kind == "friends" else iter(self._buckets)
+            bonds = []
+            for bucket in buckets:
+                if len(bonds) >= limit:
+                    break
+                bonds.extend(
+                    models.RelationshipGraphEdge(from_id=from_id, to_id=to_id, sympathy=self._edges[(from_id, to_id)])
+                    for from_id, to_id in heapq.nsmallest(limit - len(bonds), bucket)
+                )
+            return version, bonds
+
+
+_analytics: RelationshipAnalytics | None = None
+
+
+def get_relationship_analytics() -> RelationshipAnalytics:
+    global _analytics
+    if _analytics is None:
+        _analytics = RelationshipAnalytics()
+    return _analytics
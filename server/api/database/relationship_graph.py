@@ -0,0 +1,176 @@
+"""In-memory mirror of the ``relationships`` table and the agent roster.
+
+The graph is loaded from the database on first use and then kept current by
+the code that writes it: ``upsert_relationship`` and agent create, update and
+delete. World wipe and snapshot restore call ``invalidate`` so it reloads.
+Sympathy and per-agent lookups cost O(degree) instead of a query. Every change
+bumps ``version``, which is the ETag of ``GET /relationships``.
+
+Recent changes are kept in a bounded log, so derived state (the social drift
+matrix) can follow the graph with ``changes_since`` instead of re-reading it.
+"""
+
+import threading
+import uuid
+from collections import deque
+
+from sqlalchemy.orm import Session
+
+from .models import Agent, Relationship
+from .. import models
+
+
+CHANGE_LOG_SIZE = 65536
+
+
+class RelationshipGraphCache:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._agents: dict[int, tuple[str, str]] = {}
+        self._out: dict[int, dict[int, int]] = {}
+        self._in: dict[int, dict[int, int]] = {}
+        self._graph: tuple[int, models.RelationshipGraph] | None = None
+        self._log: deque[tuple] = deque(maxlen=CHANGE_LOG_SIZE)
+
+    def _ensure(self, db: Session):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            roster = db.query(Agent.id, Agent.name, Agent.type).order_by(Agent.id)
+            self._agents = {agent_id: (name, kind or "agent") for agent_id, name, kind in roster}
+            self._out, self._in = {}, {}
+            query = db.query(Relationship.agent_from_id, Relationship.agent_to_id, Relationship.sympathy)
+            for from_id, to_id, sympathy in query.order_by(Relationship.id):
+                self._out.setdefault(from_id, {})[to_id] = sympathy
+                self._in.setdefault(to_id, {})[from_id] = sympathy
+            self._loaded = True
+            self.version += 1
+            self._log.clear()
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Held while changes are recorded; take it to check and write without a change slipping in."""
+        return self._lock
+
+    def etag(self, version: int) -> str:
+        return f'"{self._epoch}-{version}"'
+
+    def sympathy(self, db: Session, from_id: int, to_id: int) -> int | None:
+        self._ensure(db)
+        return self._out.get(from_id, {}).get(to_id)
+
+    def relations(self, db: Session, agent_id: int) -> list[tuple[int, int, int]]:
+        """``(from_id, to_id, sympathy)`` for every relationship touching ``agent_id``."""
+        self._ensure(db)
+        with self._lock:
+            outgoing = [(agent_id, to_id, s) for to_id, s in self._out.get(agent_id, {}).items()]
+            incoming = [(from_id, agent_id, s) for from_id, s in self._in.get(agent_id, {}).items() if from_id != agent_id]
+        return outgoing + incoming
+
+    def agent_name(self, db: Session, agent_id: int) -> str | None:
+        self._ensure(db)
+        agent = self._agents.get(agent_id)
+        return agent[0] if agent else None
+
+    def agent_ids(self, db: Session) -> list[int]:
+        self._ensure(db)
+        with self._lock:
+            return list(self._agents)
+
+    def state(self, db: Session) -> tuple[int, dict[int, tuple[str, str]], list[tuple[int, int, int]]]:
+        """``(version, agents, edges)`` copied under the lock, for rebuilding derived state."""
+        self._ensure(db)
+        with self._lock:
+            edges = [(from_id, to_id, s) for from_id, targets in self._out.items() for to_id, s in targets.items()]
+            return self.version, dict(self._agents), edges
+
+    def changes_since(self, version: int) -> list[tuple] | None:
+        """Changes after ``version``, or None when the log no longer reaches back that far.
+
+        Entries are ``(version, "sympathy", from_id, to_id, sympathy)``,
+        ``(version, "agent", agent_id, name, kind)`` and ``(version, "remove", agent_id)``.
+        """
+        with self._lock:
+            if version == self.version:
+                return []
+            if version > self.version or not self._log or self._log[0][0] > version + 1:
+                return None
+            return [change for change in self._log if change[0] > version]
+
+    def _record(self, *change):
+        self.version += 1
+        self._log.append((self.version, *change))
+
+    def graph(self, db: Session) -> tuple[int, models.RelationshipGraph]:
+        """The graph of ``agent``-type nodes, rebuilt only after a change."""
+        self._ensure(db)
+        with self._lock:
+            if self._graph is not None and self._graph[0] == self.version:
+                return self._graph
+            allowed = {agent_id for agent_id, (_, kind) in self._agents.items() if kind == "agent"}
+            linked = {agent_id for agent_id in self._out if self._out[agent_id]} | {
+                agent_id for agent_id in self._in if self._in[agent_id]
+            }
+            nodes = [
+                models.RelationshipGraphNode(id=agent_id, name=self._agents[agent_id][0])
+                for agent_id in sorted(allowed & linked)
+            ]
+            edges = [
+                models.RelationshipGraphEdge(from_id=from_id, to_id=to_id, sympathy=sympathy)
+                for from_id, targets in self._out.items()
+                if from_id in allowed
+                for to_id, sympathy in targets.items()
+                if to_id in allowed
+            ]
+            self._graph = (self.version, models.RelationshipGraph(nodes=nodes, edges=edges))
+            return self._graph
+
+    def set_sympathy(self, from_id: int, to_id: int, sympathy: int):
+        with self._lock:
+            if self._loaded:
+                self._out.setdefault(from_id, {})[to_id] = sympathy
+                self._in.setdefault(to_id, {})[from_id] = sympathy
+            self._record("sympathy", from_id, to_id, sympathy)
+
+    def set_sympathies(self, cells: dict[tuple[int, int], int]):
+        with self._lock:
+            for (from_id, to_id), sympathy in cells.items():
+                self.set_sympathy(from_id, to_id, sympathy)
+
+    def put_agent(self, agent_id: int, name: str, kind: str | None):
+        with self._lock:
+            if self._loaded:
+                self._agents[agent_id] = (name, kind or "agent")
+            self._record("agent", agent_id, name, kind or "agent")
+
+    def remove_agent(self, agent_id: int):
+        with self._lock:
+            if self._loaded:
+                self._agents.pop(agent_id, None)
+                for to_id in self._out.pop(agent_id, {}):
+                    self._in.get(to_id, {}).pop(agent_id, None)
+                for from_id in self._in.pop(agent_id, {}):
+                    self._out.get(from_id, {}).pop(agent_id, None)
+            self._record("remove", agent_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+            self._graph = None
+            self.version += 1
+            self._log.clear()
+
+
+_cache: RelationshipGraphCache | None = None
+
+
+def get_relationship_graph_cache() -> RelationshipGraphCache:
+    global _cache
+    if _cache is None:
+        _cache = RelationshipGraphCache()
+    return _cache
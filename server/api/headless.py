@@ -0,0 +1,135 @@
+"""Headless fast-forward simulation driver.
+
+Runs ``SimulationLoop`` ticks back-to-back against a virtual clock, moving
+points in fixed ``dt`` steps between ticks, and reports throughput::
+
+    python -m api.headless --ticks 10000 --stub-llm --agents 20 \\
+        --database /tmp/bench.db --vector-db /tmp/bench_vectors.db
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+class VirtualClock:
+    """Clock that only moves when the driver advances it."""
+
+    def __init__(self, start: float | None = None):
+        self._now = time.time() if start is None else start
+
+    def time(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float):
+        self._now += seconds
+
+
+def _seed_agents(count: int):
+    from . import models
+    from .database.crud_agents import create_agent, get_agents
+    from .database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        existing = [a for a in get_agents(db, limit=100000) if (a.type or "agent") == "agent"]
+        for i in range(len(existing), count):
+            create_agent(
+                db,
+                models.AgentCreate(name=f"Agent {i}", personality="Headless test agent.", mood="neutral"),
+            )
+    finally:
+        db.close()
+
+
+async def run(ticks: int, dt: float, report_every: int = 0) -> dict:
+    from .llm.simulation import SimulationLoop
+    from .routers.ws.points import manager
+    from .websocket.ws_logic import advance_points
+
+    clock = VirtualClock()
+    sim = SimulationLoop(clock=clock.time)
+    manager.reload_from_db()
+
+    errors = 0
+    chats = 0
+    phases: dict[str, float] = {}
+    started = time.perf_counter()
+    for i in range(1, ticks + 1):
+        await sim.run_tick()
+        for name, seconds in sim.tick_history(1)[0]["phases"].items():
+            phases[name] = phases.get(name, 0.0) + seconds
+        for result in sim.last_results:
+            if result.get("error"):
+                errors += 1
+            elif result.get("type", "").startswith("auto_chat"):
+                chats += 1
+        clock.advance(dt)
+        await asyncio.to_thread(advance_points, manager, dt)
+        if report_every and i % report_every == 0:
+            elapsed = time.perf_counter() - started
+            print(f"[Headless] tick {i}/{ticks}: {i / elapsed:.1f} ticks/s")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "ticks": ticks,
+        "dt": dt,
+        "wall_seconds": round(elapsed, 3),
+        "ticks_per_second": round(ticks / elapsed, 2) if elapsed > 0 else None,
+        "virtual_seconds": round(ticks * dt, 3),
+        "chats": chats,
+        "errors": errors,
+        "phase_seconds": {name: round(seconds, 3) for name, seconds in sorted(phases.items())},
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m api.headless", description="Run the simulation without wall-clock waits")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--dt", type=float, default=8.0, help="virtual seconds between ticks")
+    parser.add_argument("--stub-llm", action="store_true", help="use the offline stub LLM and hash embeddings")
+    parser.add_argument("--agents", type=int, default=0, help="create agents until the world has this many")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--database", help="path to the main SQLite database")
+    parser.add_argument("--vector-db", help="path to the vector memory database")
+    parser.add_argument("--snapshot", help="restore this snapshot before running")
+    parser.add_argument("--report-every", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.database:
+        os.environ["VWORLD_DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.database)}"
+    if args.vector_db:
+        os.environ["VWORLD_VECTOR_DB_PATH"] = os.path.abspath(args.vector_db)
+    if args.seed is not None:
+        from .world.rng import get_world_rng
+
+        get_world_rng().reseed(args.seed)
+
+    from .database import init_db
+    from .llm import config
+
+    init_db()
+    stub = None
+    if args.stub_llm:
+        from .llm.stub import StubLLM
+
+        stub = StubLLM()
+        config.set_llm(stub)
+        config.set_embedding_model(config.EmbeddingModel(load_model=False))
+    if args.snapshot:
+        from .world.snapshot import restore_snapshot
+
+        restore_snapshot(args.snapshot)
+    if args.agents:
+        _seed_agents(args.agents)
+
+    report = asyncio.run(run(args.ticks, args.dt, args.report_every))
+    if stub is not None:
+        report["llm_calls"] = stub.calls
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
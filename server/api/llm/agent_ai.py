@@ -1,32 +1,40 @@
-﻿from sqlalchemy.orm import Session
+﻿import json
 
-from .config import get_llm, get_embedding_model
+from sqlalchemy.orm import Session
+
+from .config import get_llm, get_embedding_model, llm_available
+from .context import fit_prompt, get_fragment_cache
 from .memory_store import get_memory_store
 from .zones import get_zone_label
 from .emotions import (
-    parse_mood,
-    mood_to_json,
     mood_description,
     mood_to_style,
     analyze_emotion_change,
+    analyze_interaction,
     analyze_sympathy_change,
 )
+from .text_analysis import BLOCKED_CHAT_MARKERS, is_incomplete
 from .prompts import (
     SYSTEM_PROMPT,
     MESSAGE_PROMPT,
     EVENT_REACTION_PROMPT,
     SUMMARIZE_PROMPT,
     CHAT_INIT_PROMPT,
+    DIALOGUE_PAIR_PROMPT,
     get_sympathy_hint,
 )
-from ..database.models import Agent, Relationship, Memory
+from ..database.models import Agent, Memory
 from ..database.crud_environment import get_environment
-from ..database.crud_relationships import upsert_relationship, get_agent_relationships
+from ..database.crud_relationships import upsert_relationship
+from ..database.relationship_graph import get_relationship_graph_cache
 from ..database.crud_agents import get_agent, get_agents
 from ..database.crud_events import create_event
 from .. import models
 
 
+NO_MEMORIES = "Нет воспоминаний."
+
+
 def persist_agent_memory(db: Session, agent_id: int, text: str, memory_type: str = "episode") -> Memory:
     embeddings = get_embedding_model()
     memory_store = get_memory_store()
@@ -39,6 +47,23 @@ def persist_agent_memory(db: Session, agent_id: int, text: str, memory_type: str
     return db_memory
 
 
+def persist_world_memory(text: str):
+    """Remember a world-wide event once for all agents; the event log keeps the readable record."""
+    get_memory_store().add_world_memory(text, get_embedding_model().embed_query(text))
+
+
+def _parse_dialogue_pair(raw: str) -> dict:
+    text = (raw or "").strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
 class AgentBrain:
     def __init__(self, agent_id: int, db: Session):
         self.agent_id = agent_id
@@ -55,14 +80,19 @@ class AgentBrain:
         return "неизвестная зона"
 
     def _get_system_prompt(self) -> str:
-        mood = parse_mood(self.agent.mood)
-        return SYSTEM_PROMPT.format(
-            name=self.agent.name,
-            personality=self.agent.personality,
-            mood_description=mood_description(mood),
-            mood_style=mood_to_style(mood),
-            current_zone=self._get_current_zone_label(),
-        )
+        zone = self._get_current_zone_label()
+
+        def build() -> str:
+            mood = self.agent.mood
+            return SYSTEM_PROMPT.format(
+                name=self.agent.name,
+                personality=self.agent.personality,
+                mood_description=mood_description(mood),
+                mood_style=mood_to_style(mood),
+                current_zone=zone,
+            )
+
+        return get_fragment_cache().get(self.agent, "system", (self.agent.mood, zone), build)
 
     @staticmethod
     def _is_llm_error(text: str) -> bool:
@@ -111,23 +141,7 @@ class AgentBrain:
             left, right = cleaned.split(":", 1)
             if len(left.split()) <= 3:
                 cleaned = right.strip()
-        lowered = cleaned.lower()
-        blocked_markers = (
-            "цель:",
-            "действие:",
-            "настроение:",
-            "реакция:",
-            "план:",
-            "технический шум",
-            "нет никакого смысла",
-            "странными фразами",
-            "как жизнь",
-            "всё супер",
-            "жарко сегодня",
-            "привет, ",
-            "привет.",
-        )
-        if any(marker in lowered for marker in blocked_markers):
+        if BLOCKED_CHAT_MARKERS.search(cleaned.lower()):
             return ""
         if cleaned.startswith("- "):
             cleaned = cleaned[2:].strip()
@@ -137,26 +151,16 @@ class AgentBrain:
 
     @staticmethod
     def _is_incomplete_text(text: str) -> bool:
-        if not text:
-            return True
-        stripped = text.strip().lower()
-        dangling = {
-            "и", "но", "а", "что", "как", "когда", "если", "чтобы", "ли",
-            "в", "на", "под", "над", "у", "с", "к", "по", "от", "до", "для", "из",
-            "не", "ну", "тоже", "уже", "ещё", "еще", "тут", "там", "здесь",
-        }
-        if stripped.endswith(",") or stripped.endswith(";") or stripped.endswith(":"):
-            return True
-        parts = stripped.replace("!", ".").replace("?", ".").split()
-        if not parts:
-            return True
-        if len(parts) < 4:
-            return True
-        if parts[-1] in dangling:
-            return True
-        if stripped.endswith("не.") or stripped.endswith("не!") or stripped.endswith("не?"):
-            return True
-        return False
+        return is_incomplete(text)
+
+    def _accept_line(self, text) -> str:
+        """Cleaned line if it passes the chat quality rules, otherwise an empty string."""
+        if not isinstance(text, str) or self._is_llm_error(text):
+            return ""
+        cleaned = self._clean_chat_text(text)
+        if self._is_incomplete_text(cleaned):
+            return ""
+        return cleaned
 
     @staticmethod
     def _normalize_for_compare(text: str) -> str:
@@ -166,6 +170,9 @@ class AgentBrain:
         return " ".join(cleaned.split())
 
     def _voice_guideline(self) -> str:
+        return get_fragment_cache().get(self.agent, "voice", None, self._build_voice_guideline)
+
+    def _build_voice_guideline(self) -> str:
         name = (self.agent.name or "").lower()
         personality = (self.agent.personality or "").lower()
         if "mira" in name:
@@ -190,6 +197,11 @@ class AgentBrain:
         return "Говори живо, разнообразно и по ситуации, без повторов и штампов."
 
     def _weather_bias_hint(self, weather: str) -> str:
+        return get_fragment_cache().get(
+            self.agent, "weather", weather, lambda: self._build_weather_bias_hint(weather)
+        )
+
+    def _build_weather_bias_hint(self, weather: str) -> str:
         name = (self.agent.name or "").lower()
         weather = (weather or "sunny").lower()
         if "mira" in name:
@@ -238,6 +250,8 @@ class AgentBrain:
     def _generate_message_with_retry(self, prompt_text: str, weather: str, tries: int = 2) -> str:
         candidate = ""
         for _ in range(max(1, tries)):
+            if not llm_available(self.llm):
+                break
             raw = self.llm.invoke(prompt_text).content
             if self._is_llm_error(raw):
                 continue
@@ -249,53 +263,92 @@ class AgentBrain:
             return candidate
         return candidate or self._fallback_dialogue_line(weather)
 
-    def _get_relevant_memories(self, query: str, k: int = 5) -> str:
+    def _sympathy_towards(self, other_agent_id: int) -> int:
+        return get_relationship_graph_cache().sympathy(self.db, self.agent_id, other_agent_id) or 0
+
+    def _generate_dialogue_pair(self, target_brain: "AgentBrain", topic_context: str, weather: str) -> tuple[str, str]:
+        """Both opening lines from one LLM call; a line that fails validation comes back empty.
+
+        The reply is only kept together with the opening line it answers.
+        """
+        if not llm_available(self.llm):
+            return "", ""
+        target = target_brain.agent
+        initiator_sympathy = self._sympathy_towards(target.id)
+        responder_sympathy = target_brain._sympathy_towards(self.agent_id)
+        fields = dict(
+            initiator_name=self.agent.name,
+            responder_name=target.name,
+            initiator_system=self._get_system_prompt(),
+            initiator_voice=self._voice_guideline() + "\n" + self._weather_bias_hint(weather),
+            initiator_sympathy=initiator_sympathy,
+            initiator_hint=get_sympathy_hint(initiator_sympathy),
+            responder_system=target_brain._get_system_prompt(),
+            responder_voice=target_brain._voice_guideline() + "\n" + target_brain._weather_bias_hint(weather),
+            responder_sympathy=responder_sympathy,
+            responder_hint=get_sympathy_hint(responder_sympathy),
+            topic_context=topic_context,
+            weather=weather,
+            current_zone=self._get_current_zone_label(),
+        )
+        prompt = fit_prompt(
+            lambda sections: DIALOGUE_PAIR_PROMPT.format(**fields, **sections),
+            {"past_conversations": target_brain._get_memory_items(f"разговор с {self.agent.name}")},
+            {"past_conversations": NO_MEMORIES},
+        )
+        pair = _parse_dialogue_pair(self.llm.invoke(prompt).content)
+        first = self._accept_line(pair.get("initiator"))
+        if not first:
+            return "", ""
+        reply = target_brain._accept_line(pair.get("responder"))
+        if self._normalize_for_compare(reply) == self._normalize_for_compare(first):
+            reply = ""
+        return first, reply
+
+    def _get_memory_items(self, query: str, k: int = 5) -> list[tuple[float, str]]:
+        """``(similarity, text)`` pairs for prompt sections trimmed by ``fit_prompt``."""
         vec = self.embeddings.embed_query(query)
-        memories = self.memory_store.search(self.agent_id, vec, k=k)
+        return self.memory_store.search(self.agent_id, vec, k=k)
+
+    def _get_relevant_memories(self, query: str, k: int = 5) -> str:
+        memories = self._get_memory_items(query, k)
         if not memories:
             return "РќРµС‚ РІРѕСЃРїРѕРјРёРЅР°РЅРёР№."
         return "\n".join([f"- {text}" for _, text in memories])
 
     def _get_relationships_text(self) -> str:
-        rels = get_agent_relationships(self.db, self.agent_id)
+        graph = get_relationship_graph_cache()
+        rels = graph.relations(self.db, self.agent_id)
         if not rels:
             return "РџРѕРєР° РЅРё СЃ РєРµРј РЅРµ Р·РЅР°РєРѕРј."
         parts = []
-        for r in rels:
-            other_id = r.agent_to_id if r.agent_from_id == self.agent_id else r.agent_from_id
-            other = get_agent(self.db, other_id)
-            if other:
-                level = "РґСЂСѓРі" if r.sympathy > 3 else "РІСЂР°Рі" if r.sympathy < -3 else "Р·РЅР°РєРѕРјС‹Р№"
-                parts.append(f"- {other.name}: {level} (СЃРёРјРїР°С‚РёСЏ: {r.sympathy})")
+        for from_id, to_id, sympathy in rels:
+            other_name = graph.agent_name(self.db, to_id if from_id == self.agent_id else from_id)
+            if other_name:
+                level = "РґСЂСѓРі" if sympathy > 3 else "РІСЂР°Рі" if sympathy < -3 else "Р·РЅР°РєРѕРјС‹Р№"
+                parts.append(f"- {other_name}: {level} (СЃРёРјРїР°С‚РёСЏ: {sympathy})")
         return "\n".join(parts) if parts else "РџРѕРєР° РЅРё СЃ РєРµРј РЅРµ Р·РЅР°РєРѕРј."
 
     def _save_memory(self, text: str, memory_type: str = "episode"):
         persist_agent_memory(self.db, self.agent_id, text, memory_type)
 
-    def _update_mood(self, event: str) -> dict:
-        mood = parse_mood(self.agent.mood)
-        new_mood = analyze_emotion_change(self.agent.personality, mood, event)
-        self.agent.mood = mood_to_json(new_mood)
+    def _update_mood(self, event: str, new_mood: models.Mood | None = None) -> models.Mood:
+        if new_mood is None:
+            new_mood = analyze_emotion_change(self.agent.personality, self.agent.mood, event)
+        self.agent.mood = new_mood
         self.db.commit()
         self.db.refresh(self.agent)
         return new_mood
 
-    def _update_sympathy(self, other_agent_id: int, message: str) -> int:
-        change = analyze_sympathy_change(message)
+    def _update_sympathy(self, other_agent_id: int, message: str, change: int | None = None) -> int:
+        if change is None:
+            change = analyze_sympathy_change(message)
         if change == 0:
             return 0
 
-        other = get_agent(self.db, other_agent_id)
-        other_name = other.name if other else f"Agent {other_agent_id}"
-        existing = (
-            self.db.query(Relationship)
-            .filter(
-                Relationship.agent_from_id == self.agent_id,
-                Relationship.agent_to_id == other_agent_id,
-            )
-            .first()
-        )
-        current = existing.sympathy if existing else 0
+        graph = get_relationship_graph_cache()
+        other_name = graph.agent_name(self.db, other_agent_id) or f"Agent {other_agent_id}"
+        current = graph.sympathy(self.db, self.agent_id, other_agent_id) or 0
         new_sympathy = max(-10, min(10, current + change))
         upsert_relationship(
             self.db,
@@ -306,15 +359,7 @@ class AgentBrain:
             ),
         )
 
-        reverse_existing = (
-            self.db.query(Relationship)
-            .filter(
-                Relationship.agent_from_id == other_agent_id,
-                Relationship.agent_to_id == self.agent_id,
-            )
-            .first()
-        )
-        reverse_current = reverse_existing.sympathy if reverse_existing else 0
+        reverse_current = graph.sympathy(self.db, other_agent_id, self.agent_id) or 0
         reverse_delta = 1 if change > 0 else -1
         reverse_new = max(-10, min(10, reverse_current + reverse_delta))
         upsert_relationship(
@@ -360,48 +405,53 @@ class AgentBrain:
             "agent_id": self.agent_id,
             "agent_name": self.agent.name,
             "plan": response,
-            "mood": new_mood,
+            "mood": new_mood.to_dict(),
         }
 
-    def respond_to_message(self, from_agent_id: int, message: str) -> dict:
+    def respond_to_message(
+        self,
+        from_agent_id: int,
+        message: str,
+        response: str | None = None,
+        settle: bool = True,
+    ) -> dict:
+        """Reply to ``message``; a ``response`` generated elsewhere skips the LLM call.
+
+        ``settle=False`` leaves the mood and sympathy updates to the caller.
+        """
         from_agent = get_agent(self.db, from_agent_id)
         if not from_agent:
             return {"error": "Agent not found"}
 
-        rel = (
-            self.db.query(Relationship)
-            .filter(
-                Relationship.agent_from_id == self.agent_id,
-                Relationship.agent_to_id == from_agent_id,
-            )
-            .first()
-        )
-        sympathy = rel.sympathy if rel else 0
-        past = self._get_relevant_memories(f"СЂР°Р·РіРѕРІРѕСЂ СЃ {from_agent.name}: {message}")
         env = get_environment(self.db)
-
-        system = self._get_system_prompt()
-        msg_prompt = MESSAGE_PROMPT.format(
-            speaker_name=from_agent.name,
-            message=message,
-            weather=env.weather,
-            current_zone=self._get_current_zone_label(),
-            sympathy=sympathy,
-            sympathy_hint=get_sympathy_hint(sympathy),
-            past_conversations=past,
-        )
-        response = self._generate_message_with_retry(
-            system
-            + "\n\n"
-            + msg_prompt
-            + "\n\n"
-            + self._voice_guideline()
-            + "\n"
-            + self._weather_bias_hint(env.weather)
-            + "\nНе начинай ответ с 'Привет' без причины. Не копируй типовые фразы про жару/снег.",
-            env.weather,
-            tries=3,
-        )
+        if response is None:
+            sympathy = self._sympathy_towards(from_agent_id)
+            system = self._get_system_prompt()
+            current_zone = self._get_current_zone_label()
+            guidance = (
+                self._voice_guideline()
+                + "\n"
+                + self._weather_bias_hint(env.weather)
+                + "\nНе начинай ответ с 'Привет' без причины. Не копируй типовые фразы про жару/снег."
+            )
+            prompt = fit_prompt(
+                lambda sections: system
+                + "\n\n"
+                + MESSAGE_PROMPT.format(
+                    speaker_name=from_agent.name,
+                    message=message,
+                    weather=env.weather,
+                    current_zone=current_zone,
+                    sympathy=sympathy,
+                    sympathy_hint=get_sympathy_hint(sympathy),
+                    past_conversations=sections["past_conversations"],
+                )
+                + "\n\n"
+                + guidance,
+                {"past_conversations": self._get_memory_items(f"разговор с {from_agent.name}: {message}")},
+                {"past_conversations": NO_MEMORIES},
+            )
+            response = self._generate_message_with_retry(prompt, env.weather, tries=3)
         if self._is_incomplete_text(response):
             response = self._fallback_dialogue_line(env.weather)
         if self._normalize_for_compare(response) == self._normalize_for_compare(message):
@@ -411,40 +461,44 @@ class AgentBrain:
         other_event = f"РЇ СЃРєР°Р·Р°Р» {self.agent.name}: '{message}'. {self.agent.name} РѕС‚РІРµС‚РёР»: '{response}'"
         persist_agent_memory(self.db, from_agent_id, other_event)
 
-        sympathy_change = self._update_sympathy(from_agent_id, message)
-        new_mood = self._update_mood(f"{from_agent.name} СЃРєР°Р·Р°Р»: {message}")
-
-        return {
+        result = {
             "from_agent_id": from_agent_id,
             "from_agent_name": from_agent.name,
             "to_agent_id": self.agent_id,
             "to_agent_name": self.agent.name,
             "message": message,
             "response": response,
-            "mood": new_mood,
-            "sympathy_change": sympathy_change,
         }
+        if settle:
+            transcript = f"{from_agent.name}: {message}\n{self.agent.name}: {response}"
+            [(new_mood, sympathy_change)] = settle_interaction(
+                transcript, [(self, from_agent_id, message, f"{from_agent.name} СЃРєР°Р·Р°Р»: {message}")]
+            )
+            result["mood"] = new_mood.to_dict()
+            result["sympathy_change"] = sympathy_change
+        return result
 
-    def react_to_event(self, event_text: str) -> dict:
-        memories_text = self._get_relevant_memories(event_text)
+    def react_to_event(self, event_text: str, new_mood: models.Mood | None = None) -> dict:
+        """React to a world event; ``new_mood`` comes from a batched ``analyze_world_event``."""
         system = self._get_system_prompt()
-        event_prompt = EVENT_REACTION_PROMPT.format(
-            event=event_text,
-            memories=memories_text,
+        prompt = fit_prompt(
+            lambda sections: system + "\n\n" + EVENT_REACTION_PROMPT.format(event=event_text, memories=sections["memories"]),
+            {"memories": self._get_memory_items(event_text)},
+            {"memories": NO_MEMORIES},
         )
-        response = self.llm.invoke(system + "\n\n" + event_prompt).content
+        response = self.llm.invoke(prompt).content if llm_available(self.llm) else ""
         if self._is_llm_error(response):
             response = "Я это заметил и буду действовать осторожно."
 
         self._save_memory(f"РџСЂРѕРёР·РѕС€Р»Рѕ: {event_text}. РњРѕСЏ СЂРµР°РєС†РёСЏ: {response}")
-        new_mood = self._update_mood(event_text)
+        new_mood = self._update_mood(event_text, new_mood)
 
         return {
             "agent_id": self.agent_id,
             "agent_name": self.agent.name,
             "event": event_text,
             "reaction": response,
-            "mood": new_mood,
+            "mood": new_mood.to_dict(),
         }
 
     def start_chat(self, target_agent_id: int, topic: str = "") -> dict:
@@ -454,41 +508,38 @@ class AgentBrain:
 
         topic_context = f"РўРµРјР°: {topic}" if topic else "РџСЂРѕСЃС‚Рѕ С…РѕС‡РµС€СЊ РїРѕРѕР±С‰Р°С‚СЊСЃСЏ."
         env = get_environment(self.db)
-        rel = (
-            self.db.query(Relationship)
-            .filter(
-                Relationship.agent_from_id == self.agent_id,
-                Relationship.agent_to_id == target_agent_id,
+        target_brain = AgentBrain(target_agent_id, self.db)
+        first_message, paired_response = self._generate_dialogue_pair(target_brain, topic_context, env.weather)
+
+        if not first_message:
+            sympathy = self._sympathy_towards(target_agent_id)
+            system1 = self._get_system_prompt()
+            init_prompt = CHAT_INIT_PROMPT.format(
+                target_name=target.name,
+                topic_context=topic_context,
+                weather=env.weather,
+                current_zone=self._get_current_zone_label(),
+                sympathy=sympathy,
+                sympathy_hint=get_sympathy_hint(sympathy),
             )
-            .first()
-        )
-        sympathy = rel.sympathy if rel else 0
-        system1 = self._get_system_prompt()
-        init_prompt = CHAT_INIT_PROMPT.format(
-            target_name=target.name,
-            topic_context=topic_context,
-            weather=env.weather,
-            current_zone=self._get_current_zone_label(),
-            sympathy=sympathy,
-            sympathy_hint=get_sympathy_hint(sympathy),
-        )
-        first_message = self._generate_message_with_retry(
-            system1
-            + "\n\n"
-            + init_prompt
-            + "\n\n"
-            + self._voice_guideline()
-            + "\n"
-            + self._weather_bias_hint(env.weather)
-            + "\nНачни реплику не шаблонно. Не пиши общие фразы уровня 'как жизнь?' или 'жарко сегодня'.",
-            env.weather,
-            tries=3,
-        )
-        if self._is_incomplete_text(first_message):
-            first_message = self._fallback_dialogue_line(env.weather)
+            first_message = self._generate_message_with_retry(
+                system1
+                + "\n\n"
+                + init_prompt
+                + "\n\n"
+                + self._voice_guideline()
+                + "\n"
+                + self._weather_bias_hint(env.weather)
+                + "\nНачни реплику не шаблонно. Не пиши общие фразы уровня 'как жизнь?' или 'жарко сегодня'.",
+                env.weather,
+                tries=3,
+            )
+            if self._is_incomplete_text(first_message):
+                first_message = self._fallback_dialogue_line(env.weather)
 
-        target_brain = AgentBrain(target_agent_id, self.db)
-        response_data = target_brain.respond_to_message(self.agent_id, first_message)
+        response_data = target_brain.respond_to_message(
+            self.agent_id, first_message, response=paired_response or None, settle=False
+        )
         if self._normalize_for_compare(response_data.get("response", "")) == self._normalize_for_compare(first_message):
             response_data["response"] = target_brain._fallback_dialogue_line(env.weather)
 
@@ -496,8 +547,11 @@ class AgentBrain:
             f"РЇ РЅР°С‡Р°Р» СЂР°Р·РіРѕРІРѕСЂ СЃ {target.name}: '{first_message}'. "
             f"{target.name} РѕС‚РІРµС‚РёР»: '{response_data['response']}'"
         )
-        self._update_sympathy(target_agent_id, response_data["response"])
-        self._update_mood(f"РџРѕРіРѕРІРѕСЂРёР» СЃ {target.name}")
+        transcript = f"{self.agent.name}: {first_message}\n{target.name}: {response_data['response']}"
+        settle_interaction(transcript, [
+            (target_brain, self.agent_id, first_message, f"{self.agent.name} СЃРєР°Р·Р°Р»: {first_message}"),
+            (self, target_agent_id, response_data["response"], f"РџРѕРіРѕРІРѕСЂРёР» СЃ {target.name}"),
+        ])
         self.db.refresh(target)
 
         return {
@@ -505,8 +559,8 @@ class AgentBrain:
                 {"speaker": self.agent.name, "speaker_id": self.agent_id, "text": first_message},
                 {"speaker": target.name, "speaker_id": target_agent_id, "text": response_data["response"]},
             ],
-            "initiator_mood": parse_mood(self.agent.mood),
-            "responder_mood": parse_mood(target.mood),
+            "initiator_mood": self.agent.mood.to_dict(),
+            "responder_mood": target.mood.to_dict(),
         }
 
     def summarize_memories(self) -> dict:
@@ -515,9 +569,14 @@ class AgentBrain:
         if count < 5:
             return {"summary": "РЎР»РёС€РєРѕРј РјР°Р»Рѕ РІРѕСЃРїРѕРјРёРЅР°РЅРёР№.", "memories_count": count}
 
-        memories_text = "\n".join([f"- {m}" for m in all_memories[:30]])
-        prompt = SUMMARIZE_PROMPT.format(name=self.agent.name, memories=memories_text)
-        summary = self.llm.invoke(prompt).content
+        # Newest first; when the budget is tight the oldest of the 30 are dropped.
+        prompt = fit_prompt(
+            lambda sections: SUMMARIZE_PROMPT.format(name=self.agent.name, memories=sections["memories"]),
+            {"memories": [(-i, m) for i, m in enumerate(all_memories[:30])]},
+        )
+        summary = self.llm.invoke(prompt).content if llm_available(self.llm) else ""
+        if self._is_llm_error(summary):
+            return {"summary": summarize_memories(all_memories), "memories_count": count}
 
         if count > 50:
             self.memory_store.delete_old_episodes(self.agent_id, keep_last=10)
@@ -532,3 +591,18 @@ def summarize_memories(memories: list) -> str:
         return "РќРµС‚ РІРѕСЃРїРѕРјРёРЅР°РЅРёР№."
     return "\n".join([str(m) for m in memories[:10]])
 
+
+def settle_interaction(transcript: str, sides: list[tuple[AgentBrain, int, str, str]]) -> list[tuple[models.Mood, int]]:
+    """Apply the mood and sympathy updates of a conversation from one ``analyze_interaction`` call.
+
+    Each side is ``(brain, partner_id, heard, event)``; returns ``(mood, sympathy_change)`` per side.
+    """
+    analysis = analyze_interaction(
+        [(brain.agent.name, brain.agent.personality, brain.agent.mood, heard, event) for brain, _, heard, event in sides],
+        transcript,
+    )
+    results = []
+    for (brain, partner_id, heard, event), (mood, change) in zip(sides, analysis):
+        change = brain._update_sympathy(partner_id, heard, change)
+        results.append((brain._update_mood(event, mood), change))
+    return results
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+CASSETTE_MODES = {"off", "record", "replay"}
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """JSONL file of recorded ``prompt -> completion`` pairs.
+
+    In replay mode every recorded completion for a prompt is served in the
+    order it was captured; once they run out the last one is repeated, so a
+    replayed run is deterministic regardless of how often a prompt recurs.
+    """
+
+    def __init__(self, path: str, mode: str, replay_latency: bool = False):
+        if mode not in CASSETTE_MODES - {"off"}:
+            raise ValueError(f"cassette mode must be record or replay, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[dict]] = {}
+        self._cursor: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"cassette not found: {self.path}")
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def record(self, model: str, prompt: str, content: str, latency: float):
+        entry = {
+            "key": prompt_key(model, prompt),
+            "model": model,
+            "prompt": prompt,
+            "response": content,
+            "latency": round(latency, 4),
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def replay(self, model: str, prompt: str) -> str | None:
+        key = prompt_key(model, prompt)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                return None
+            position = self._cursor.get(key, 0)
+            entry = entries[min(position, len(entries) - 1)]
+            self._cursor[key] = position + 1
+            self.hits += 1
+        if self.replay_latency:
+            time.sleep(entry.get("latency", 0.0))
+        return entry["response"]
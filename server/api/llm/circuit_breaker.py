@@ -0,0 +1,97 @@
+import threading
+import time
+
+from ..metrics import get_metrics
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+_metrics = get_metrics()
+_STATE = _metrics.gauge("vworld_llm_circuit_state", "LLM circuit breaker state: 0 closed, 1 open, 2 half-open.")
+_TRANSITIONS = _metrics.counter("vworld_llm_circuit_transitions_total", "Circuit breaker state changes.", labels=("state",))
+_SHORT_CIRCUITED = _metrics.counter("vworld_llm_short_circuited_total", "LLM attempts rejected while the circuit was open.")
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider until a probe shows it has recovered.
+
+    ``failure_threshold`` consecutive failures open the circuit. After
+    ``reset_timeout`` seconds it turns half-open and lets ``half_open_probes``
+    attempts through; a success closes it, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        _STATE.set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def available(self) -> bool:
+        """Whether a call could be attempted now, without reserving a probe."""
+        return self.state != OPEN
+
+    def _transition(self, state: str):
+        self._state = state
+        _STATE.set(_STATE_VALUES[state])
+        _TRANSITIONS.inc(state=state)
+        if state == OPEN:
+            self._opened_at = self._clock()
+            print(f"[LLM] Circuit open for {self.reset_timeout:.0f}s after {self._failures} failures")
+        elif state == CLOSED:
+            print("[LLM] Circuit closed")
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    _SHORT_CIRCUITED.inc()
+                    return False
+                self._transition(HALF_OPEN)
+                self._probes = 0
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    _SHORT_CIRCUITED.inc()
+                    return False
+                self._probes += 1
+            return True
+
+    def release_probe(self):
+        """Hand back a probe taken by ``allow`` for an attempt that never reached the provider."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._transition(OPEN)
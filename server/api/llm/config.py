@@ -1,4 +1,5 @@
 import hashlib
+import json
 import os
 import time
 from pathlib import Path
@@ -7,6 +8,12 @@ from typing import Any
 import requests
 from dotenv import load_dotenv
 
+from ..metrics import get_metrics
+from .cassette import Cassette
+from .circuit_breaker import CircuitBreaker
+from .context import clip_middle
+from .scheduler import LLM_QUEUE_TIMEOUT_SECONDS, get_scheduler
+
 _env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(_env_path)
 
@@ -19,10 +26,22 @@ LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
 LLM_RETRY_BASE_SECONDS = float(os.environ.get("LLM_RETRY_BASE_SECONDS", "2"))
 LLM_MAX_PROMPT_CHARS = int(os.environ.get("LLM_MAX_PROMPT_CHARS", "12000"))
 LLM_TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.7"))
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_RESET_SECONDS = float(os.environ.get("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_STREAMING = os.environ.get("LLM_STREAMING", "1") not in {"0", "false", "False"}
+LLM_CASSETTE = os.environ.get("LLM_CASSETTE", "")
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "off").strip().lower()
+LLM_CASSETTE_REPLAY_LATENCY = os.environ.get("LLM_CASSETTE_REPLAY_LATENCY", "0") not in {"0", "false", "False"}
 
 _embedding_instance = None
 _llm_instance = None
 
+_metrics = get_metrics()
+_LLM_CALLS = _metrics.counter("vworld_llm_calls_total", "LLM completions by outcome.", labels=("outcome",))
+_LLM_SECONDS = _metrics.histogram("vworld_llm_call_seconds", "LLM completion latency, retries included.")
+_EMBEDDINGS = _metrics.counter("vworld_embeddings_total", "Texts embedded.", labels=("backend",))
+_EMBEDDING_SECONDS = _metrics.histogram("vworld_embedding_seconds", "Embedding latency per text.")
+
 
 class LLMResponse:
     def __init__(self, content: str):
@@ -67,11 +86,41 @@ def _pick_best_text(*candidates: Any) -> str:
     return texts[0]
 
 
+def _stream_delta(chunk: Any) -> str:
+    """Text carried by one SSE chunk; whitespace is kept so tokens join up."""
+    if not isinstance(chunk, dict):
+        return chunk if isinstance(chunk, str) else ""
+    choices = chunk.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        delta = choices[0].get("delta") or choices[0].get("message") or {}
+        content = delta.get("content") if isinstance(delta, dict) else delta
+        return content if isinstance(content, str) else ""
+    for key in ("delta", "output", "text", "content"):
+        value = chunk.get(key)
+        if isinstance(value, str):
+            return value
+    return ""
+
+
+def observe_llm_call(seconds: float, content: str):
+    outcome = "error" if content.startswith("[GenAPI error") else "ok"
+    _LLM_CALLS.inc(outcome=outcome)
+    _LLM_SECONDS.observe(seconds)
+
+
 class GenApiLLM:
-    def __init__(self, temperature: float = 0.7):
+    def __init__(self, temperature: float = 0.7, cassette: Cassette | None = None):
         self.temperature = temperature
+        self.cassette = cassette
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
         self._session = requests.Session()
 
+    @property
+    def available(self) -> bool:
+        if self.cassette is not None and self.cassette.replaying:
+            return True
+        return self.breaker.available
+
     @property
     def api_url(self) -> str:
         base = GENAPI_BASE_URL.rstrip("/")
@@ -79,25 +128,145 @@ class GenApiLLM:
         return f"{base}/networks/{model}"
 
     def invoke(self, prompt: str, max_retries: int | None = None) -> LLMResponse:
-        if not GENAPI_API_KEY:
-            return LLMResponse(content="[GenAPI error: GENAPI_API_KEY is not set]")
-
-        retries = LLM_MAX_RETRIES if max_retries is None else max_retries
-        safe_prompt = (prompt or "")[:LLM_MAX_PROMPT_CHARS]
-        payload = {
+        started = time.perf_counter()
+        if self.cassette is not None and self.cassette.replaying:
+            content = self.cassette.replay(GENAPI_MODEL, prompt or "")
+            response = LLMResponse(content=content if content is not None else "[GenAPI error: cassette miss]")
+        else:
+            response = self._invoke(prompt, max_retries)
+            if self.cassette is not None:
+                self.cassette.record(GENAPI_MODEL, prompt or "", response.content, time.perf_counter() - started)
+        observe_llm_call(time.perf_counter() - started, response.content)
+        return response
+
+    def _payload(self, prompt: str) -> dict:
+        return {
             "is_sync": True,
             "model": GENAPI_MODEL,
-            "messages": [{"role": "user", "content": safe_prompt}],
+            "messages": [{"role": "user", "content": clip_middle(prompt or "", LLM_MAX_PROMPT_CHARS)}],
             "temperature": self.temperature,
             "max_tokens": 700,
         }
-        headers = {
+
+    @staticmethod
+    def _headers(accept: str = "application/json") -> dict:
+        return {
             "Authorization": f"Bearer {GENAPI_API_KEY}",
             "Content-Type": "application/json",
-            "Accept": "application/json",
+            "Accept": accept,
         }
 
+    def stream(self, prompt: str, max_retries: int | None = None):
+        """Yield the completion in chunks as the provider produces them.
+
+        Providers (or cassettes) that answer without ``text/event-stream`` yield
+        the whole reply once, so callers can always iterate. Errors come back as
+        a single ``[GenAPI error: ...]`` chunk, like ``invoke``. Until the first
+        chunk arrives, 429, 5xx and connection errors are retried with the same
+        backoff as ``invoke``; a stream that breaks off midway is not replayed.
+        """
+        if not LLM_STREAMING or not GENAPI_API_KEY or (self.cassette is not None and self.cassette.replaying):
+            yield self.invoke(prompt, max_retries).content
+            return
+
+        retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        scheduler = get_scheduler()
+        started = time.perf_counter()
+        parts: list[str] = []
+        error = "[GenAPI error: max retries exceeded]"
+        yielded = False
         for attempt in range(retries):
+            if not self.breaker.allow():
+                error = "[GenAPI error: circuit open]"
+                break
+            if not scheduler.acquire(timeout=LLM_QUEUE_TIMEOUT_SECONDS):
+                self.breaker.release_probe()
+                error = "[GenAPI error: LLM queue timeout]"
+                break
+
+            status = None
+            retry_after = None
+            error = ""
+            failed = False
+            try:
+                with self._session.post(
+                    self.api_url,
+                    json={**self._payload(prompt), "stream": True},
+                    headers=self._headers("text/event-stream"),
+                    timeout=LLM_TIMEOUT_SECONDS,
+                    stream=True,
+                ) as response:
+                    status = response.status_code
+                    retry_after = response.headers.get("Retry-After")
+                    if status >= 400:
+                        error = f"[GenAPI error: HTTP {status}]"
+                        failed = status >= 500
+                    elif "text/event-stream" not in response.headers.get("Content-Type", ""):
+                        data = response.json()
+                        content = _pick_best_text(data.get("output"), data.get("response"), data.get("choices"))
+                        if content:
+                            parts.append(content)
+                        else:
+                            error = f"[GenAPI error: empty output, status={data.get('status', 'unknown')}]"
+                    else:
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line or not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                delta = _stream_delta(json.loads(data))
+                            except json.JSONDecodeError:
+                                delta = data
+                            if delta:
+                                parts.append(delta)
+                                yielded = True
+                                yield delta
+            except Exception as e:
+                error = f"[GenAPI error: {e}]"
+                failed = True
+            finally:
+                scheduler.release(status, retry_after)
+                if failed:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+            if parts or not error or attempt >= retries - 1:
+                break
+            if status == 429:
+                # The scheduler holds the next attempt back until the backoff window closes.
+                continue
+            if failed and self.breaker.available:
+                time.sleep(min((attempt + 1) * LLM_RETRY_BASE_SECONDS, 12))
+                continue
+            break
+
+        content = error or "".join(parts) or "[GenAPI error: empty stream]"
+        if self.cassette is not None and not error:
+            self.cassette.record(GENAPI_MODEL, prompt or "", content, time.perf_counter() - started)
+        observe_llm_call(time.perf_counter() - started, content)
+        if not yielded:
+            yield content
+
+    def _invoke(self, prompt: str, max_retries: int | None) -> LLMResponse:
+        if not GENAPI_API_KEY:
+            return LLMResponse(content="[GenAPI error: GENAPI_API_KEY is not set]")
+
+        retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        payload = self._payload(prompt)
+        headers = self._headers()
+
+        scheduler = get_scheduler()
+        for attempt in range(retries):
+            if not self.breaker.allow():
+                return LLMResponse(content="[GenAPI error: circuit open]")
+            if not scheduler.acquire(timeout=LLM_QUEUE_TIMEOUT_SECONDS):
+                self.breaker.release_probe()
+                return LLMResponse(content="[GenAPI error: LLM queue timeout]")
+            released = False
+            recorded = False
             try:
                 response = self._session.post(
                     self.api_url,
@@ -105,12 +274,31 @@ class GenApiLLM:
                     headers=headers,
                     timeout=LLM_TIMEOUT_SECONDS,
                 )
-                if response.status_code in (429, 500, 502, 503, 504):
-                    if attempt < retries - 1:
-                        time.sleep(min((attempt + 1) * LLM_RETRY_BASE_SECONDS, 12))
-                        continue
+                scheduler.release(response.status_code, response.headers.get("Retry-After"))
+                released = True
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = None
+                if not isinstance(data, dict):
+                    data = None
+                failed = response.status_code >= 500 or (data is None and response.status_code < 400)
+                if failed:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                recorded = True
+                if response.status_code == 429 and attempt < retries - 1:
+                    # The scheduler holds the next attempt back until the backoff window closes.
+                    continue
+                if failed and attempt < retries - 1 and self.breaker.available:
+                    time.sleep(min((attempt + 1) * LLM_RETRY_BASE_SECONDS, 12))
+                    continue
 
-                data = response.json()
+                if data is None:
+                    if response.status_code >= 400:
+                        return LLMResponse(content=f"[GenAPI error: HTTP {response.status_code}]")
+                    return LLMResponse(content="[GenAPI error: invalid JSON body]")
                 if response.status_code >= 400:
                     if "errors_validation" in data:
                         return LLMResponse(content=f"[GenAPI error: validation {data['errors_validation']}]")
@@ -130,7 +318,11 @@ class GenApiLLM:
 
                 return LLMResponse(content=content)
             except Exception as e:
-                if attempt < retries - 1:
+                if not released:
+                    scheduler.release()
+                if not recorded:
+                    self.breaker.record_failure()
+                if attempt < retries - 1 and self.breaker.available:
                     time.sleep(min((attempt + 1) * LLM_RETRY_BASE_SECONDS, 12))
                     continue
                 return LLMResponse(content=f"[GenAPI error: {e}]")
@@ -138,17 +330,46 @@ class GenApiLLM:
         return LLMResponse(content="[GenAPI error: max retries exceeded]")
 
 
+def llm_available(llm=None) -> bool:
+    """False while the LLM circuit is open; callers should take their heuristic path."""
+    return getattr(llm or get_llm(), "available", True)
+
+
+def stream_completion(llm, prompt: str):
+    """Chunks from ``llm.stream`` when the client streams, else one chunk from ``invoke``."""
+    stream = getattr(llm, "stream", None)
+    if stream is None:
+        yield llm.invoke(prompt).content
+        return
+    yield from stream(prompt)
+
+
+def _cassette_from_env() -> Cassette | None:
+    if not LLM_CASSETTE or LLM_CASSETTE_MODE == "off":
+        return None
+    print(f"[LLM] Cassette {LLM_CASSETTE_MODE}: {LLM_CASSETTE}")
+    return Cassette(LLM_CASSETTE, LLM_CASSETTE_MODE, replay_latency=LLM_CASSETTE_REPLAY_LATENCY)
+
+
 def get_llm():
     global _llm_instance
     if _llm_instance is None:
-        _llm_instance = GenApiLLM(temperature=LLM_TEMPERATURE)
+        _llm_instance = GenApiLLM(temperature=LLM_TEMPERATURE, cassette=_cassette_from_env())
     return _llm_instance
 
 
+def set_llm(llm):
+    """Replace the shared LLM client, e.g. with ``StubLLM`` for offline runs."""
+    global _llm_instance
+    _llm_instance = llm
+
+
 class EmbeddingModel:
-    def __init__(self):
+    def __init__(self, load_model: bool = True):
         self.model: Any | None = None
         self._fallback_dim = 128
+        if not load_model:
+            return
         try:
             from sentence_transformers import SentenceTransformer
 
@@ -157,9 +378,12 @@ class EmbeddingModel:
             self.model = None
 
     def embed_query(self, text: str) -> list[float]:
-        if self.model is not None:
-            return self.model.encode(text).tolist()
-        return self._fallback_embed(text)
+        with _EMBEDDING_SECONDS.time():
+            if self.model is not None:
+                _EMBEDDINGS.inc(backend="model")
+                return self.model.encode(text).tolist()
+            _EMBEDDINGS.inc(backend="hash")
+            return self._fallback_embed(text)
 
     def _fallback_embed(self, text: str) -> list[float]:
         vec = [0.0] * self._fallback_dim
@@ -184,3 +408,8 @@ def get_embedding_model() -> EmbeddingModel:
     if _embedding_instance is None:
         _embedding_instance = EmbeddingModel()
     return _embedding_instance
+
+
+def set_embedding_model(model: EmbeddingModel):
+    global _embedding_instance
+    _embedding_instance = model
@@ -0,0 +1,178 @@
+"""Background consolidation of agent memories into tiered summaries.
+
+Raw memories (episodes, plans, world notes) beyond an agent's newest
+``KEEP_RECENT`` are grouped by day once the agent has more than
+``EPISODE_THRESHOLD`` of them. Each group becomes one ``summary_daily``
+memory. Daily summaries beyond the newest ``KEEP_DAILY`` are grouped by ISO
+week into ``summary_weekly`` memories the same way. Summaries are re-embedded
+and replace their sources in one transaction, so every agent's search set
+stays bounded however long the world runs. The shared world tier
+(``WORLD_AGENT_ID``) is consolidated the same way, with its own prompt, so
+world events are summarised before vector retention trims old rows.
+
+The worker runs on its own thread at ``BACKGROUND`` LLM priority. While the
+LLM is unavailable, groups are condensed extractively instead.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from itertools import groupby
+
+from .config import get_embedding_model, get_llm, llm_available
+from .context import fit_prompt
+from .memory_store import WORLD_AGENT_ID, get_memory_store
+from .prompts import CONSOLIDATION_PROMPT, WORLD_CONSOLIDATION_PROMPT
+from .scheduler import BACKGROUND, llm_priority
+from ..database.crud_agents import get_agents
+from ..database.database import SessionLocal
+from ..metrics import get_metrics
+
+
+CONSOLIDATION_ENABLED = os.getenv("VWORLD_CONSOLIDATION_ENABLED", "1") not in {"0", "false", "False"}
+CONSOLIDATION_INTERVAL_SECONDS = float(os.getenv("VWORLD_CONSOLIDATION_INTERVAL_SECONDS", "300"))
+EPISODE_THRESHOLD = int(os.getenv("VWORLD_CONSOLIDATION_EPISODE_THRESHOLD", "60"))
+KEEP_RECENT = int(os.getenv("VWORLD_CONSOLIDATION_KEEP_RECENT", "20"))
+DAILY_THRESHOLD = int(os.getenv("VWORLD_CONSOLIDATION_DAILY_THRESHOLD", "14"))
+KEEP_DAILY = int(os.getenv("VWORLD_CONSOLIDATION_KEEP_DAILY", "7"))
+GROUP_SIZE = int(os.getenv("VWORLD_CONSOLIDATION_GROUP_SIZE", "40"))
+
+RAW_TYPES = ("episode", "plan", "world")
+DAILY = "summary_daily"
+WEEKLY = "summary_weekly"
+
+_metrics = get_metrics()
+_SUMMARIES = _metrics.counter("vworld_memory_summaries_total", "Summary memories written by consolidation.", labels=("tier",))
+_CONSOLIDATED = _metrics.counter("vworld_memory_consolidated_total", "Memories folded into summaries.", labels=("tier",))
+_RUN_SECONDS = _metrics.histogram("vworld_memory_consolidation_seconds", "Wall time of one consolidation pass.")
+
+
+def _parse_time(value) -> datetime:
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return datetime.utcnow()
+
+
+def _day_key(row) -> str:
+    return _parse_time(row[3]).strftime("%Y-%m-%d")
+
+
+def _week_key(row) -> str:
+    year, week, _ = _parse_time(row[3]).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _extractive_summary(texts: list[str], limit: int = 5, width: int = 160) -> str:
+    seen: set[str] = set()
+    picked: list[str] = []
+    for text in texts:
+        line = " ".join(text.split())
+        key = line.lower()
+        if not line or key in seen:
+            continue
+        seen.add(key)
+        picked.append(line if len(line) <= width else line[:width - 1].rstrip() + "…")
+        if len(picked) >= limit:
+            break
+    if len(texts) > len(picked):
+        picked.append(f"и ещё {len(texts) - len(picked)} похожих воспоминаний")
+    return "; ".join(picked)
+
+
+class ConsolidationWorker:
+    def __init__(self):
+        self.last_report: dict[str, int] = {}
+        self.last_run_at: float | None = None
+
+    def run_once(self) -> dict[str, int]:
+        started = time.perf_counter()
+        report = {DAILY: 0, WEEKLY: 0}
+        store = get_memory_store()
+        raw_counts = store.memory_counts(RAW_TYPES)
+        daily_counts = store.memory_counts((DAILY,))
+        db = SessionLocal()
+        try:
+            with llm_priority(BACKGROUND):
+                owners = [(WORLD_AGENT_ID, None)]
+                owners += [(agent.id, agent.name) for agent in get_agents(db, skip=0, limit=100000)]
+                for agent_id, name in owners:
+                    dailies = daily_counts.get(agent_id, 0)
+                    if raw_counts.get(agent_id, 0) > EPISODE_THRESHOLD:
+                        folded, written = self._consolidate(agent_id, name, RAW_TYPES, KEEP_RECENT, DAILY, _day_key)
+                        report[DAILY] += folded
+                        dailies += written
+                    if dailies > DAILY_THRESHOLD:
+                        report[WEEKLY] += self._consolidate(agent_id, name, (DAILY,), KEEP_DAILY, WEEKLY, _week_key)[0]
+        finally:
+            db.close()
+        _RUN_SECONDS.observe(time.perf_counter() - started)
+        self.last_report = report
+        self.last_run_at = time.time()
+        return report
+
+    def _consolidate(
+        self, agent_id: int, name: str | None, source_types: tuple[str, ...], keep: int, tier: str, period_of
+    ) -> tuple[int, int]:
+        """Fold the owner's older ``source_types`` rows into ``tier`` summaries.
+
+        ``name`` is the agent's name, or ``None`` for the shared world tier.
+
+        Returns the number of rows folded and of summaries written.
+        """
+        store = get_memory_store()
+        embeddings = get_embedding_model()
+        rows = store.get_memory_rows(agent_id, source_types, skip_newest=keep)
+        summaries = []
+        for period, group in groupby(rows, key=period_of):
+            group = list(group)
+            for start in range(0, len(group), GROUP_SIZE):
+                chunk = group[start:start + GROUP_SIZE]
+                text = self._summarize(name, period, [row[1] for row in chunk])
+                label = "ИТОГ ДНЯ" if tier == DAILY else "ИТОГ НЕДЕЛИ"
+                text = f"[{label} {period}] {text}"
+                summaries.append((text, embeddings.embed_query(text), tier, chunk[-1][3], [row[0] for row in chunk]))
+
+        if not summaries:
+            return 0, 0
+        remove_ids = [row_id for *_, ids in summaries for row_id in ids]
+        store.replace_memories(agent_id, remove_ids, [s[:4] for s in summaries])
+        _SUMMARIES.inc(len(summaries), tier=tier)
+        _CONSOLIDATED.inc(len(remove_ids), tier=tier)
+        return len(remove_ids), len(summaries)
+
+    @staticmethod
+    def _summarize(name: str | None, period: str, texts: list[str]) -> str:
+        llm = get_llm()
+        if llm_available(llm):
+            template = WORLD_CONSOLIDATION_PROMPT if name is None else CONSOLIDATION_PROMPT
+            prompt = fit_prompt(
+                lambda sections: template.format(name=name, period=period, memories=sections["memories"]),
+                {"memories": [(-i, text) for i, text in enumerate(texts)]},
+            )
+            summary = llm.invoke(prompt).content.strip()
+            if summary and not summary.startswith("[GenAPI error"):
+                return " ".join(summary.split())
+        return _extractive_summary(texts)
+
+
+_worker: ConsolidationWorker | None = None
+
+
+def get_consolidation_worker() -> ConsolidationWorker:
+    global _worker
+    if _worker is None:
+        _worker = ConsolidationWorker()
+    return _worker
+
+
+async def consolidation_task(worker: ConsolidationWorker):
+    while True:
+        await asyncio.sleep(CONSOLIDATION_INTERVAL_SECONDS)
+        try:
+            report = await asyncio.to_thread(worker.run_once)
+            if any(report.values()):
+                print(f"[Memory] Consolidated memories: {report}")
+        except Exception as e:
+            print(f"[Memory] Consolidation error: {e}")
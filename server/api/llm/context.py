@@ -0,0 +1,132 @@
+"""Prompt assembly: cached per-agent fragments and a token-budgeted builder.
+
+Fragments that depend only on an agent's name, personality, mood and place
+(system prompt, voice guideline, weather hint) are cached per agent. An entry
+is rebuilt when its key changes, and the whole agent entry is dropped when the
+name or personality does.
+
+``fit_prompt`` fills a prompt within a token budget. Fixed text (system prompt,
+the message, the instructions) is always kept whole; elastic sections
+(memories, relationships) keep their highest-scored lines that still fit.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from ..metrics import get_metrics
+
+
+LLM_PROMPT_TOKEN_BUDGET = int(os.environ.get("LLM_PROMPT_TOKEN_BUDGET", "3000"))
+# Russian text averages fewer characters per token than English.
+LLM_CHARS_PER_TOKEN = float(os.environ.get("LLM_CHARS_PER_TOKEN", "3.5"))
+PROMPT_CACHE_AGENTS = 4096
+
+_metrics = get_metrics()
+_FRAGMENT_CACHE = _metrics.counter("vworld_prompt_fragment_cache_total", "Prompt fragment cache lookups.", labels=("result",))
+_TRIMMED = _metrics.counter("vworld_prompt_lines_trimmed_total", "Context lines dropped to fit the prompt budget.")
+_PROMPT_TOKENS = _metrics.histogram(
+    "vworld_prompt_tokens",
+    "Estimated prompt size in tokens.",
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / LLM_CHARS_PER_TOKEN) + 1 if text else 0
+
+
+def clip_middle(text: str, max_chars: int, marker: str = "\n…\n") -> str:
+    """Cut ``text`` to ``max_chars`` from the middle, keeping the opening and the final instructions."""
+    if len(text) <= max_chars:
+        return text
+    keep = max(0, max_chars - len(marker))
+    head = keep // 3
+    return text[:head] + marker + text[len(text) - (keep - head):]
+
+
+class PromptFragmentCache:
+    def __init__(self, max_agents: int = PROMPT_CACHE_AGENTS):
+        self.max_agents = max_agents
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+
+    def get(self, agent: Any, fragment: str, key: Hashable, build: Callable[[], str]) -> str:
+        identity = (agent.name, agent.personality)
+        with self._lock:
+            entry = self._entries.get(agent.id)
+            if entry is None or entry["identity"] != identity:
+                entry = {"identity": identity, "fragments": {}}
+                self._entries[agent.id] = entry
+                if len(self._entries) > self.max_agents:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(agent.id)
+            cached = entry["fragments"].get(fragment)
+            if cached is not None and cached[0] == key:
+                _FRAGMENT_CACHE.inc(result="hit")
+                return cached[1]
+
+        value = build()
+        with self._lock:
+            entry["fragments"][fragment] = (key, value)
+        _FRAGMENT_CACHE.inc(result="miss")
+        return value
+
+    def invalidate(self, agent_id: int | None = None):
+        with self._lock:
+            if agent_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(agent_id, None)
+
+
+def fit_prompt(
+    render: Callable[[dict[str, str]], str],
+    elastic: dict[str, list[tuple[float, str]]],
+    empty: dict[str, str] | None = None,
+    budget: int | None = None,
+) -> str:
+    """Render a prompt whose elastic sections fit ``budget`` tokens.
+
+    ``render`` builds the whole prompt from the rendered sections; ``elastic``
+    maps a section to its ``(score, line)`` candidates. Lines are admitted
+    best score first and shown in their original order.
+    """
+    budget = LLM_PROMPT_TOKEN_BUDGET if budget is None else budget
+    empty = empty or {}
+
+    def sections(kept: set[tuple[str, int]]) -> dict[str, str]:
+        values = {}
+        for name, lines in elastic.items():
+            chosen = [text for i, (_, text) in enumerate(lines) if (name, i) in kept]
+            values[name] = "\n".join(f"- {text}" for text in chosen) if chosen else empty.get(name, "")
+        return values
+
+    remaining = budget - estimate_tokens(render(sections(set())))
+    candidates = sorted(
+        ((score, name, i, text) for name, lines in elastic.items() for i, (score, text) in enumerate(lines)),
+        key=lambda c: -c[0],
+    )
+    kept: set[tuple[str, int]] = set()
+    for _, name, i, text in candidates:
+        cost = estimate_tokens(text) + 1
+        if cost <= remaining:
+            kept.add((name, i))
+            remaining -= cost
+    if len(kept) < len(candidates):
+        _TRIMMED.inc(len(candidates) - len(kept))
+
+    prompt = render(sections(kept))
+    _PROMPT_TOKENS.observe(estimate_tokens(prompt))
+    return prompt
+
+
+_fragment_cache: PromptFragmentCache | None = None
+
+
+def get_fragment_cache() -> PromptFragmentCache:
+    global _fragment_cache
+    if _fragment_cache is None:
+        _fragment_cache = PromptFragmentCache()
+    return _fragment_cache
@@ -0,0 +1,123 @@
+"""Multi-turn agent conversations with streamed turns.
+
+``run_conversation`` alternates speakers for ``turns`` lines. Each line is
+streamed from the LLM and handed to ``emit`` chunk by chunk, so viewers see a
+turn from its first token instead of after the whole dialogue. Finished lines
+go through the same quality rules as ``start_chat``; a rejected stream is
+retried once without streaming and then replaced by the speaker's fallback
+line, announced with a final ``done`` event carrying the accepted text.
+"""
+
+import os
+import uuid
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from .agent_ai import AgentBrain, settle_interaction
+from .config import llm_available, stream_completion
+from .prompts import CONVERSATION_TURN_PROMPT, get_sympathy_hint
+from ..database.crud_environment import get_environment
+
+
+CHAT_STREAMING = os.getenv("VWORLD_CHAT_STREAMING", "0") not in {"0", "false", "False"}
+CHAT_TURNS = int(os.getenv("VWORLD_CHAT_TURNS", "4"))
+
+Emit = Callable[[dict], None]
+
+
+def _transcript(dialogue: list[dict]) -> str:
+    if not dialogue:
+        return "(вы ещё ничего не сказали друг другу)"
+    return "\n".join(f"{line['speaker']}: {line['text']}" for line in dialogue)
+
+
+def _turn_prompt(speaker: AgentBrain, partner: AgentBrain, dialogue: list[dict], topic_context: str, weather: str) -> str:
+    sympathy = speaker._sympathy_towards(partner.agent_id)
+    turn_prompt = CONVERSATION_TURN_PROMPT.format(
+        partner_name=partner.agent.name,
+        topic_context=topic_context,
+        weather=weather,
+        current_zone=speaker._get_current_zone_label(),
+        sympathy=sympathy,
+        sympathy_hint=get_sympathy_hint(sympathy),
+        transcript=_transcript(dialogue),
+    )
+    return (
+        speaker._get_system_prompt()
+        + "\n\n"
+        + turn_prompt
+        + "\n\n"
+        + speaker._voice_guideline()
+        + "\n"
+        + speaker._weather_bias_hint(weather)
+    )
+
+
+def _is_repeat(speaker: AgentBrain, line: str, dialogue: list[dict]) -> bool:
+    normalized = speaker._normalize_for_compare(line)
+    return any(speaker._normalize_for_compare(d["text"]) == normalized for d in dialogue)
+
+
+def run_conversation(
+    db: Session,
+    agent1_id: int,
+    agent2_id: int,
+    turns: int = CHAT_TURNS,
+    emit: Emit | None = None,
+    topic: str = "",
+) -> dict:
+    """Run a ``turns``-line dialogue, ``agent1`` speaking first; the result matches ``start_chat``."""
+    brains = (AgentBrain(agent1_id, db), AgentBrain(agent2_id, db))
+    if not brains[0].agent or not brains[1].agent:
+        return {"error": "Agent not found"}
+
+    emit = emit or (lambda event: None)
+    conversation_id = uuid.uuid4().hex[:12]
+    topic_context = f"Тема: {topic}" if topic else "Просто хочешь пообщаться."
+    weather = get_environment(db).weather
+    dialogue: list[dict] = []
+
+    for turn in range(max(2, turns)):
+        speaker, partner = brains[turn % 2], brains[1 - turn % 2]
+        event = {
+            "conversation_id": conversation_id,
+            "turn": turn,
+            "agent_id": speaker.agent_id,
+            "name": speaker.agent.name,
+            "partner_id": partner.agent_id,
+        }
+        prompt = _turn_prompt(speaker, partner, dialogue, topic_context, weather)
+        streamed = ""
+        if llm_available(speaker.llm):
+            for chunk in stream_completion(speaker.llm, prompt):
+                if speaker._is_llm_error(chunk):
+                    streamed = chunk
+                    break
+                streamed += chunk
+                emit({**event, "delta": chunk, "text": streamed, "done": False})
+
+        line = speaker._accept_line(streamed)
+        if not line or _is_repeat(speaker, line, dialogue):
+            line = speaker._generate_message_with_retry(prompt, weather, tries=1)
+        if _is_repeat(speaker, line, dialogue):
+            line = speaker._fallback_dialogue_line(weather)
+        dialogue.append({"speaker": speaker.agent.name, "speaker_id": speaker.agent_id, "text": line})
+        emit({**event, "delta": "", "text": line, "done": True})
+
+    transcript = _transcript(dialogue)
+    sides = []
+    for speaker, partner in (brains, brains[::-1]):
+        partner_lines = " ".join(d["text"] for d in dialogue if d["speaker_id"] == partner.agent_id)
+        speaker._save_memory(f"Разговор с {partner.agent.name}:\n{transcript}")
+        sides.append((speaker, partner.agent_id, partner_lines, f"Поговорил с {partner.agent.name}: {partner_lines}"))
+    settle_interaction(transcript, sides)
+    for brain in brains:
+        db.refresh(brain.agent)
+
+    return {
+        "conversation_id": conversation_id,
+        "dialogue": dialogue,
+        "initiator_mood": brains[0].agent.mood.to_dict(),
+        "responder_mood": brains[1].agent.mood.to_dict(),
+    }
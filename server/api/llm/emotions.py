@@ -1,37 +1,24 @@
 import json
 import os
 
-from .config import get_llm
-from .prompts import EMOTION_ANALYSIS_PROMPT, SYMPATHY_ANALYSIS_PROMPT
+from .config import get_llm, llm_available
+from .prompts import (
+    EMOTION_ANALYSIS_PROMPT,
+    INTERACTION_ANALYSIS_PROMPT,
+    SYMPATHY_ANALYSIS_PROMPT,
+    WORLD_EVENT_ANALYSIS_PROMPT,
+)
+from .text_analysis import EMOTION_CUES, SYMPATHY_CUES, normalize
+from ..models.mood import EMOTIONS, Mood
 
 
-DEFAULT_MOOD = {"joy": 20, "anger": 5, "sadness": 5, "fear": 5, "neutral": 65}
 USE_LLM_EMOTION_ANALYSIS = os.environ.get("VWORLD_LLM_EMOTION_ANALYSIS", "0") in {"1", "true", "True"}
 USE_LLM_SYMPATHY_ANALYSIS = os.environ.get("VWORLD_LLM_SYMPATHY_ANALYSIS", "0") in {"1", "true", "True"}
+WORLD_EVENT_ANALYSIS_BATCH = int(os.environ.get("VWORLD_LLM_WORLD_EVENT_BATCH", "50"))
 
 
-def parse_mood(mood_str: str) -> dict:
-    if not mood_str or mood_str == "neutral":
-        return DEFAULT_MOOD.copy()
-    try:
-        mood = json.loads(mood_str)
-        if isinstance(mood, dict) and all(k in mood for k in DEFAULT_MOOD):
-            return mood
-    except (json.JSONDecodeError, TypeError):
-        pass
-    return DEFAULT_MOOD.copy()
-
-
-def mood_to_json(mood: dict) -> str:
-    return json.dumps(mood, ensure_ascii=False)
-
-
-def dominant_emotion(mood: dict) -> str:
-    return max(mood, key=mood.get)
-
-
-def mood_description(mood: dict) -> str:
-    dom = dominant_emotion(mood)
+def mood_description(mood: Mood) -> str:
+    dom = mood.dominant()
     descriptions = {
         "joy": "веселое, радостное",
         "anger": "злое, раздраженное",
@@ -42,8 +29,8 @@ def mood_description(mood: dict) -> str:
     return descriptions.get(dom, "нейтральное")
 
 
-def mood_to_style(mood: dict) -> str:
-    dom = dominant_emotion(mood)
+def mood_to_style(mood: Mood) -> str:
+    dom = mood.dominant()
     styles = {
         "joy": "Говоришь бодро, с теплой энергией, иногда с легкой шуткой.",
         "anger": "Говоришь резко и сухо, склонен к жестким формулировкам.",
@@ -54,74 +41,100 @@ def mood_to_style(mood: dict) -> str:
     return styles.get(dom, styles["neutral"])
 
 
-def _normalize_mood(mood: dict) -> dict:
-    total = sum(max(0, int(v)) for v in mood.values())
+def _normalize_mood(mood: dict) -> Mood:
+    levels = {name: max(0, int(mood.get(name, 0))) for name in EMOTIONS}
+    total = sum(levels.values())
     if total <= 0:
-        return DEFAULT_MOOD.copy()
-    normalized = {k: max(0, int(v)) for k, v in mood.items()}
-    total = sum(normalized.values())
-    normalized = {k: round(v * 100 / total) for k, v in normalized.items()}
-    diff = 100 - sum(normalized.values())
-    normalized["neutral"] = max(0, normalized.get("neutral", 0) + diff)
-    return normalized
+        return Mood()
+    levels = {name: round(level * 100 / total) for name, level in levels.items()}
+    levels["neutral"] = max(0, levels["neutral"] + 100 - sum(levels.values()))
+    return Mood(**levels)
 
 
-def _heuristic_emotion_change(current_mood: dict, event: str) -> dict:
-    mood = parse_mood(json.dumps(current_mood, ensure_ascii=False))
-    text = (event or "").lower()
+def _heuristic_emotion_change(current_mood: Mood, event: str) -> Mood:
+    mood = current_mood.to_dict()
+    hits = EMOTION_CUES.counts(normalize(event))
 
-    pos = ("друж", "успех", "помог", "солн", "улучш", "довер", "познаком")
-    neg = ("конфликт", "угроз", "шторм", "ошибка", "потер", "враг", "удален")
-    anx = ("туман", "опас", "риск", "неизвест")
-
-    if any(w in text for w in pos):
+    if hits["positive"]:
         mood["joy"] += 8
         mood["neutral"] -= 6
-    if any(w in text for w in neg):
+    if hits["negative"]:
         mood["anger"] += 6
         mood["sadness"] += 4
         mood["neutral"] -= 6
-    if any(w in text for w in anx):
+    if hits["anxious"]:
         mood["fear"] += 7
         mood["neutral"] -= 5
 
-    for key in ("joy", "anger", "sadness", "fear", "neutral"):
-        mood[key] = max(0, mood.get(key, 0))
-
     return _normalize_mood(mood)
 
 
-def analyze_emotion_change(personality: str, current_mood: dict, event: str) -> dict:
-    if not USE_LLM_EMOTION_ANALYSIS:
+def analyze_emotion_change(personality: str, current_mood: Mood, event: str) -> Mood:
+    if not USE_LLM_EMOTION_ANALYSIS or not llm_available():
         return _heuristic_emotion_change(current_mood, event)
 
     llm = get_llm()
     prompt = EMOTION_ANALYSIS_PROMPT.format(
         personality=personality,
-        current_mood=json.dumps(current_mood, ensure_ascii=False),
+        current_mood=current_mood.to_json(),
         event=event,
     )
+    return _valid_mood(_invoke_json(llm, prompt)) or _heuristic_emotion_change(current_mood, event)
+
+
+def _invoke_json(llm, prompt: str):
+    """The JSON object the LLM answered with, or None."""
     try:
         response = llm.invoke(prompt).content.strip()
         if response.startswith("```"):
             response = response.split("\n", 1)[1] if "\n" in response else response
             response = response.rsplit("```", 1)[0]
-        new_mood = json.loads(response)
-        if isinstance(new_mood, dict) and all(k in new_mood for k in DEFAULT_MOOD):
-            return _normalize_mood(new_mood)
+        return json.loads(response)
     except Exception:
-        pass
-    return _heuristic_emotion_change(current_mood, event)
+        return None
 
 
-def _heuristic_sympathy_change(message: str) -> int:
-    text = (message or "").lower()
-    positive = ("спасибо", "отлично", "класс", "друж", "поддерж", "давай")
-    negative = ("плохо", "ненавиж", "уходи", "ошиб", "бред", "злю")
+def _valid_mood(value) -> Mood | None:
+    """The normalized mood, or None unless every emotion is a number from 0 to 100.
+
+    ``json.loads`` accepts ``Infinity``, ``NaN`` and ``1e999``, so the range is
+    checked before anything is converted.
+    """
+    if not isinstance(value, dict):
+        return None
+    try:
+        return _normalize_mood(Mood.validate(value).to_dict())
+    except ValueError:
+        return None
 
-    pos_score = sum(1 for w in positive if w in text)
-    neg_score = sum(1 for w in negative if w in text)
-    score = pos_score - neg_score
+
+def _valid_sympathy_change(value) -> int | None:
+    if isinstance(value, bool):
+        return None
+    try:
+        return max(-3, min(3, int(value)))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _numbered(agents: list[tuple[str, str, Mood]]) -> str:
+    return "\n".join(
+        f"[{i}] {name}. Личность: {personality}. Текущее настроение: {mood.to_json()}"
+        for i, (name, personality, mood) in enumerate(agents, 1)
+    )
+
+
+def _entries(payload, key: str, count: int) -> list:
+    """``payload[key]`` when it is a list of ``count`` entries; otherwise ``count`` Nones."""
+    entries = payload.get(key) if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or len(entries) != count:
+        return [None] * count
+    return entries
+
+
+def _heuristic_sympathy_change(message: str) -> int:
+    hits = SYMPATHY_CUES.counts(normalize(message))
+    score = hits["positive"] - hits["negative"]
 
     if score >= 2:
         return 2
@@ -135,7 +148,7 @@ def _heuristic_sympathy_change(message: str) -> int:
 
 
 def analyze_sympathy_change(message: str) -> int:
-    if not USE_LLM_SYMPATHY_ANALYSIS:
+    if not USE_LLM_SYMPATHY_ANALYSIS or not llm_available():
         return _heuristic_sympathy_change(message)
 
     llm = get_llm()
@@ -146,3 +159,61 @@ def analyze_sympathy_change(message: str) -> int:
         return max(-3, min(3, val))
     except Exception:
         return _heuristic_sympathy_change(message)
+
+
+def analyze_interaction(
+    parties: list[tuple[str, str, Mood, str, str]],
+    transcript: str,
+) -> list[tuple[Mood, int]]:
+    """New mood and sympathy change for every side of a conversation, from one LLM call.
+
+    Each party is ``(name, personality, mood, heard, event)``: ``heard`` is what the
+    partner said (it drives the sympathy change), ``event`` describes the conversation
+    for the mood change. Anything the LLM leaves out or gets wrong falls back to the
+    heuristics, and each half only uses the LLM when its own flag is on.
+    """
+    results = [
+        (_heuristic_emotion_change(mood, event), _heuristic_sympathy_change(heard))
+        for _, _, mood, heard, event in parties
+    ]
+    if not (USE_LLM_EMOTION_ANALYSIS or USE_LLM_SYMPATHY_ANALYSIS) or not llm_available():
+        return results
+
+    participants = _numbered([(name, personality, mood) for name, personality, mood, _, _ in parties])
+    payload = _invoke_json(get_llm(), INTERACTION_ANALYSIS_PROMPT.format(participants=participants, transcript=transcript))
+    for i, entry in enumerate(_entries(payload, "participants", len(parties))):
+        if not isinstance(entry, dict):
+            continue
+        mood, change = results[i]
+        if USE_LLM_EMOTION_ANALYSIS:
+            mood = _valid_mood(entry.get("mood")) or mood
+        if USE_LLM_SYMPATHY_ANALYSIS:
+            llm_change = _valid_sympathy_change(entry.get("sympathy_change"))
+            change = change if llm_change is None else llm_change
+        results[i] = (mood, change)
+    return results
+
+
+def analyze_world_event(event: str, agents: list[tuple[str, str, Mood]]) -> list[Mood]:
+    """New mood of every ``(name, personality, mood)`` agent after ``event``.
+
+    Agents are scored ``WORLD_EVENT_ANALYSIS_BATCH`` per LLM call instead of one call each.
+    A batch whose reply cannot be used keeps the heuristic moods.
+    """
+    moods = [_heuristic_emotion_change(mood, event) for _, _, mood in agents]
+    if not USE_LLM_EMOTION_ANALYSIS or not llm_available():
+        return moods
+
+    llm = get_llm()
+    size = max(1, WORLD_EVENT_ANALYSIS_BATCH)
+    for start in range(0, len(agents), size):
+        batch = agents[start:start + size]
+        payload = _invoke_json(llm, WORLD_EVENT_ANALYSIS_PROMPT.format(event=event, agents=_numbered(batch)))
+        try:
+            scored = [_valid_mood(entry) for entry in _entries(payload, "reactions", len(batch))]
+        except Exception as e:
+            print(f"[LLM] World event batch analysis failed: {e}")
+            continue
+        for offset, mood in enumerate(scored):
+            moods[start + offset] = mood or moods[start + offset]
+    return moods
@@ -1,14 +1,235 @@
-﻿import sqlite3
+﻿import json
+import sqlite3
 import pickle
 import os
+import threading
+import time
+from datetime import datetime, timezone
+
 import numpy as np
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "vector_memory.db")
+from ..database.database import DB_COMMITS
+from ..metrics import get_metrics
+from .ann_index import IVF_MIN_ROWS, IVFIndex, ann_enabled
+
+DB_PATH = os.getenv("VWORLD_VECTOR_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "vector_memory.db"))
+INDEX_CACHE_PATH = os.path.splitext(DB_PATH)[0] + ".index.npz"
+ANN_CACHE_PATH = os.path.splitext(DB_PATH)[0] + ".ivf.npz"
+VECTOR_DB_BUSY_TIMEOUT_MS = int(os.getenv("VWORLD_VECTOR_DB_BUSY_TIMEOUT_MS", "30000"))
+# add_memory rows are buffered and committed together every few ms or every N rows; 0 ms commits each row.
+GROUP_COMMIT_MS = float(os.getenv("VWORLD_MEMORY_GROUP_COMMIT_MS", "5"))
+GROUP_COMMIT_ROWS = int(os.getenv("VWORLD_MEMORY_GROUP_COMMIT_ROWS", "256"))
+
+RECENCY_HALF_LIFE_HOURS = float(os.getenv("VWORLD_MEMORY_RECENCY_HALF_LIFE_HOURS", "24"))
+RECENCY_WEIGHT = float(os.getenv("VWORLD_MEMORY_RECENCY_WEIGHT", "0.3"))
+IMPORTANCE_WEIGHT = float(os.getenv("VWORLD_MEMORY_IMPORTANCE_WEIGHT", "0.2"))
+RECENCY_REFRESH_SECONDS = 60.0
+# Owner of the shared tier: world-wide memories stored once and merged into every agent's search.
+WORLD_AGENT_ID = 0
+
+MEMORY_IMPORTANCE = {
+    "summary_weekly": 1.0,
+    "summary_daily": 0.9,
+    "summary": 0.9,
+    "episode": 0.6,
+    "plan": 0.4,
+    "world": 0.3,
+}
+
+_F32_PREFIX = b"F32\x00"
+
+
+def encode_vector(vector) -> bytes | None:
+    if vector is None:
+        return None
+    return _F32_PREFIX + np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def memory_importance(memory_type: str | None) -> float:
+    return MEMORY_IMPORTANCE.get(memory_type or "episode", 0.5)
+
+
+def _retrieval_prior(age_seconds, importance):
+    """Recency and importance part of the retrieval score; works on scalars and arrays."""
+    recency = np.exp2(-np.maximum(age_seconds, 0.0) / (RECENCY_HALF_LIFE_HOURS * 3600)) if RECENCY_HALF_LIFE_HOURS > 0 else 0.0
+    return RECENCY_WEIGHT * recency + IMPORTANCE_WEIGHT * importance
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    if blob[:4] == _F32_PREFIX:
+        return np.frombuffer(blob, dtype=np.float32, offset=4)
+    return np.asarray(pickle.loads(blob), dtype=np.float32)
+
+
+class _AgentIndex:
+    """Per-agent vector matrix with amortised O(1) appends.
+
+    Besides the vectors it keeps each row's importance and creation time, and
+    a cached ``prior`` (recency + importance) refreshed at most every
+    ``RECENCY_REFRESH_SECONDS``; appends extend the cache in place. Removed
+    rows are tombstoned and compacted away once they make up a quarter of the
+    index. ``ann`` is an optional ``IVFIndex`` over the same row positions.
+    """
+
+    def __init__(self, dim: int, capacity: int = 16):
+        self.dim = dim
+        self.ids: list[int] = []
+        self.texts: list[str] = []
+        self.types: list[str] = []
+        self.dead = 0
+        self.ann: IVFIndex | None = None
+        self._positions: dict[int, int] = {}
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._importance = np.zeros(capacity, dtype=np.float32)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._prior = np.zeros(capacity, dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._prior_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def alive_count(self) -> int:
+        return len(self.ids) - self.dead
+
+    def add(self, row_id: int, text: str, memory_type: str, vec: np.ndarray, importance: float, created: float):
+        if row_id in self._positions:
+            return
+        n = len(self.ids)
+        if n == self._matrix.shape[0]:
+            self._matrix = np.resize(self._matrix, (n * 2, self.dim))
+            self._norms = np.resize(self._norms, n * 2)
+            self._importance = np.resize(self._importance, n * 2)
+            self._created = np.resize(self._created, n * 2)
+            self._prior = np.resize(self._prior, n * 2)
+            self._alive = np.resize(self._alive, n * 2)
+        self._matrix[n] = vec
+        self._norms[n] = np.linalg.norm(vec)
+        self._importance[n] = importance
+        self._created[n] = created
+        self._prior[n] = _retrieval_prior(self._prior_at - created, importance)
+        self._alive[n] = True
+        self._positions[row_id] = n
+        self.ids.append(row_id)
+        self.texts.append(text)
+        self.types.append(memory_type)
+        if self.ann is not None:
+            self.ann.add(self._matrix[n])
+
+    def remove(self, row_ids) -> int:
+        """Tombstone ``row_ids``; returns how many were present."""
+        removed = 0
+        for row_id in row_ids:
+            pos = self._positions.pop(row_id, None)
+            if pos is not None and self._alive[pos]:
+                self._alive[pos] = False
+                removed += 1
+        self.dead += removed
+        if self.dead and self.dead * 4 >= len(self.ids):
+            self.compact()
+        return removed
+
+    def compact(self):
+        n = len(self.ids)
+        keep = self._alive[:n].copy()
+        kept = np.flatnonzero(keep)
+        self._matrix = self._matrix[kept].copy()
+        self._norms = self._norms[kept].copy()
+        self._importance = self._importance[kept].copy()
+        self._created = self._created[kept].copy()
+        self._prior = self._prior[kept].copy()
+        self._alive = np.ones(len(kept), dtype=bool)
+        self.ids = [self.ids[i] for i in kept]
+        self.texts = [self.texts[i] for i in kept]
+        self.types = [self.types[i] for i in kept]
+        self._positions = {row_id: pos for pos, row_id in enumerate(self.ids)}
+        self.dead = 0
+        if self.ann is not None:
+            self.ann.compact(keep)
+
+    def importance(self) -> np.ndarray:
+        return self._importance[:len(self.ids)]
+
+    def created(self) -> np.ndarray:
+        return self._created[:len(self.ids)]
+
+    def prior(self, now: float) -> np.ndarray:
+        n = len(self.ids)
+        if now - self._prior_at > RECENCY_REFRESH_SECONDS:
+            self._prior[:n] = _retrieval_prior(now - self._created[:n], self._importance[:n])
+            self._prior_at = now
+        return self._prior[:n]
+
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:len(self.ids)]
+
+    def similarities(self, query: np.ndarray, positions: np.ndarray | None = None) -> np.ndarray:
+        """Cosine similarity of every row, or of ``positions`` only; tombstones score -inf."""
+        n = len(self.ids)
+        matrix, norms, alive = self._matrix[:n], self._norms[:n], self._alive[:n]
+        if positions is not None:
+            matrix, norms, alive = matrix[positions], norms[positions], alive[positions]
+        sims = (matrix @ query) / (norms * np.linalg.norm(query) + 1e-8)
+        if self.dead:
+            sims[~alive] = -np.inf
+        return sims
+
+
+_COMMIT_BATCH_ROWS = get_metrics().histogram(
+    "vworld_memory_commit_batch_rows",
+    "Memories written per vector store commit.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+_INSERT_SQL = (
+    "INSERT INTO vector_memories (id, agent_id, text, memory_type, vector, created_at, importance) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _sql_time(epoch: float) -> str:
+    """``epoch`` in the format of SQLite's CURRENT_TIMESTAMP (UTC)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+# Importance and creation time (epoch seconds) as loaded into ``_AgentIndex``.
+_INDEX_COLUMNS = "importance, CAST(strftime('%s', created_at) AS REAL)"
+
+
+def _connect() -> sqlite3.Connection:
+    con = sqlite3.connect(DB_PATH, timeout=VECTOR_DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"PRAGMA busy_timeout={VECTOR_DB_BUSY_TIMEOUT_MS}")
+    return con
 
 
 class VectorMemoryStore:
+    """SQLite-backed vector memory with an in-process search index.
+
+    Writes go through one connection serialized by ``_write_lock``; reads use
+    a connection per thread, so ``asyncio.to_thread`` workers never share a
+    cursor and WAL lets them read while a write is in flight. ``_lock`` guards
+    the in-memory indexes.
+
+    ``add_memory`` only appends to ``_pending`` and to the cached index: row
+    ids are allocated up front, so searches see the memory at once, and a
+    flusher thread group-commits the buffer. Every SQL read and every other
+    write flushes it first.
+    """
+
     def __init__(self):
-        self.con = sqlite3.connect(DB_PATH, check_same_thread=False)
+        self._write_lock = threading.Lock()
+        self._pending_cond = threading.Condition()
+        self._pending: list[tuple] = []
+        self._next_id: int | None = None
+        self._flusher: threading.Thread | None = None
+        self._local = threading.local()
+        self._readers_lock = threading.Lock()
+        self._readers: list[sqlite3.Connection] = []
+        self.con = _connect()
         self.cur = self.con.cursor()
         self.cur.execute("""
             CREATE TABLE IF NOT EXISTS vector_memories (
@@ -17,74 +238,486 @@ class VectorMemoryStore:
                 text TEXT NOT NULL,
                 memory_type TEXT DEFAULT 'episode',
                 vector BLOB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                importance REAL
             )
         """)
-        self.con.commit()
-
-    def add_memory(self, agent_id: int, text: str, vector, memory_type: str = "episode"):
-        blob = pickle.dumps(vector) if vector is not None else None
+        self._migrate()
         self.cur.execute(
-            "INSERT INTO vector_memories (agent_id, text, memory_type, vector) VALUES (?, ?, ?, ?)",
-            (agent_id, text, memory_type, blob),
+            "CREATE INDEX IF NOT EXISTS ix_vector_memories_agent_id ON vector_memories (agent_id, memory_type)"
         )
+        self._commit()
+        self._lock = threading.RLock()
+        self._indexes: dict[int, _AgentIndex] = {}
+        self._dim: int | None = None
+        self._ann_persisted: dict[int, tuple] | None = None
+
+    def _commit(self):
         self.con.commit()
+        DB_COMMITS.inc(database="vector")
 
-    def search(self, agent_id: int, query_vector, k: int = 5) -> list[tuple[float, str]]:
-        self.cur.execute(
-            "SELECT text, vector FROM vector_memories WHERE agent_id = ? AND vector IS NOT NULL",
-            (agent_id,),
-        )
-        rows = self.cur.fetchall()
+    def _reader(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = _connect()
+            with self._readers_lock:
+                self._readers.append(con)
+        return con
+
+    def _read(self, sql: str, params=()) -> list[tuple]:
+        """Run a query on this thread's own read connection, after any buffered writes."""
+        if self._pending:
+            self.flush()
+        return self._reader().execute(sql, params).fetchall()
+
+    def _allocate_ids(self, count: int) -> int:
+        """Reserve ``count`` consecutive row ids; the caller holds ``_pending_cond``."""
+        if self._next_id is None:
+            self._next_id = self._reader().execute(
+                "SELECT MAX(COALESCE((SELECT MAX(id) FROM vector_memories), 0), "
+                "COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'vector_memories'), 0)) + 1"
+            ).fetchone()[0]
+        first = self._next_id
+        self._next_id += count
+        return first
+
+    def flush(self) -> int:
+        """Commit buffered ``add_memory`` rows; returns how many were written."""
+        with self._write_lock:
+            return self._flush_pending()
+
+    def _flush_pending(self) -> int:
+        # The caller holds ``_write_lock``.
+        with self._pending_cond:
+            rows, self._pending = self._pending, []
         if not rows:
+            return 0
+        try:
+            self.cur.executemany(_INSERT_SQL, rows)
+            self._commit()
+        except sqlite3.Error:
+            self.con.rollback()
+            raise
+        _COMMIT_BATCH_ROWS.observe(len(rows))
+        return len(rows)
+
+    def _flush_loop(self):
+        while True:
+            with self._pending_cond:
+                self._pending_cond.wait_for(lambda: self._pending)
+                self._pending_cond.wait_for(lambda: len(self._pending) >= GROUP_COMMIT_ROWS, GROUP_COMMIT_MS / 1000)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Memory] Group commit failed: {e}")
+
+    def close(self):
+        self.flush()
+        with self._write_lock, self._readers_lock:
+            for con in self._readers:
+                con.close()
+            self._readers.clear()
+            self.con.close()
+        self._local = threading.local()
+
+    def _migrate(self):
+        self.cur.execute("PRAGMA table_info(vector_memories)")
+        if "importance" in {row[1] for row in self.cur.fetchall()}:
+            return
+        self.cur.execute("ALTER TABLE vector_memories ADD COLUMN importance REAL")
+        for memory_type, importance in MEMORY_IMPORTANCE.items():
+            self.cur.execute("UPDATE vector_memories SET importance = ? WHERE memory_type = ?", (importance, memory_type))
+        self.cur.execute("UPDATE vector_memories SET importance = ? WHERE importance IS NULL", (memory_importance(None),))
+
+    def add_memory(self, agent_id: int, text: str, vector, memory_type: str = "episode"):
+        importance = memory_importance(memory_type)
+        now = time.time()
+        blob = encode_vector(vector)
+        with self._pending_cond:
+            row_id = self._allocate_ids(1)
+            self._pending.append((row_id, agent_id, text, memory_type, blob, _sql_time(now), importance))
+            if len(self._pending) in (1, GROUP_COMMIT_ROWS):
+                self._pending_cond.notify()
+        if GROUP_COMMIT_MS <= 0:
+            self.flush()
+        elif self._flusher is None:
+            self._start_flusher()
+        if vector is not None:
+            with self._lock:
+                index = self._indexes.get(agent_id)
+                if index is not None:
+                    vec = np.asarray(vector, dtype=np.float32)
+                    self._index_row(index, row_id, text, memory_type, vec, importance, now)
+
+    def _start_flusher(self):
+        with self._pending_cond:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="vector-memory-commit", daemon=True)
+                self._flusher.start()
+
+    def add_memories(self, rows):
+        """Insert ``(agent_id, text, vector, memory_type)`` rows in one transaction."""
+        rows = list(rows)
+        created = _sql_time(time.time())
+        with self._write_lock:
+            self._flush_pending()
+            with self._pending_cond:
+                first = self._allocate_ids(len(rows))
+            self.cur.executemany(
+                _INSERT_SQL,
+                [
+                    (first + i, agent_id, text, memory_type, encode_vector(vector), created, memory_importance(memory_type))
+                    for i, (agent_id, text, vector, memory_type) in enumerate(rows)
+                ],
+            )
+            self._commit()
+        self.forget_agents({row[0] for row in rows})
+
+    def add_world_memory(self, text: str, vector, memory_type: str = "world"):
+        """Store a memory every agent shares; it is embedded and kept once."""
+        self.add_memory(WORLD_AGENT_ID, text, vector, memory_type)
+
+    def search(
+        self, agent_id: int, query_vector, k: int = 5, weighted: bool = True, include_world: bool = True
+    ) -> list[tuple[float, str]]:
+        """Top ``k`` ``(score, text)`` pairs.
+
+        The score is cosine similarity plus, when ``weighted``, the row's
+        recency decay and importance (see ``_retrieval_prior``). With
+        ``include_world`` the shared world tier competes for the same ``k``.
+        """
+        if k <= 0:
             return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        hits = self._search_index(agent_id, query, k, weighted)
+        if include_world and agent_id != WORLD_AGENT_ID:
+            world = self._search_index(WORLD_AGENT_ID, query, k, weighted)
+            if world:
+                hits = sorted(hits + world, key=lambda hit: -hit[0])[:k]
+        return hits
 
-        results = []
-        for text, blob in rows:
-            vec = pickle.loads(blob)
-            sim = self._cosine(query_vector, vec)
-            results.append((sim, text))
+    def _search_index(self, agent_id: int, query: np.ndarray, k: int, weighted: bool) -> list[tuple[float, str]]:
+        with self._lock:
+            index = self._get_index(agent_id)
+            if index is None and agent_id == WORLD_AGENT_ID:
+                # Cache the empty shared tier so every search does not re-query it.
+                index = self._indexes[agent_id] = _AgentIndex(query.shape[0])
+            if index is None or not index.alive_count or index.dim != query.shape[0]:
+                return []
+            positions = self._ann_candidates(agent_id, index, query)
+            sims = index.similarities(query, positions)
+            if weighted:
+                prior = index.prior(time.time())
+                sims = sims + (prior if positions is None else prior[positions])
+            texts = index.texts
 
-        results.sort(reverse=True)
-        return results[:k]
+        top = min(k, sims.shape[0])
+        if not top:
+            return []
+        best = np.argpartition(-sims, top - 1)[:top]
+        best = best[np.argsort(-sims[best], kind="stable")]
+        rows = best if positions is None else positions[best]
+        return [(float(sims[i]), texts[row]) for i, row in zip(best, rows) if np.isfinite(sims[i])]
 
     def get_all_memories(self, agent_id: int, memory_type: str = None) -> list[str]:
         if memory_type:
-            self.cur.execute(
+            rows = self._read(
                 "SELECT text FROM vector_memories WHERE agent_id = ? AND memory_type = ? ORDER BY created_at DESC",
                 (agent_id, memory_type),
             )
         else:
-            self.cur.execute(
+            rows = self._read(
                 "SELECT text FROM vector_memories WHERE agent_id = ? ORDER BY created_at DESC",
                 (agent_id,),
             )
-        return [row[0] for row in self.cur.fetchall()]
+        return [row[0] for row in rows]
 
     def count_memories(self, agent_id: int) -> int:
-        self.cur.execute(
-            "SELECT COUNT(*) FROM vector_memories WHERE agent_id = ?",
-            (agent_id,),
-        )
-        return self.cur.fetchone()[0]
+        return self._read("SELECT COUNT(*) FROM vector_memories WHERE agent_id = ?", (agent_id,))[0][0]
+
+    def memory_counts(self, memory_types: tuple[str, ...]) -> dict[int, int]:
+        placeholders = ",".join("?" * len(memory_types))
+        return dict(self._read(
+            f"SELECT agent_id, COUNT(*) FROM vector_memories WHERE memory_type IN ({placeholders}) GROUP BY agent_id",
+            memory_types,
+        ))
+
+    def get_memory_rows(self, agent_id: int, memory_types: tuple[str, ...], skip_newest: int = 0) -> list[tuple]:
+        """Oldest-first ``(id, text, memory_type, created_at)`` rows, leaving out the newest ``skip_newest``."""
+        placeholders = ",".join("?" * len(memory_types))
+        return self._read(
+            f"SELECT id, text, memory_type, created_at FROM vector_memories "
+            f"WHERE agent_id = ? AND memory_type IN ({placeholders}) ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?",
+            (agent_id, *memory_types, skip_newest),
+        )[::-1]
+
+    def replace_memories(self, agent_id: int, remove_ids: list[int], rows):
+        """Insert ``(text, vector, memory_type, created_at)`` rows and delete ``remove_ids`` in one transaction."""
+        rows = list(rows)
+        with self._write_lock:
+            self._flush_pending()
+            with self._pending_cond:
+                first = self._allocate_ids(len(rows))
+            inserted = [
+                (first + i, text, memory_type, vector, memory_importance(memory_type), created_at)
+                for i, (text, vector, memory_type, created_at) in enumerate(rows)
+            ]
+            self.cur.executemany(
+                _INSERT_SQL,
+                [
+                    (row_id, agent_id, text, memory_type, encode_vector(vector), created_at, importance)
+                    for row_id, text, memory_type, vector, importance, created_at in inserted
+                ],
+            )
+            for start in range(0, len(remove_ids), 500):
+                batch = remove_ids[start:start + 500]
+                self.cur.execute(f"DELETE FROM vector_memories WHERE id IN ({','.join('?' * len(batch))})", batch)
+            self._commit()
+
+        with self._lock:
+            index = self._indexes.get(agent_id)
+            if index is None:
+                return
+            index.remove(remove_ids)
+            for row_id, text, memory_type, vector, importance, created_at in inserted:
+                if vector is not None:
+                    created = datetime.fromisoformat(str(created_at)).replace(tzinfo=timezone.utc).timestamp()
+                    vec = np.asarray(vector, dtype=np.float32)
+                    self._index_row(index, row_id, text, memory_type, vec, importance, created)
 
     def delete_old_episodes(self, agent_id: int, keep_last: int = 10):
-        self.cur.execute(
-            """DELETE FROM vector_memories
-               WHERE agent_id = ? AND memory_type = 'episode'
-               AND id NOT IN (
-                   SELECT id FROM vector_memories
+        with self._write_lock:
+            self._flush_pending()
+            self.cur.execute(
+                """DELETE FROM vector_memories
                    WHERE agent_id = ? AND memory_type = 'episode'
-                   ORDER BY created_at DESC LIMIT ?
-               )""",
-            (agent_id, agent_id, keep_last),
+                   AND id NOT IN (
+                       SELECT id FROM vector_memories
+                       WHERE agent_id = ? AND memory_type = 'episode'
+                       ORDER BY created_at DESC LIMIT ?
+                   )""",
+                (agent_id, agent_id, keep_last),
+            )
+            self._commit()
+        self.forget_agents((agent_id,))
+
+    def clear(self):
+        with self._write_lock:
+            with self._pending_cond:
+                self._pending.clear()
+            self.cur.execute("DELETE FROM vector_memories")
+            self._commit()
+        with self._lock:
+            self._indexes.clear()
+            self._dim = None
+            self._ann_persisted = {}
+        for path in (INDEX_CACHE_PATH, ANN_CACHE_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def invalidate(self):
+        """Forget cached state after the database was replaced underneath (snapshot restore)."""
+        with self._write_lock, self._pending_cond:
+            self._pending.clear()
+            self._next_id = None
+        with self._lock:
+            self._indexes.clear()
+            self._dim = None
+
+    def forget_agents(self, agent_ids):
+        """Drop cached indexes so they are reloaded from the database on next search."""
+        with self._lock:
+            for agent_id in agent_ids:
+                self._indexes.pop(agent_id, None)
+
+    def warm_up(self) -> int:
+        """Load every agent's vectors into memory, preferring the on-disk index cache."""
+        with self._lock:
+            if not self._load_index_cache():
+                self._indexes.clear()
+                rows = self._read(
+                    f"SELECT id, agent_id, text, memory_type, vector, {_INDEX_COLUMNS} FROM vector_memories "
+                    "WHERE vector IS NOT NULL ORDER BY id"
+                )
+                for row_id, agent_id, text, memory_type, blob, importance, created in rows:
+                    vec = decode_vector(blob)
+                    index = self._indexes.get(agent_id)
+                    if index is None:
+                        self._dim = self._dim or vec.shape[0]
+                        index = self._indexes[agent_id] = _AgentIndex(self._dim)
+                    self._index_row(index, row_id, text, memory_type, vec, importance, created)
+            return sum(len(index) for index in self._indexes.values())
+
+    def save_index_cache(self):
+        self.flush()
+        with self._lock:
+            if not self._indexes:
+                return
+            agent_ids, ids, texts, types, matrices, importance, created = [], [], [], [], [], [], []
+            for agent_id, index in self._indexes.items():
+                if index.dim != self._dim:
+                    continue
+                if index.dead:
+                    index.compact()
+                agent_ids.extend([agent_id] * len(index))
+                ids.extend(index.ids)
+                texts.extend(index.texts)
+                types.extend(index.types)
+                matrices.append(index.matrix())
+                importance.append(index.importance())
+                created.append(index.created())
+            signature = self._signature()
+        tmp_path = INDEX_CACHE_PATH + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez(
+                fh,
+                signature=np.asarray(signature, dtype=np.int64),
+                agent_ids=np.asarray(agent_ids, dtype=np.int64),
+                ids=np.asarray(ids, dtype=np.int64),
+                matrix=np.concatenate(matrices) if matrices else np.zeros((0, 0), dtype=np.float32),
+                importance=np.concatenate(importance) if importance else np.zeros(0, dtype=np.float32),
+                created=np.concatenate(created) if created else np.zeros(0, dtype=np.float64),
+                texts=np.frombuffer(json.dumps(texts, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+                types=np.frombuffer(json.dumps(types).encode("utf-8"), dtype=np.uint8),
+            )
+        os.replace(tmp_path, INDEX_CACHE_PATH)
+        self._save_ann_cache()
+
+    def _save_ann_cache(self):
+        with self._lock:
+            trained = [
+                (agent_id, index) for agent_id, index in self._indexes.items()
+                if index.ann is not None and index.dim == self._dim
+            ]
+            if not trained:
+                return
+            tmp_path = ANN_CACHE_PATH + ".tmp"
+            with open(tmp_path, "wb") as fh:
+                np.savez(
+                    fh,
+                    agent_ids=np.asarray([agent_id for agent_id, _ in trained], dtype=np.int64),
+                    nlist=np.asarray([index.ann.nlist for _, index in trained], dtype=np.int64),
+                    trained_rows=np.asarray([index.ann.trained_rows for _, index in trained], dtype=np.int64),
+                    sizes=np.asarray([len(index) for _, index in trained], dtype=np.int64),
+                    centroids=np.concatenate([index.ann.centroids for _, index in trained]),
+                    row_ids=np.concatenate([np.asarray(index.ids, dtype=np.int64) for _, index in trained]),
+                    labels=np.concatenate([index.ann.labels() for _, index in trained]),
+                )
+        os.replace(tmp_path, ANN_CACHE_PATH)
+
+    def _load_ann_cache(self) -> dict[int, tuple]:
+        """Trained IVF state per agent from disk: ``(centroids, trained_rows, row_ids, labels)``."""
+        if self._ann_persisted is not None:
+            return self._ann_persisted
+        self._ann_persisted = {}
+        if not os.path.exists(ANN_CACHE_PATH):
+            return self._ann_persisted
+        try:
+            with np.load(ANN_CACHE_PATH) as data:
+                centroid_ends = np.cumsum(data["nlist"])
+                row_ends = np.cumsum(data["sizes"])
+                centroids = np.split(data["centroids"], centroid_ends[:-1])
+                row_ids = np.split(data["row_ids"], row_ends[:-1])
+                labels = np.split(data["labels"], row_ends[:-1])
+                for i, agent_id in enumerate(data["agent_ids"].tolist()):
+                    order = np.argsort(row_ids[i], kind="stable")
+                    self._ann_persisted[agent_id] = (
+                        centroids[i], int(data["trained_rows"][i]), row_ids[i][order], labels[i][order],
+                    )
+        except Exception as e:
+            print(f"[Memory] Ignoring unreadable ANN cache: {e}")
+        return self._ann_persisted
+
+    def _ann_candidates(self, agent_id: int, index: _AgentIndex, query: np.ndarray) -> np.ndarray | None:
+        """Row positions to score for ``query``, or None for exact search over every row."""
+        if not ann_enabled() or index.alive_count < IVF_MIN_ROWS:
+            return None
+        if index.ann is None or len(index) > 2 * index.ann.trained_rows:
+            self._ensure_ann(agent_id, index)
+        return index.ann.candidates(query)
+
+    def _ensure_ann(self, agent_id: int, index: _AgentIndex):
+        """Restore the agent's IVF index from disk, or (re)train it once the index has doubled."""
+        if index.dead:
+            index.compact()
+        persisted = self._load_ann_cache().pop(agent_id, None) if index.ann is None else None
+        if persisted is not None:
+            centroids, trained_rows, row_ids, labels = persisted
+            if centroids.shape[1] == index.dim and len(index) <= 2 * trained_rows:
+                ann = IVFIndex(centroids, trained_rows=trained_rows)
+                ids = np.asarray(index.ids, dtype=np.int64)
+                found = np.searchsorted(row_ids, ids).clip(max=max(len(row_ids) - 1, 0))
+                known = (row_ids[found] == ids) if len(row_ids) else np.zeros(len(ids), dtype=bool)
+                assigned = np.empty(len(ids), dtype=np.int32)
+                assigned[known] = labels[found[known]]
+                if not known.all():
+                    assigned[~known] = ann.assign(index.matrix()[~known])
+                ann.extend(index.matrix(), assigned)
+                index.ann = ann
+                return
+        started = time.perf_counter()
+        index.ann = IVFIndex.train(index.matrix())
+        print(
+            f"[Memory] Trained IVF index for agent {agent_id}: {len(index)} rows, "
+            f"{index.ann.nlist} lists in {time.perf_counter() - started:.2f}s"
         )
-        self.con.commit()
 
-    def _cosine(self, a, b) -> float:
-        a = np.array(a)
-        b = np.array(b)
-        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-8))
+    def _load_index_cache(self) -> bool:
+        if not os.path.exists(INDEX_CACHE_PATH):
+            return False
+        try:
+            with np.load(INDEX_CACHE_PATH) as data:
+                if tuple(data["signature"].tolist()) != self._signature():
+                    return False
+                agent_ids = data["agent_ids"]
+                ids = data["ids"].tolist()
+                matrix = data["matrix"]
+                importance = data["importance"].tolist()
+                created = data["created"].tolist()
+                texts = json.loads(data["texts"].tobytes().decode("utf-8"))
+                types = json.loads(data["types"].tobytes().decode("utf-8"))
+        except Exception:
+            return False
+
+        self._indexes.clear()
+        self._dim = matrix.shape[1] if len(ids) else None
+        for i, agent_id in enumerate(agent_ids.tolist()):
+            index = self._indexes.get(agent_id)
+            if index is None:
+                index = self._indexes[agent_id] = _AgentIndex(self._dim)
+            index.add(ids[i], texts[i], types[i], matrix[i], importance[i], created[i])
+        return True
+
+    def _signature(self) -> tuple[int, int, int]:
+        return tuple(self._read("SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(id), 0) FROM vector_memories")[0])
+
+    def _get_index(self, agent_id: int) -> _AgentIndex | None:
+        index = self._indexes.get(agent_id)
+        if index is not None:
+            return index
+        rows = self._read(
+            f"SELECT id, text, memory_type, vector, {_INDEX_COLUMNS} FROM vector_memories "
+            "WHERE agent_id = ? AND vector IS NOT NULL ORDER BY id",
+            (agent_id,),
+        )
+        if not rows:
+            return None
+        index = None
+        for row_id, text, memory_type, blob, importance, created in rows:
+            vec = decode_vector(blob)
+            if index is None:
+                self._dim = self._dim or vec.shape[0]
+                index = _AgentIndex(self._dim)
+            self._index_row(index, row_id, text, memory_type, vec, importance, created)
+        self._indexes[agent_id] = index
+        return index
+
+    @staticmethod
+    def _index_row(index: _AgentIndex, row_id: int, text: str, memory_type: str, vec: np.ndarray, importance, created):
+        if vec.shape[0] == index.dim:
+            if importance is None:
+                importance = memory_importance(memory_type)
+            index.add(row_id, text, memory_type, vec, importance, created or time.time())
 
 
 _store_instance = None
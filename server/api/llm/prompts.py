@@ -61,6 +61,22 @@ SUMMARIZE_PROMPT = """Суммаризируй ключевые события 
 {memories}
 """
 
+CONSOLIDATION_PROMPT = """Сожми воспоминания персонажа {name} за {period} в короткую запись для долгой памяти.
+Сохрани важное: с кем общался и как к ним относится, значимые события, решения и их итог.
+Пиши от первого лица, 2-4 предложения, без списков и markdown.
+
+Воспоминания:
+{memories}
+"""
+
+WORLD_CONSOLIDATION_PROMPT = """Сожми события мира за {period} в короткую хронику для общей памяти жителей.
+Сохрани важное: что произошло, где и чем это закончилось.
+Пиши в третьем лице, 2-4 предложения, без списков и markdown.
+
+События:
+{memories}
+"""
+
 CHAT_INIT_PROMPT = """Ты хочешь заговорить с {target_name}.
 {topic_context}
 Сейчас на улице: {weather}
@@ -74,6 +90,44 @@ CHAT_INIT_PROMPT = """Ты хочешь заговорить с {target_name}.
 Без markdown и без префикса с именем.
 """
 
+CONVERSATION_TURN_PROMPT = """Ты разговариваешь с {partner_name}.
+{topic_context}
+Сейчас на улице: {weather}
+Вы оба находитесь: {current_zone}
+Твоё отношение к {partner_name}: симпатия {sympathy} (от -10 до 10)
+
+{sympathy_hint}
+
+Разговор до сих пор:
+{transcript}
+
+Скажи следующую реплику — 1-2 коротких предложения. Отвечай на последнюю реплику собеседника,
+продвигай разговор и не повторяй уже сказанное. Без пафоса, без markdown и без префикса с именем.
+"""
+
+DIALOGUE_PAIR_PROMPT = """Сыграй короткий диалог двух персонажей: {initiator_name} начинает разговор, {responder_name} отвечает.
+
+=== {initiator_name} ===
+{initiator_system}
+{initiator_voice}
+Отношение к {responder_name}: симпатия {initiator_sympathy} (от -10 до 10). {initiator_hint}
+
+=== {responder_name} ===
+{responder_system}
+{responder_voice}
+Отношение к {initiator_name}: симпатия {responder_sympathy} (от -10 до 10). {responder_hint}
+Что {responder_name} помнит о прошлых разговорах: {past_conversations}
+
+{topic_context}
+Сейчас на улице: {weather}
+Вы оба находитесь: {current_zone}
+
+Каждая реплика — 1-2 коротких предложения, как обычный человек. Ответ должен отвечать на первую реплику.
+Без пафоса, без поэзии, без markdown и без префикса с именем.
+Ответь строго JSON без markdown:
+{{"initiator": "реплика {initiator_name}", "responder": "ответ {responder_name}"}}
+"""
+
 def get_sympathy_hint(sympathy: int) -> str:
     if sympathy <= -5:
         return "Ты терпеть не можешь этого человека. Будь холоден, резок или откровенно враждебен. Можешь отказаться разговаривать."
@@ -110,3 +164,29 @@ SYMPATHY_ANALYSIS_PROMPT = """Проанализируй тон сообщени
 2 = дружелюбно
 3 = очень дружелюбно
 """
+
+INTERACTION_ANALYSIS_PROMPT = """Проанализируй разговор: как он изменил настроение каждого участника и его отношение к собеседнику.
+
+Участники:
+{participants}
+
+Разговор:
+{transcript}
+
+Ответь строго JSON без markdown, по одному объекту на участника в том же порядке:
+{{"participants": [{{"mood": {{"joy": число_0_100, "anger": число_0_100, "sadness": число_0_100, "fear": число_0_100, "neutral": число_0_100}}, "sympathy_change": число_от_-3_до_3}}]}}
+Сумма значений mood у каждого участника должна быть 100.
+sympathy_change — как изменилось отношение участника к собеседнику: -3 = очень враждебно, 0 = нейтрально, 3 = очень дружелюбно.
+"""
+
+WORLD_EVENT_ANALYSIS_PROMPT = """В мире произошло событие: {event}
+
+Оцени, как оно повлияет на настроение каждого персонажа.
+
+Персонажи:
+{agents}
+
+Ответь строго JSON без markdown, по одному объекту на персонажа в том же порядке:
+{{"reactions": [{{"joy": число_0_100, "anger": число_0_100, "sadness": число_0_100, "fear": число_0_100, "neutral": число_0_100}}]}}
+Сумма значений у каждого персонажа должна быть 100.
+"""
@@ -0,0 +1,236 @@
+"""Admission control for outgoing LLM requests.
+
+Every GenAPI attempt takes a slot from the shared ``LLMScheduler`` first.
+Waiters are served strictly by priority class, then FIFO:
+
+* ``INTERACTIVE`` - user-facing routes (chat, message, plan, react, world event and tick);
+* ``SIMULATION`` - the simulation loop, the default;
+* ``BACKGROUND`` - mob reactions, memory maintenance.
+
+Admission is bounded by a concurrency limit (with slots reserved for
+interactive calls), a token bucket sized from the provider's rate limit and a
+global backoff window opened by 429 responses (``Retry-After`` when present).
+A 429 also halves the bucket rate, which then recovers additively on success.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+
+from ..metrics import get_metrics
+
+
+INTERACTIVE = 0
+SIMULATION = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", SIMULATION: "simulation", BACKGROUND: "background"}
+
+LLM_RATE_LIMIT_RPS = float(os.environ.get("LLM_RATE_LIMIT_RPS", "0"))
+LLM_RATE_LIMIT_BURST = float(os.environ.get("LLM_RATE_LIMIT_BURST", "0"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_INTERACTIVE_RESERVED = int(os.environ.get("LLM_INTERACTIVE_RESERVED", "1"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", "2"))
+LLM_BACKOFF_MAX_SECONDS = float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=SIMULATION)
+
+_metrics = get_metrics()
+_QUEUE_DEPTH = _metrics.gauge("vworld_llm_queue_depth", "LLM requests waiting for a slot.", labels=("priority",))
+_QUEUE_WAIT = _metrics.histogram(
+    "vworld_llm_queue_wait_seconds",
+    "Time an LLM request waited for a slot.",
+    labels=("priority",),
+)
+_IN_FLIGHT = _metrics.gauge("vworld_llm_in_flight", "LLM requests currently being sent.")
+_RATE = _metrics.gauge("vworld_llm_rate_limit_rps", "Current adaptive request rate (0 = unlimited).")
+_THROTTLED = _metrics.counter("vworld_llm_throttled_total", "429 responses received from the provider.")
+_TIMEOUTS = _metrics.counter("vworld_llm_queue_timeouts_total", "Requests that gave up waiting for a slot.", labels=("priority",))
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run LLM calls made in this context at ``priority``.
+
+    The priority is a ``ContextVar``: it reaches ``asyncio.to_thread`` and other
+    ``copy_context`` workers, but not a plain ``threading.Thread``, which starts
+    from an empty context and runs at the default ``SIMULATION`` priority.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_retry_after(value) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        rate: float = 0.0,
+        burst: float = 0.0,
+        max_concurrency: int = 4,
+        interactive_reserved: int = 1,
+        clock=time.monotonic,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.max_concurrency - 1)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._tokens = self.burst
+        self._refilled_at = clock()
+        self._backoff_until = 0.0
+        self._consecutive_throttles = 0
+        _RATE.set(self.rate)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queue_depth(self) -> dict[str, int]:
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiting:
+                depth[PRIORITY_NAMES[priority]] += 1
+            return depth
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _admission_delay(self, entry: tuple[int, int], now: float) -> float | None:
+        """0 if ``entry`` may go now, seconds to wait, or None to wait for a release."""
+        if self._waiting[0] != entry:
+            return None
+        if now < self._backoff_until:
+            return self._backoff_until - now
+        limit = self.max_concurrency
+        if entry[0] != INTERACTIVE:
+            limit -= self.interactive_reserved
+        if self._in_flight >= limit:
+            return None
+        if self.rate > 0:
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+        return 0.0
+
+    def acquire(self, priority: int | None = None, timeout: float | None = None) -> bool:
+        priority = current_priority() if priority is None else priority
+        name = PRIORITY_NAMES[priority]
+        started = self._clock()
+        deadline = None if timeout is None else started + timeout
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            _QUEUE_DEPTH.inc(priority=name)
+            try:
+                while True:
+                    now = self._clock()
+                    delay = self._admission_delay(entry, now)
+                    if delay == 0:
+                        heapq.heappop(self._waiting)
+                        if self.rate > 0:
+                            self._tokens -= 1
+                        self._in_flight += 1
+                        _IN_FLIGHT.set(self._in_flight)
+                        self._cond.notify_all()
+                        return True
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._waiting.remove(entry)
+                            heapq.heapify(self._waiting)
+                            self._cond.notify_all()
+                            _TIMEOUTS.inc(priority=name)
+                            return False
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                _QUEUE_DEPTH.dec(priority=name)
+                _QUEUE_WAIT.observe(self._clock() - started, priority=name)
+
+    def release(self, status: int | None = None, retry_after=None):
+        with self._cond:
+            self._in_flight -= 1
+            _IN_FLIGHT.set(self._in_flight)
+            if status == 429:
+                self._on_throttled(parse_retry_after(retry_after))
+            elif status is not None and status < 400:
+                self._on_success()
+            self._cond.notify_all()
+
+    def _on_throttled(self, retry_after: float | None):
+        _THROTTLED.inc()
+        self._consecutive_throttles += 1
+        if retry_after is None:
+            retry_after = min(
+                LLM_BACKOFF_BASE_SECONDS * 2 ** (self._consecutive_throttles - 1),
+                LLM_BACKOFF_MAX_SECONDS,
+            )
+        self._backoff_until = max(self._backoff_until, self._clock() + retry_after)
+        if self.max_rate > 0:
+            self.rate = max(self.max_rate * 0.05, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            _RATE.set(self.rate)
+        print(f"[LLM] Throttled by provider, backing off {retry_after:.1f}s")
+
+    def _on_success(self):
+        self._consecutive_throttles = 0
+        if self.max_rate > 0 and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+            _RATE.set(self.rate)
+
+    @contextmanager
+    def slot(self, priority: int | None = None, timeout: float | None = None):
+        if not self.acquire(priority, timeout):
+            raise TimeoutError("LLM queue timeout")
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_scheduler: LLMScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                rate=LLM_RATE_LIMIT_RPS,
+                burst=LLM_RATE_LIMIT_BURST,
+                max_concurrency=LLM_MAX_CONCURRENCY,
+                interactive_reserved=LLM_INTERACTIVE_RESERVED,
+            )
+        return _scheduler
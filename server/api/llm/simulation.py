@@ -1,37 +1,45 @@
 ﻿import asyncio
 import math
-import random
+import os
 import time
+from collections import deque
+from typing import Callable
 
 from .agent_ai import AgentBrain
+from .conversation import CHAT_STREAMING, CHAT_TURNS, run_conversation
+from .social_drift import get_social_drift
+from .text_analysis import ZONE_CUES, normalize
 from .zones import PRIMARY_ZONES
-from .. import models
 from ..database.crud_agents import get_agents
-from ..database.crud_relationships import upsert_relationship
 from ..database.database import SessionLocal
-from ..database.models import Relationship
+from ..metrics import PhaseTimer, get_metrics
 from ..websocket.agents_hub import agents_hub
+from ..world.rng import get_rng
 
 
-_PLAN_ZONE_KEYWORDS: dict[str, list[str]] = {
-    "park": ["отдых", "парк", "спокой", "прогулк", "тихо", "расслаб"],
-    "square": ["площадь", "встреч", "люди", "контакт", "знаком", "общени"],
-    "road": ["маршрут", "дорог", "движени", "безопасност", "координац", "темп"],
-}
+TICK_HISTORY_SIZE = int(os.getenv("VWORLD_METRICS_TICK_WINDOW", "200"))
+
+_metrics = get_metrics()
+_TICK_SECONDS = _metrics.histogram("vworld_tick_seconds", "Wall time of a simulation tick.")
+_TICK_PHASE_SECONDS = _metrics.histogram(
+    "vworld_tick_phase_seconds",
+    "Exclusive wall time spent in each tick phase.",
+    labels=("phase",),
+)
+_TICK_ERRORS = _metrics.counter(
+    "vworld_tick_errors_total",
+    "Failed ticks (kind=tick) and failed plan/chat steps inside a tick (kind=step).",
+    labels=("kind",),
+)
 
 
 def _pick_zone_for_plan(plan_text: str) -> str | None:
     if not plan_text:
         return None
-    lower = plan_text.lower()
-    scores: dict[str, int] = {name: 0 for name in _PLAN_ZONE_KEYWORDS}
-    for zone_name, keywords in _PLAN_ZONE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in lower:
-                scores[zone_name] += 1
+    scores = ZONE_CUES.counts(normalize(plan_text))
     best = max(scores, key=lambda k: scores[k])
     if scores[best] == 0:
-        return random.choice([z.name for z in PRIMARY_ZONES])
+        return get_rng("zone").choice([z.name for z in PRIMARY_ZONES])
     return best
 
 
@@ -47,11 +55,14 @@ def _run_agent_plan(agent_id: int):
         db.close()
 
 
-def _run_auto_chat(agent1_id: int, agent2_id: int):
+def _run_auto_chat(agent1_id: int, agent2_id: int, emit=None):
     db = SessionLocal()
     try:
-        brain = AgentBrain(agent1_id, db)
-        chat_result = brain.start_chat(agent2_id)
+        if emit is not None:
+            chat_result = run_conversation(db, agent1_id, agent2_id, CHAT_TURNS, emit)
+        else:
+            brain = AgentBrain(agent1_id, db)
+            chat_result = brain.start_chat(agent2_id)
         if chat_result.get("error"):
             return {"error": chat_result["error"]}
 
@@ -69,52 +80,33 @@ def _run_auto_chat(agent1_id: int, agent2_id: int):
         return {"error": str(e)}
     finally:
         db.close()
+        if emit is not None:
+            emit(None)
+
+
+def _coalesce_deltas(events: list[dict]) -> list[dict]:
+    """Merge queued partial chunks of the same turn into one websocket message."""
+    merged: list[dict] = []
+    for event in events:
+        last = merged[-1] if merged else None
+        if last and not last["done"] and not event["done"] and last["turn"] == event["turn"]:
+            merged[-1] = {**event, "delta": last["delta"] + event["delta"]}
+        else:
+            merged.append(event)
+    return merged
 
 
-def _run_social_drift():
+def _run_social_drift(positions: dict[int, tuple[float, float]]) -> int:
     db = SessionLocal()
     try:
-        agents = get_agents(db, skip=0, limit=1000)
-        if len(agents) < 2:
-            return None
-
-        a1, a2 = random.sample(agents, 2)
-        rel = (
-            db.query(Relationship)
-            .filter(
-                Relationship.agent_from_id == a1.id,
-                Relationship.agent_to_id == a2.id,
-            )
-            .first()
-        )
-
-        if rel is None:
-            upsert_relationship(
-                db,
-                models.RelationshipCreate(agent_from_id=a1.id, agent_to_id=a2.id, sympathy=1),
-            )
-            upsert_relationship(
-                db,
-                models.RelationshipCreate(agent_from_id=a2.id, agent_to_id=a1.id, sympathy=1),
-            )
-            return None
-
-        delta = random.choice([-1, 0, 1])
-        if delta == 0:
-            return None
-
-        new_sympathy = max(-10, min(10, rel.sympathy + delta))
-        upsert_relationship(
-            db,
-            models.RelationshipCreate(agent_from_id=a1.id, agent_to_id=a2.id, sympathy=new_sympathy),
-        )
-        return None
+        return get_social_drift().step(db, positions)
     finally:
         db.close()
 
 
 class SimulationLoop:
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
         self._running = False
         self._task = None
         self._tick_interval = 8.0
@@ -124,6 +116,8 @@ class SimulationLoop:
         self._tick_index = 0
         self._plan_every_n_ticks = 4
         self._last_pair_dialogue: dict[tuple[int, int], tuple[str, str]] = {}
+        self._timer = PhaseTimer()
+        self._tick_history: deque[dict] = deque(maxlen=TICK_HISTORY_SIZE)
 
     @staticmethod
     def _is_llm_error(text: str) -> bool:
@@ -141,6 +135,22 @@ class SimulationLoop:
     def last_results(self) -> list:
         return self._last_results
 
+    def tick_history(self, limit: int | None = None) -> list[dict]:
+        history = list(self._tick_history)
+        return history[-limit:] if limit else history
+
+    def export_state(self) -> dict:
+        return {
+            "tick_index": self._tick_index,
+            "chat_cooldowns": [[a, b, ts] for (a, b), ts in self._chat_cooldowns.items()],
+            "last_pair_dialogue": [[a, b, l1, l2] for (a, b), (l1, l2) in self._last_pair_dialogue.items()],
+        }
+
+    def import_state(self, state: dict):
+        self._tick_index = int(state.get("tick_index", 0))
+        self._chat_cooldowns = {(a, b): ts for a, b, ts in state.get("chat_cooldowns", [])}
+        self._last_pair_dialogue = {(a, b): (l1, l2) for a, b, l1, l2 in state.get("last_pair_dialogue", [])}
+
     def set_speed(self, speed: float):
         self._tick_interval = max(2.0, 8.0 / speed)
 
@@ -156,13 +166,45 @@ class SimulationLoop:
             self._task.cancel()
             self._task = None
 
+    @property
+    def tick_interval(self) -> float:
+        return self._tick_interval
+
+    async def run_tick(self):
+        self._timer = PhaseTimer()
+        started_at = self._clock()
+        started = time.perf_counter()
+        error = None
+        try:
+            await self._tick()
+        except Exception as e:
+            print(f"[Simulation] Tick error: {e}")
+            error = str(e)
+            self._last_results = [{"error": error}]
+            _TICK_ERRORS.inc(kind="tick")
+        self._record_tick(started_at, time.perf_counter() - started, error)
+
+    def _record_tick(self, started_at: float, duration: float, error: str | None):
+        phases = self._timer.phases
+        _TICK_SECONDS.observe(duration)
+        for name, seconds in phases.items():
+            _TICK_PHASE_SECONDS.observe(seconds, phase=name)
+        step_errors = 0 if error else sum(1 for r in self._last_results if isinstance(r, dict) and r.get("error"))
+        if step_errors:
+            _TICK_ERRORS.inc(step_errors, kind="step")
+        self._tick_history.append({
+            "tick": self._tick_index,
+            "started_at": started_at,
+            "duration": round(duration, 6),
+            "phases": {name: round(seconds, 6) for name, seconds in phases.items()},
+            "results": len(self._last_results),
+            "step_errors": step_errors,
+            "error": error,
+        })
+
     async def _loop(self):
         while self._running:
-            try:
-                await self._tick()
-            except Exception as e:
-                print(f"[Simulation] Tick error: {e}")
-                self._last_results = [{"error": str(e)}]
+            await self.run_tick()
             await asyncio.sleep(self._tick_interval)
 
     def _get_agent_position(self, agent) -> tuple[float, float]:
@@ -175,14 +217,33 @@ class SimulationLoop:
         dy = pos1[1] - pos2[1]
         return math.sqrt(dx * dx + dy * dy)
 
+    async def _auto_chat(self, id1: int, id2: int) -> dict:
+        if not CHAT_STREAMING:
+            return await asyncio.to_thread(_run_auto_chat, id1, id2)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        worker = asyncio.ensure_future(
+            asyncio.to_thread(_run_auto_chat, id1, id2, lambda event: loop.call_soon_threadsafe(queue.put_nowait, event))
+        )
+        finished = False
+        while not finished:
+            events = [await queue.get()]
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            finished = events[-1] is None
+            for event in _coalesce_deltas([e for e in events if e is not None]):
+                await agents_hub.send_agent_dialogue_delta(**event)
+        return await worker
+
     def _can_chat(self, id1: int, id2: int) -> bool:
         key = (min(id1, id2), max(id1, id2))
         last = self._chat_cooldowns.get(key, 0)
-        return (time.time() - last) > self._chat_cooldown_seconds
+        return (self._clock() - last) > self._chat_cooldown_seconds
 
     def _mark_chatted(self, id1: int, id2: int):
         key = (min(id1, id2), max(id1, id2))
-        self._chat_cooldowns[key] = time.time()
+        self._chat_cooldowns[key] = self._clock()
 
     @staticmethod
     def _normalize_line(text: str) -> str:
@@ -211,8 +272,10 @@ class SimulationLoop:
         db = SessionLocal()
         try:
             self._tick_index += 1
-            all_entities = get_agents(db)
-            agents = [a for a in all_entities if (getattr(a, 'type', 'agent') or 'agent') == 'agent']
+            timer = self._timer
+            with timer.phase("reload"):
+                all_entities = get_agents(db)
+                agents = [a for a in all_entities if (getattr(a, 'type', 'agent') or 'agent') == 'agent']
             if not agents:
                 self._last_results = []
                 return
@@ -222,7 +285,8 @@ class SimulationLoop:
             for agent in agents:
                 if self._tick_index % self._plan_every_n_ticks != agent.id % self._plan_every_n_ticks:
                     continue
-                plan_result = await asyncio.to_thread(_run_agent_plan, agent.id)
+                with timer.phase("plan"):
+                    plan_result = await asyncio.to_thread(_run_agent_plan, agent.id)
                 if plan_result["error"]:
                     results.append({
                         "agent_id": agent.id,
@@ -235,64 +299,72 @@ class SimulationLoop:
                 results.append(plan)
 
                 if plan_result["mood"] is not None:
-                    await agents_hub.send_agent_mood_changed(agent.id, plan_result["mood"])
+                    with timer.phase("broadcast"):
+                        await agents_hub.send_agent_mood_changed(agent.id, plan_result["mood"])
 
                 point_id = plan_result.get("point_id")
                 plan_text = plan.get("plan", "") if isinstance(plan, dict) else str(plan)
                 if point_id and plan_text:
-                    dest_zone = _pick_zone_for_plan(plan_text)
-                    if dest_zone:
-                        from ..routers.ws.points import manager as points_manager
-                        from ..websocket.ws_logic import steer_agent_to_zone
-                        steer_agent_to_zone(points_manager, point_id, dest_zone)
-
-            db.expire_all()
-            all_entities = get_agents(db)
-            agents = [a for a in all_entities if (getattr(a, 'type', 'agent') or 'agent') == 'agent']
+                    with timer.phase("plan"):
+                        dest_zone = _pick_zone_for_plan(plan_text)
+                        if dest_zone:
+                            from ..routers.ws.points import manager as points_manager
+                            from ..websocket.ws_logic import steer_agent_to_zone
+                            steer_agent_to_zone(points_manager, point_id, dest_zone)
+
+            with timer.phase("reload"):
+                db.expire_all()
+                all_entities = get_agents(db)
+                agents = [a for a in all_entities if (getattr(a, 'type', 'agent') or 'agent') == 'agent']
             proximity_threshold = 20.0
             did_auto_chat = False
+            positions = {a.id: self._get_agent_position(a) for a in agents}
+
+            with timer.phase("proximity"):
+                for i, a1 in enumerate(agents):
+                    for a2 in agents[i + 1:]:
+                        pos1 = self._get_agent_position(a1)
+                        pos2 = self._get_agent_position(a2)
+                        dist = self._distance(pos1, pos2)
+
+                        if dist < proximity_threshold and self._can_chat(a1.id, a2.id):
+                            with timer.phase("chat"):
+                                chat_result = await self._auto_chat(a1.id, a2.id)
+                            if chat_result.get("error"):
+                                results.append({
+                                    "type": "auto_chat",
+                                    "error": chat_result["error"],
+                                })
+                                continue
+
+                            dialogue = chat_result.get("dialogue", [])
+                            bad_dialogue = any(self._is_llm_error(m.get("text", "")) for m in dialogue)
+                            repetitive = self._is_repetitive_dialogue(a1.id, a2.id, dialogue)
+                            if bad_dialogue or repetitive:
+                                continue
 
-            for i, a1 in enumerate(agents):
-                for a2 in agents[i + 1:]:
-                    pos1 = self._get_agent_position(a1)
-                    pos2 = self._get_agent_position(a2)
-                    dist = self._distance(pos1, pos2)
-
-                    if dist < proximity_threshold and self._can_chat(a1.id, a2.id):
-                        chat_result = await asyncio.to_thread(_run_auto_chat, a1.id, a2.id)
-                        if chat_result.get("error"):
-                            results.append({
-                                "type": "auto_chat",
-                                "error": chat_result["error"],
-                            })
-                            continue
-
-                        dialogue = chat_result.get("dialogue", [])
-                        bad_dialogue = any(self._is_llm_error(m.get("text", "")) for m in dialogue)
-                        repetitive = self._is_repetitive_dialogue(a1.id, a2.id, dialogue)
-                        if bad_dialogue or repetitive:
-                            continue
-
-                        self._mark_chatted(a1.id, a2.id)
-                        results.append({"type": "auto_chat", "dialogue": dialogue})
-                        messages = [{"speaker": m["speaker"], "text": m["text"]} for m in dialogue]
-                        await agents_hub.send_agent_dialogue(
-                            a1.id,
-                            chat_result.get("name1", a1.name),
-                            a2.id,
-                            chat_result.get("name2", a2.name),
-                            messages,
-                        )
-                        did_auto_chat = True
-                        break
-                else:
-                    continue
-                break
+                            self._mark_chatted(a1.id, a2.id)
+                            results.append({"type": "auto_chat", "dialogue": dialogue})
+                            messages = [{"speaker": m["speaker"], "text": m["text"]} for m in dialogue]
+                            with timer.phase("broadcast"):
+                                await agents_hub.send_agent_dialogue(
+                                    a1.id,
+                                    chat_result.get("name1", a1.name),
+                                    a2.id,
+                                    chat_result.get("name2", a2.name),
+                                    messages,
+                                )
+                            did_auto_chat = True
+                            break
+                    else:
+                        continue
+                    break
 
             if not did_auto_chat and len(agents) >= 2:
-                a1, a2 = random.sample(agents, 2)
+                a1, a2 = get_rng("social").sample(agents, 2)
                 if self._can_chat(a1.id, a2.id):
-                    chat_result = await asyncio.to_thread(_run_auto_chat, a1.id, a2.id)
+                    with timer.phase("chat"):
+                        chat_result = await self._auto_chat(a1.id, a2.id)
                     if not chat_result.get("error"):
                         dialogue = chat_result.get("dialogue", [])
                         bad_dialogue = any(self._is_llm_error(m.get("text", "")) for m in dialogue)
@@ -301,23 +373,26 @@ class SimulationLoop:
                             self._mark_chatted(a1.id, a2.id)
                             results.append({"type": "auto_chat_random", "dialogue": dialogue})
                             messages = [{"speaker": m["speaker"], "text": m["text"]} for m in dialogue]
-                            await agents_hub.send_agent_dialogue(
-                                a1.id,
-                                chat_result.get("name1", a1.name),
-                                a2.id,
-                                chat_result.get("name2", a2.name),
-                                messages,
-                            )
+                            with timer.phase("broadcast"):
+                                await agents_hub.send_agent_dialogue(
+                                    a1.id,
+                                    chat_result.get("name1", a1.name),
+                                    a2.id,
+                                    chat_result.get("name2", a2.name),
+                                    messages,
+                                )
                     else:
                         results.append({"type": "auto_chat_random", "error": chat_result["error"]})
 
             self._last_results = results
-            await agents_hub.send_agents_update()
+            with timer.phase("broadcast"):
+                await agents_hub.send_agents_update()
         finally:
             db.close()
 
         if self._tick_index % 2 == 0:
-            await asyncio.to_thread(_run_social_drift)
+            with timer.phase("drift"):
+                await asyncio.to_thread(_run_social_drift, positions)
 
 
 _simulation = SimulationLoop()
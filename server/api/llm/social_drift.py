@@ -0,0 +1,169 @@
+"""Social drift: a stochastic update of every relationship at once.
+
+Sympathy between ``agent``-type agents is held as a dense float matrix indexed
+by agent slot, next to a mask of pairs that have a relationship. Each step
+pulls every known pair slightly back towards neutral, nudges a random share
+of them with Gaussian noise, and warms pairs standing close to each other
+towards ``SOCIAL_PROXIMITY_TARGET`` (creating the acquaintance if there was
+none). The matrix keeps fractional sympathy between steps; only cells whose
+rounded value changed are written, in one transaction.
+
+The matrix follows the relationship graph through its change log, so chat
+updates made elsewhere are picked up without re-reading the table. A chat that
+changes a pair while a step is being computed wins: ``upsert_sympathies``
+drops or skips the step's value for that cell instead of overwriting it.
+"""
+
+import os
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..database.crud_relationships import upsert_sympathies
+from ..database.relationship_graph import get_relationship_graph_cache
+from ..metrics import get_metrics
+from ..world.rng import get_rng
+
+
+SOCIAL_DRIFT_RATE = float(os.getenv("VWORLD_SOCIAL_DRIFT_RATE", "0.25"))
+SOCIAL_DRIFT_NOISE = float(os.getenv("VWORLD_SOCIAL_DRIFT_NOISE", "0.5"))
+SOCIAL_DRIFT_MEAN_REVERSION = float(os.getenv("VWORLD_SOCIAL_DRIFT_MEAN_REVERSION", "0.01"))
+SOCIAL_PROXIMITY_RADIUS = float(os.getenv("VWORLD_SOCIAL_PROXIMITY_RADIUS", "20"))
+SOCIAL_PROXIMITY_GAIN = float(os.getenv("VWORLD_SOCIAL_PROXIMITY_GAIN", "0.2"))
+SOCIAL_PROXIMITY_TARGET = float(os.getenv("VWORLD_SOCIAL_PROXIMITY_TARGET", "5"))
+SYMPATHY_MIN, SYMPATHY_MAX = -10, 10
+
+_CELLS_WRITTEN = get_metrics().counter("vworld_social_drift_cells_total", "Relationship cells written by social drift.")
+
+
+class SocialDriftEngine:
+    def __init__(self, capacity: int = 64):
+        self._version: int | None = None
+        self._slots: dict[int, int] = {}
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
+        self._value = np.zeros((capacity, capacity), dtype=np.float32)
+        self._known = np.zeros((capacity, capacity), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _grow(self):
+        old = self._ids.shape[0]
+        new = old * 2
+        self._ids = np.concatenate([self._ids, np.full(new - old, -1, dtype=np.int64)])
+        value = np.zeros((new, new), dtype=np.float32)
+        value[:old, :old] = self._value
+        known = np.zeros((new, new), dtype=bool)
+        known[:old, :old] = self._known
+        self._value, self._known = value, known
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def _add_agent(self, agent_id: int):
+        if agent_id in self._slots:
+            return
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._slots[agent_id] = slot
+        self._ids[slot] = agent_id
+
+    def _remove_agent(self, agent_id: int):
+        slot = self._slots.pop(agent_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = -1
+        self._value[slot, :] = self._value[:, slot] = 0
+        self._known[slot, :] = self._known[:, slot] = False
+        self._free.append(slot)
+
+    def _set(self, from_id: int, to_id: int, sympathy: int):
+        i, j = self._slots.get(from_id), self._slots.get(to_id)
+        if i is None or j is None:
+            return
+        # Keep our fractional state unless someone else moved the cell.
+        if not self._known[i, j] or np.rint(self._value[i, j]) != sympathy:
+            self._value[i, j] = sympathy
+            self._known[i, j] = True
+
+    def sync(self, db: Session):
+        graph = get_relationship_graph_cache()
+        changes = None if self._version is None else graph.changes_since(self._version)
+        if changes is None:
+            self._reload(db)
+            return
+        for version, kind, *change in changes:
+            if kind == "sympathy":
+                self._set(*change)
+            elif kind == "agent":
+                agent_id, _, agent_kind = change
+                if agent_kind == "agent":
+                    self._add_agent(agent_id)
+                else:
+                    self._remove_agent(agent_id)
+            elif kind == "remove":
+                self._remove_agent(change[0])
+            self._version = version
+
+    def _reload(self, db: Session):
+        version, agents, edges = get_relationship_graph_cache().state(db)
+        for agent_id in list(self._slots):
+            self._remove_agent(agent_id)
+        for agent_id, (_, kind) in agents.items():
+            if kind == "agent":
+                self._add_agent(agent_id)
+        self._known[:] = False
+        for from_id, to_id, sympathy in edges:
+            self._set(from_id, to_id, sympathy)
+        self._version = version
+
+    def step(self, db: Session, positions: dict[int, tuple[float, float]]) -> int:
+        """Apply one drift step and persist the changed cells; returns how many were written."""
+        self.sync(db)
+        if len(self._slots) < 2:
+            return 0
+        rng = np.random.default_rng(get_rng("social").getrandbits(64))
+        active = np.flatnonzero(self._ids >= 0)
+        grid = np.ix_(active, active)
+        value = self._value[grid]
+        known = self._known[grid]
+        before = np.rint(value)
+
+        value[known] -= SOCIAL_DRIFT_MEAN_REVERSION * value[known]
+        nudged = known & (rng.random(value.shape) < SOCIAL_DRIFT_RATE)
+        value[nudged] += rng.normal(0.0, SOCIAL_DRIFT_NOISE, int(nudged.sum())).astype(np.float32)
+
+        points = np.array([positions.get(int(agent_id), (np.nan, np.nan)) for agent_id in self._ids[active]])
+        dist = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1))
+        near = dist < SOCIAL_PROXIMITY_RADIUS
+        np.fill_diagonal(near, False)
+        closeness = 1.0 - dist[near] / SOCIAL_PROXIMITY_RADIUS
+        value[near] += SOCIAL_PROXIMITY_GAIN * closeness * np.maximum(SOCIAL_PROXIMITY_TARGET - value[near], 0.0)
+
+        np.clip(value, SYMPATHY_MIN, SYMPATHY_MAX, out=value)
+        after = np.rint(value)
+        changed = (known & (after != before)) | (near & ~known)
+        self._value[grid] = value
+        self._known[grid] = known | near
+
+        rows, cols = np.nonzero(changed)
+        ids = self._ids[active]
+        cells = list(zip(ids[rows].tolist(), ids[cols].tolist(), after[rows, cols].astype(int).tolist()))
+        graph = get_relationship_graph_cache()
+        start = graph.version
+        written = upsert_sympathies(db, cells, since=self._version)
+        # Our own writes are already in the matrix; skip them unless something else interleaved.
+        if self._version == start and graph.version == start + written:
+            self._version = graph.version
+        _CELLS_WRITTEN.inc(written)
+        return written
+
+
+_engine: SocialDriftEngine | None = None
+
+
+def get_social_drift() -> SocialDriftEngine:
+    global _engine
+    if _engine is None:
+        _engine = SocialDriftEngine()
+    return _engine
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import re
+import threading
+import time
+
+from .config import LLMResponse, observe_llm_call
+
+
+_OPENERS = (
+    "Слушай, тут на площади сегодня заметно больше людей",
+    "Кстати, у дороги опять собирается небольшая очередь",
+    "Я думаю, нам стоит проверить, что творится в парке",
+    "Ну да, погода сегодня влияет на всех вокруг",
+    "Мне кажется, надо держаться ближе к своим сейчас",
+    "Блин, сегодня всё идёт медленнее, чем я рассчитывал",
+)
+_ENDINGS = (
+    "и это хороший повод поговорить.",
+    "так что давай держаться вместе.",
+    "поэтому я пока понаблюдаю.",
+    "и мне это скорее нравится.",
+    "хотя спешить тут некуда.",
+)
+
+
+def split_tokens(text: str) -> list[str]:
+    """Word-sized chunks that join back to ``text``, for fake streaming."""
+    words = text.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+
+def stub_completion(prompt: str) -> str:
+    """Deterministic reply that passes the dialogue quality filters."""
+    digest = hashlib.sha256((prompt or "").encode("utf-8")).digest()
+    if '"initiator"' in (prompt or ""):
+        second = (digest[0] + 1 + digest[3] % (len(_OPENERS) - 1)) % len(_OPENERS)
+        return json.dumps({
+            "initiator": f"{_OPENERS[digest[0] % len(_OPENERS)]}, {_ENDINGS[digest[1] % len(_ENDINGS)]}",
+            "responder": f"{_OPENERS[second]}, {_ENDINGS[digest[4] % len(_ENDINGS)]}",
+        }, ensure_ascii=False)
+    if '"participants"' in (prompt or "") or '"reactions"' in (prompt or ""):
+        count = len(re.findall(r"^\[\d+\] ", prompt, re.M))
+        mood = {"joy": 30, "anger": 5, "sadness": 5, "fear": 5, "neutral": 55}
+        if '"participants"' in prompt:
+            return json.dumps({"participants": [
+                {"mood": mood, "sympathy_change": digest[2 + i % 8] % 3 - 1} for i in range(count)
+            ]})
+        return json.dumps({"reactions": [mood] * count})
+    if "JSON" in (prompt or ""):
+        return '{"joy": 30, "anger": 5, "sadness": 5, "fear": 5, "neutral": 55}'
+    if "только числом" in (prompt or ""):
+        return str(digest[2] % 3 - 1)
+    return f"{_OPENERS[digest[0] % len(_OPENERS)]}, {_ENDINGS[digest[1] % len(_ENDINGS)]}"
+
+
+class StubLLM:
+    """Offline stand-in for ``GenApiLLM`` used by headless runs."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str, max_retries: int | None = None) -> LLMResponse:
+        started = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+        content = stub_completion(prompt)
+        observe_llm_call(time.perf_counter() - started, content)
+        return LLMResponse(content=content)
+
+    def stream(self, prompt: str):
+        yield from split_tokens(self.invoke(prompt).content)
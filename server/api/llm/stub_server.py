@@ -0,0 +1,175 @@
+"""Local GenAPI-compatible stub server for offline load tests.
+
+Point the backend at it instead of the real provider::
+
+    python -m api.llm.stub_server --port 8100 --latency lognormal:800:0.5 --error-rate 0.05
+    GENAPI_BASE_URL=http://127.0.0.1:8100 GENAPI_API_KEY=stub uvicorn api.main:app
+
+Latency specs: ``fixed:MS``, ``uniform:MIN_MS:MAX_MS``, ``normal:MEAN_MS:STD_MS``,
+``lognormal:MEDIAN_MS:SIGMA``. Generators: ``stub`` (deterministic replies that
+pass the dialogue filters), ``echo`` and ``cassette`` (recorded replies from
+``--cassette``, falling back to ``stub`` on a miss). Requests with
+``"stream": true`` get the reply as SSE chunks, ``--token-latency`` ms apart,
+after the sampled time-to-first-token.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .cassette import Cassette
+from .stub import split_tokens, stub_completion
+
+
+@dataclass
+class StubServerConfig:
+    latency: str = "fixed:0"
+    token_latency: float = 0.0
+    error_rate: float = 0.0
+    error_codes: tuple[int, ...] = (429, 500, 503)
+    retry_after: float = 1.0
+    rate_limit: float = 0.0
+    generator: str = "stub"
+    cassette: str = ""
+    seed: int | None = None
+    stats: dict = field(default_factory=lambda: {"requests": 0, "errors": 0, "rate_limited": 0, "in_flight": 0})
+
+
+def parse_latency(spec: str, rng: random.Random):
+    """Return a callable producing one latency sample in seconds."""
+    kind, _, rest = spec.partition(":")
+    params = [float(p) for p in rest.split(":") if p]
+    if kind == "fixed" and len(params) == 1:
+        return lambda: params[0] / 1000
+    if kind == "uniform" and len(params) == 2:
+        return lambda: rng.uniform(params[0], params[1]) / 1000
+    if kind == "normal" and len(params) == 2:
+        return lambda: max(0.0, rng.gauss(params[0], params[1])) / 1000
+    if kind == "lognormal" and len(params) == 2:
+        mu = math.log(max(params[0], 1e-3))
+        return lambda: rng.lognormvariate(mu, params[1]) / 1000
+    raise ValueError(f"bad latency spec: {spec!r}")
+
+
+def _prompt_of(body: dict) -> str:
+    messages = body.get("messages") or []
+    if messages and isinstance(messages[-1], dict):
+        return str(messages[-1].get("content", ""))
+    return str(body.get("prompt", ""))
+
+
+def create_app(config: StubServerConfig) -> FastAPI:
+    rng = random.Random(config.seed)
+    sample_latency = parse_latency(config.latency, rng)
+    cassette = Cassette(config.cassette, "replay") if config.generator == "cassette" else None
+    stats = config.stats
+    bucket = {"tokens": config.rate_limit, "updated": time.monotonic()}
+
+    def generate(model: str, prompt: str) -> str:
+        if config.generator == "echo":
+            return prompt[-400:]
+        if cassette is not None:
+            recorded = cassette.replay(model, prompt)
+            if recorded is not None:
+                return recorded
+        return stub_completion(prompt)
+
+    def take_token() -> bool:
+        if config.rate_limit <= 0:
+            return True
+        now = time.monotonic()
+        bucket["tokens"] = min(config.rate_limit, bucket["tokens"] + (now - bucket["updated"]) * config.rate_limit)
+        bucket["updated"] = now
+        if bucket["tokens"] < 1:
+            return False
+        bucket["tokens"] -= 1
+        return True
+
+    async def stream_chunks(text: str):
+        for i, token in enumerate(split_tokens(text)):
+            if i and config.token_latency > 0:
+                await asyncio.sleep(config.token_latency / 1000)
+            chunk = {"choices": [{"delta": {"content": token}}]}
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    app = FastAPI(title="GenAPI stub")
+
+    @app.post("/networks/{model}")
+    async def complete(model: str, request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if not take_token():
+            stats["rate_limited"] += 1
+            retry_after = max(1, math.ceil(1 / config.rate_limit))
+            return JSONResponse({"error": "Too Many Requests"}, status_code=429, headers={"Retry-After": str(retry_after)})
+
+        stats["in_flight"] += 1
+        try:
+            await asyncio.sleep(sample_latency())
+        finally:
+            stats["in_flight"] -= 1
+
+        if config.error_rate > 0 and rng.random() < config.error_rate:
+            stats["errors"] += 1
+            status = rng.choice(config.error_codes)
+            headers = {"Retry-After": f"{config.retry_after:g}"} if status == 429 else None
+            return JSONResponse({"error": f"stub error {status}"}, status_code=status, headers=headers)
+
+        output = generate(model, _prompt_of(body))
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(output), media_type="text/event-stream")
+        return {
+            "request_id": stats["requests"],
+            "model": model,
+            "status": "success",
+            "output": output,
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m api.llm.stub_server", description="GenAPI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="fixed:0", help="latency distribution, e.g. lognormal:800:0.5")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="ms between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with --error-codes")
+    parser.add_argument("--error-codes", default="429,500,503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second before answering 429")
+    parser.add_argument("--generator", choices=("stub", "echo", "cassette"), default="stub")
+    parser.add_argument("--cassette", default="", help="recorded JSONL for --generator cassette")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    config = StubServerConfig(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        error_codes=tuple(int(c) for c in args.error_codes.split(",") if c.strip()),
+        retry_after=args.retry_after,
+        rate_limit=args.rate_limit,
+        generator=args.generator,
+        cassette=args.cassette,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
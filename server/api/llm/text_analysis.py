@@ -0,0 +1,89 @@
+"""Keyword heuristics over chat lines, plans and events.
+
+Each keyword table is built once into a flat ``(keyword, category)`` tuple, and
+one pass over text lower-cased once reports every category hit. The answer is the
+same as checking ``keyword in text`` for every keyword. A single alternation
+regex was measured first and lost on these short lines. CPython's ``re``
+backtracks through the branches at every offset. ``str.__contains__`` is a C
+fast search, so ``python -m benchmarks.text_analysis`` keeps the plain scan.
+"""
+
+
+class KeywordMatcher:
+    """Substring keywords grouped by category."""
+
+    def __init__(self, categories: dict[str, tuple[str, ...]]):
+        self.keywords = {category: tuple(keywords) for category, keywords in categories.items()}
+        self.categories = tuple(categories)
+        self._pairs = tuple((keyword, category) for category, keywords in categories.items() for keyword in keywords)
+
+    def search(self, text: str) -> bool:
+        for keyword, _ in self._pairs:
+            if keyword in text:
+                return True
+        return False
+
+    def counts(self, text: str) -> dict[str, int]:
+        """Distinct keywords found per category, every category present."""
+        counts = dict.fromkeys(self.categories, 0)
+        for keyword, category in self._pairs:
+            if keyword in text:
+                counts[category] += 1
+        return counts
+
+
+def normalize(text: str | None) -> str:
+    return (text or "").lower()
+
+
+EMOTION_CUES = KeywordMatcher({
+    "positive": ("друж", "успех", "помог", "солн", "улучш", "довер", "познаком"),
+    "negative": ("конфликт", "угроз", "шторм", "ошибка", "потер", "враг", "удален"),
+    "anxious": ("туман", "опас", "риск", "неизвест"),
+})
+
+SYMPATHY_CUES = KeywordMatcher({
+    "positive": ("спасибо", "отлично", "класс", "друж", "поддерж", "давай"),
+    "negative": ("плохо", "ненавиж", "уходи", "ошиб", "бред", "злю"),
+})
+
+ZONE_CUES = KeywordMatcher({
+    "park": ("отдых", "парк", "спокой", "прогулк", "тихо", "расслаб"),
+    "square": ("площадь", "встреч", "люди", "контакт", "знаком", "общени"),
+    "road": ("маршрут", "дорог", "движени", "безопасност", "координац", "темп"),
+})
+
+BLOCKED_CHAT_MARKERS = KeywordMatcher({
+    "blocked": (
+        "цель:",
+        "действие:",
+        "настроение:",
+        "реакция:",
+        "план:",
+        "технический шум",
+        "нет никакого смысла",
+        "странными фразами",
+        "как жизнь",
+        "всё супер",
+        "жарко сегодня",
+        "привет, ",
+        "привет.",
+    ),
+})
+
+DANGLING_WORDS = frozenset({
+    "и", "но", "а", "что", "как", "когда", "если", "чтобы", "ли",
+    "в", "на", "под", "над", "у", "с", "к", "по", "от", "до", "для", "из",
+    "не", "ну", "тоже", "уже", "ещё", "еще", "тут", "там", "здесь",
+})
+
+
+def is_incomplete(text: str | None) -> bool:
+    """A line that is too short or breaks off on a comma or a dangling word."""
+    if not text:
+        return True
+    stripped = text.strip().lower()
+    if stripped.endswith((",", ";", ":", "не.", "не!", "не?")):
+        return True
+    words = stripped.split()
+    return len(words) < 4 or words[-1] in DANGLING_WORDS
@@ -11,9 +11,11 @@ from .database import init_db
 from .database.database import SessionLocal
 from .database.crud_environment import get_environment
 from .database.crud_events import create_event, get_events
-from .database.models import Memory, Event, Relationship, Agent
+from .llm.consolidation import CONSOLIDATION_ENABLED, consolidation_task, get_consolidation_worker
 from .llm.simulation import get_simulation
 from .websocket.ws_logic import points_update_task
+from .world.retention import RETENTION_ENABLED, get_retention_service, retention_task
+from .world.startup import WARM_START, persist_caches, prepare_world, warm_start
 from . import models
 
 
@@ -28,45 +30,27 @@ from .routers.api import (
     environment,
     llm_interaction,
     simulation,
+    snapshots,
 )
 from .routers.ws import points_router, agents_router
 from .routers.ws.points import manager
 
 
-def _clear_world_memory():
-    import sqlite3
-    import os
-
-    db = SessionLocal()
-    try:
-        db.query(Memory).delete()
-        db.query(Event).delete()
-        db.query(Relationship).delete()
-        db.query(Agent).update({"current_plan": ""})
-        db.commit()
-    finally:
-        db.close()
-
-    vector_db_path = os.path.join(os.path.dirname(__file__), "vector_memory.db")
-    if os.path.exists(vector_db_path):
-        try:
-            con = sqlite3.connect(vector_db_path)
-            con.execute("DELETE FROM vector_memories")
-            con.commit()
-            con.close()
-        except Exception:
-            pass
-
-    import api.llm.memory_store as ms
-    ms._store_instance = None
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
-    _clear_world_memory()
+    mode = prepare_world()
+    print(f"[Startup] World mode: {mode}")
+    if WARM_START:
+        loaded = await asyncio.to_thread(warm_start)
+        print(f"[Startup] Warm start: {loaded} memories indexed")
 
     points_task = asyncio.create_task(points_update_task(manager))
+    background_tasks = [points_task]
+    if RETENTION_ENABLED:
+        background_tasks.append(asyncio.create_task(retention_task(get_retention_service())))
+    if CONSOLIDATION_ENABLED:
+        background_tasks.append(asyncio.create_task(consolidation_task(get_consolidation_worker())))
 
     sim = get_simulation()
     db = SessionLocal()
@@ -89,15 +73,19 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    points_task.cancel()
-    try:
-        await points_task
-    except asyncio.CancelledError:
-        pass
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
     if sim.is_running:
         await sim.stop()
 
+    if WARM_START:
+        await asyncio.to_thread(persist_caches)
+
 
 app = FastAPI(title="VWorld Multi-Agent API", lifespan=lifespan)
 
@@ -117,6 +105,7 @@ app.include_router(relationships.router)
 app.include_router(environment.router)
 app.include_router(llm_interaction.router)
 app.include_router(simulation.router)
+app.include_router(snapshots.router)
 
 app.include_router(points_router)
 app.include_router(agents_router)
@@ -18,8 +18,10 @@ from .relationships import (
     RelationshipGraphNode,
     RelationshipGraphEdge,
     RelationshipGraph,
+    RelationshipAgentStats,
+    RelationshipCluster,
 )
-from .mood import MoodUpdate
+from .mood import EMOTIONS, MOOD_LABELS, Mood, MoodUpdate
 from .environment import WeatherUpdate, EnvironmentEventCreate, TimeSpeedUpdate, EnvironmentResponse
 
 __all__ = [
@@ -43,6 +45,11 @@ __all__ = [
     "RelationshipGraphNode",
     "RelationshipGraphEdge",
     "RelationshipGraph",
+    "RelationshipAgentStats",
+    "RelationshipCluster",
+    "EMOTIONS",
+    "Mood",
+    "MOOD_LABELS",
     "MoodUpdate",
     "WeatherUpdate",
     "EnvironmentEventCreate",
@@ -1,8 +1,9 @@
 ﻿from datetime import datetime
 from typing import Literal, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 from .memory import MemoryResponse
+from .mood import Mood, mood_json
 from .relationships import RelationshipResponse
 
 
@@ -13,6 +14,11 @@ class AgentBase(BaseModel):
     mood: str = "neutral"
     current_plan: str = ""
 
+    @field_validator("mood", mode="before")
+    @classmethod
+    def _mood_to_json(cls, value):
+        return mood_json(value)
+
 
 class AgentCreate(AgentBase):
     pass
@@ -24,6 +30,11 @@ class AgentUpdate(BaseModel):
     mood: Optional[str] = None
     current_plan: Optional[str] = None
 
+    @field_validator("mood", mode="before")
+    @classmethod
+    def _mood_to_json(cls, value):
+        return None if value is None else mood_json(value)
+
 
 class AgentResponse(AgentBase):
     id: int
@@ -58,6 +69,11 @@ class AgentProfileCharacter(BaseModel):
     mood: str
     current_plan: str
 
+    @field_validator("mood", mode="before")
+    @classmethod
+    def _mood_to_json(cls, value):
+        return mood_json(value)
+
 
 class AgentProfile(BaseModel):
     agent: AgentResponse
@@ -77,6 +93,12 @@ class AgentPreset(BaseModel):
     current_plan: str = ""
     weather_tags: list[WeatherType] = []
 
+    @field_validator("mood")
+    @classmethod
+    def _known_mood(cls, value):
+        Mood.validate(value)
+        return value
+
 
 class AgentPresetSpawnRequest(BaseModel):
     preset_id: str
@@ -89,6 +111,12 @@ class MobPreset(BaseModel):
     mood: str = "neutral"
     current_plan: str = ""
 
+    @field_validator("mood")
+    @classmethod
+    def _known_mood(cls, value):
+        Mood.validate(value)
+        return value
+
 
 class MobPresetSpawnRequest(BaseModel):
     preset_id: str
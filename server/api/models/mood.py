@@ -1,5 +1,109 @@
-﻿from pydantic import BaseModel
+﻿import json
+
+from pydantic import BaseModel, field_validator
+
+
+EMOTIONS = ("joy", "anger", "sadness", "fear", "neutral")
+# Same text as json.dumps(mood.to_dict()), without building the dict.
+_JSON_TEMPLATE = "{" + ", ".join(f'"{name}": %d' for name in EMOTIONS) + "}"
+
+
+class Mood:
+    """Emotion intensities in percent; stored as the ``agents.mood_*`` columns.
+
+    Immutable by convention: changes produce a new ``Mood``. JSON exists only at
+    the API boundary (``to_json`` / ``parse``).
+    """
+
+    __slots__ = EMOTIONS
+
+    def __init__(self, joy: int = 20, anger: int = 5, sadness: int = 5, fear: int = 5, neutral: int = 65):
+        self.joy = joy
+        self.anger = anger
+        self.sadness = sadness
+        self.fear = fear
+        self.neutral = neutral
+
+    @classmethod
+    def validate(cls, value) -> "Mood":
+        """A ``Mood`` from itself, a label from ``MOOD_LABELS``, an emotion dict or its JSON.
+
+        Raises ``ValueError`` for anything else, including levels that are not
+        finite numbers between 0 and 100.
+        """
+        if isinstance(value, Mood):
+            return value
+        if isinstance(value, str):
+            label = MOOD_LABELS.get(value.strip().lower())
+            if label is not None:
+                return label
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                raise ValueError(f"mood must be one of {sorted(MOOD_LABELS)} or a JSON object of {list(EMOTIONS)}")
+        if not isinstance(value, dict) or not all(name in value for name in EMOTIONS):
+            raise ValueError(f"mood must have every emotion: {list(EMOTIONS)}")
+        levels = []
+        for name in EMOTIONS:
+            level = value[name]
+            if isinstance(level, bool) or not isinstance(level, (int, float)):
+                raise ValueError(f"mood.{name} must be a number")
+            # Also rejects NaN, infinities and integers too large for a float.
+            if not 0 <= level <= 100:
+                raise ValueError(f"mood.{name} must be between 0 and 100")
+            levels.append(int(level))
+        return cls(*levels)
+
+    @classmethod
+    def parse(cls, value) -> "Mood":
+        """Like ``validate``, but anything invalid (legacy rows, old snapshots) is the default mood."""
+        try:
+            return cls.validate(value)
+        except ValueError:
+            return cls()
+
+    def as_tuple(self) -> tuple[int, int, int, int, int]:
+        return (self.joy, self.anger, self.sadness, self.fear, self.neutral)
+
+    def to_dict(self) -> dict[str, int]:
+        return dict(zip(EMOTIONS, self.as_tuple()))
+
+    def to_json(self) -> str:
+        return _JSON_TEMPLATE % self.as_tuple()
+
+    def dominant(self) -> str:
+        values = self.as_tuple()
+        return EMOTIONS[values.index(max(values))]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Mood) and self.as_tuple() == other.as_tuple()
+
+    def __hash__(self) -> int:
+        return hash(self.as_tuple())
+
+    def __repr__(self) -> str:
+        return f"Mood({', '.join(f'{name}={value}' for name, value in self.to_dict().items())})"
+
+
+# Named moods accepted wherever a mood is written, e.g. by the agent and mob presets.
+MOOD_LABELS = {
+    "neutral": Mood(),
+    "calm": Mood(joy=25, anger=0, sadness=5, fear=0, neutral=70),
+    "focused": Mood(joy=20, anger=5, sadness=0, fear=5, neutral=70),
+    "cheerful": Mood(joy=60, anger=0, sadness=0, fear=5, neutral=35),
+    "happy": Mood(joy=70, anger=0, sadness=0, fear=0, neutral=30),
+}
+
+
+def mood_json(value) -> str:
+    """Field validator body: any accepted mood as its JSON, ``ValueError`` (a 422) otherwise."""
+    return Mood.validate(value).to_json()
 
 
 class MoodUpdate(BaseModel):
     mood: str
+
+    @field_validator("mood", mode="before")
+    @classmethod
+    def _mood_to_json(cls, value):
+        return mood_json(value)
@@ -31,3 +31,19 @@ class RelationshipGraphEdge(BaseModel):
 class RelationshipGraph(BaseModel):
     nodes: list[RelationshipGraphNode]
     edges: list[RelationshipGraphEdge]
+
+
+class RelationshipAgentStats(BaseModel):
+    agent_id: int
+    name: str
+    out_degree: int
+    in_degree: int
+    mean_sympathy_out: float | None = None
+    mean_sympathy_in: float | None = None
+    friends: int
+    enemies: int
+
+
+class RelationshipCluster(BaseModel):
+    agent_ids: list[int]
+    size: int
@@ -1,7 +1,7 @@
-﻿import random
+﻿import asyncio
 from typing import Annotated, Literal
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from ... import models
@@ -18,7 +18,9 @@ from ...database.crud_environment import get_environment
 from ...database.crud_events import create_event
 from ...database.crud_relationships import get_agent_relationships as get_rels
 from ...llm.config import get_llm
+from ...llm.scheduler import BACKGROUND, llm_priority
 from ...websocket.agents_hub import agents_hub
+from ...world.rng import get_rng
 
 
 router = APIRouter(prefix="/agents", tags=["agents"])
@@ -107,8 +109,14 @@ def _build_world_notice_reaction(db: DBSession, subject_name: str, action: str):
 
 
 @router.get("")
-def list_agents(db: DBSession, skip: int = 0, limit: int = 100):
-    agents = get_agents(db, skip=skip, limit=limit)
+def list_agents(
+    db: DBSession,
+    skip: int = 0,
+    limit: int = 100,
+    emotion: Literal["joy", "anger", "sadness", "fear", "neutral"] | None = None,
+    min_emotion: int = Query(0, ge=0, le=100),
+):
+    agents = get_agents(db, skip=skip, limit=limit, emotion=emotion, min_emotion=min_emotion)
     return [models.AgentResponse.from_agent(a) for a in agents]
 
 
@@ -205,13 +213,15 @@ async def _mob_appearance_reaction(mob_agent):
             return
 
         llm = get_llm()
-        watcher = random.choice(real_agents)
+        rng = get_rng("social")
+        watcher = rng.choice(real_agents)
         prompt = (
             f"Ты {watcher.name}. {watcher.personality}\n"
             f"В мире появилось животное: {mob_agent.name} ({mob_agent.personality}).\n"
             "Скажи одну короткую живую реплику по-русски, без шаблонных приветствий."
         )
-        thought = llm.invoke(prompt).content.strip().replace("**", "").replace("*", "")
+        with llm_priority(BACKGROUND):
+            thought = (await asyncio.to_thread(llm.invoke, prompt)).content.strip().replace("**", "").replace("*", "")
         if not thought or thought.startswith("[GenAPI error"):
             thought = f"Смотри, {mob_agent.name} появился рядом."
         if ":" in thought[:30]:
@@ -222,7 +232,7 @@ async def _mob_appearance_reaction(mob_agent):
         await agents_hub.send_agent_thought(watcher.id, thought)
 
         if len(real_agents) >= 2:
-            a1, a2 = random.sample(real_agents, 2)
+            a1, a2 = rng.sample(real_agents, 2)
             dialog_prompt = (
                 f"Два агента обсуждают новое животное в городе.\n"
                 f"Животное: {mob_agent.name} ({mob_agent.personality}).\n"
@@ -230,7 +240,8 @@ async def _mob_appearance_reaction(mob_agent):
                 f"Агент 2: {a2.name} - {a2.personality}\n"
                 "Верни ровно две короткие реплики на русском, по одной на каждого, без шаблонных приветствий."
             )
-            text = llm.invoke(dialog_prompt).content.strip().replace("**", "").replace("*", "")
+            with llm_priority(BACKGROUND):
+                text = (await asyncio.to_thread(llm.invoke, dialog_prompt)).content.strip().replace("**", "").replace("*", "")
             lines = [line.strip() for line in text.splitlines() if line.strip()]
             if len(lines) < 2:
                 lines = [
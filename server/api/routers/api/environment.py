@@ -10,7 +10,7 @@ from ...database.crud_environment import (
     update_weather as crud_update_weather,
 )
 from ...database.crud_events import create_event
-from ...llm.agent_ai import persist_agent_memory
+from ...llm.agent_ai import persist_world_memory
 from ...llm.simulation import get_simulation
 from ...models import EnvironmentEventCreate, TimeSpeedUpdate, WeatherUpdate
 from ...websocket.agents_hub import agents_hub
@@ -42,17 +42,11 @@ def _apply_weather_reactions(db: Session, weather: str):
     db.commit()
 
 
-def _remember_world_event_for_agents(db: Session, text: str):
-    agents = [
-        a
-        for a in get_agents(db, skip=0, limit=1000)
-        if (getattr(a, "type", "agent") or "agent") == "agent"
-    ]
-    for agent in agents:
-        try:
-            persist_agent_memory(db, agent.id, text, memory_type="world")
-        except Exception:
-            continue
+def _remember_world_event_for_agents(text: str):
+    try:
+        persist_world_memory(text)
+    except Exception as e:
+        print(f"[Environment] Failed to store world memory: {e}")
 
 
 @router.patch("/weather", response_model=models.EnvironmentResponse)
@@ -65,7 +59,7 @@ def update_weather(
     env = crud_update_weather(db, weather.weather)
     change_text = f"Начался новый этап дня: погода изменилась с {previous} на {env.weather}."
     create_event(db, models.EventCreate(content=change_text))
-    _remember_world_event_for_agents(db, change_text)
+    _remember_world_event_for_agents(change_text)
     _apply_weather_reactions(db, env.weather)
     background_tasks.add_task(agents_hub.send_agents_update)
     return models.EnvironmentResponse(weather=env.weather, speed=env.time_speed)
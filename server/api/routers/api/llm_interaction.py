@@ -1,4 +1,6 @@
-﻿from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+﻿import asyncio
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -7,6 +9,8 @@ from ...database import get_db
 from ...database.crud_agents import get_agent, get_agents
 from ...database.crud_events import create_event
 from ...llm.agent_ai import AgentBrain
+from ...llm.emotions import analyze_world_event
+from ...llm.scheduler import INTERACTIVE, llm_priority
 from ...websocket.agents_hub import agents_hub
 from ... import models
 
@@ -50,7 +54,8 @@ async def generate_plan(
         raise HTTPException(status_code=404, detail="Agent not found")
 
     brain = AgentBrain(agent_id, db)
-    result = brain.generate_plan()
+    with llm_priority(INTERACTIVE):
+        result = await asyncio.to_thread(brain.generate_plan)
 
     background_tasks.add_task(
         agents_hub.send_agent_mood_changed, agent_id, agent.mood
@@ -77,7 +82,8 @@ async def send_message(
         raise HTTPException(status_code=404, detail="Target agent not found")
 
     brain = AgentBrain(request.to_agent_id, db)
-    result = brain.respond_to_message(agent_id, request.message)
+    with llm_priority(INTERACTIVE):
+        result = await asyncio.to_thread(brain.respond_to_message, agent_id, request.message)
 
     db.refresh(agent)
     db.refresh(to_agent)
@@ -105,7 +111,8 @@ async def react_to_event(
         raise HTTPException(status_code=404, detail="Agent not found")
 
     brain = AgentBrain(agent_id, db)
-    result = brain.react_to_event(request.event)
+    with llm_priority(INTERACTIVE):
+        result = await asyncio.to_thread(brain.react_to_event, request.event)
 
     db.refresh(agent)
     background_tasks.add_task(
@@ -133,7 +140,8 @@ async def start_chat(
         raise HTTPException(status_code=404, detail="Target agent not found")
 
     brain = AgentBrain(agent_id, db)
-    result = brain.start_chat(request.target_agent_id, request.topic)
+    with llm_priority(INTERACTIVE):
+        result = await asyncio.to_thread(brain.start_chat, request.target_agent_id, request.topic)
 
     db.refresh(agent)
     db.refresh(target)
@@ -159,7 +167,8 @@ async def summarize_agent_memories(
         raise HTTPException(status_code=404, detail="Agent not found")
 
     brain = AgentBrain(agent_id, db)
-    result = brain.summarize_memories()
+    with llm_priority(INTERACTIVE):
+        result = await asyncio.to_thread(brain.summarize_memories)
 
     return result
 
@@ -179,7 +188,8 @@ async def world_tick(
     for agent in agents:
         try:
             brain = AgentBrain(agent.id, db)
-            plan = brain.generate_plan()
+            with llm_priority(INTERACTIVE):
+                plan = await asyncio.to_thread(brain.generate_plan)
             results.append(plan)
         except Exception as e:
             results.append({
@@ -199,18 +209,28 @@ async def world_event(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
-    """Broadcast a world event to all agents. Each agent reacts individually."""
+    """Broadcast a world event to all agents. Moods are scored in one batched call, reactions per agent."""
     agents = get_agents(db)
     if not agents:
         return {"reactions": [], "message": "No agents in the world"}
 
     create_event(db, models.EventCreate(content=request.event))
 
+    try:
+        with llm_priority(INTERACTIVE):
+            moods = await asyncio.to_thread(
+                analyze_world_event, request.event, [(a.name, a.personality, a.mood) for a in agents]
+            )
+    except Exception as e:
+        # The event is already stored; each agent then scores its own mood below.
+        print(f"[LLM] World event analysis failed: {e}")
+        moods = [None] * len(agents)
     reactions = []
-    for agent in agents:
+    for agent, mood in zip(agents, moods):
         try:
             brain = AgentBrain(agent.id, db)
-            reaction = brain.react_to_event(request.event)
+            with llm_priority(INTERACTIVE):
+                reaction = await asyncio.to_thread(brain.react_to_event, request.event, mood)
             reactions.append(reaction)
         except Exception as e:
             reactions.append({
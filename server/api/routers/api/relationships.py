@@ -1,13 +1,16 @@
-﻿from fastapi import APIRouter, Depends, HTTPException
+﻿from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from ...database import get_db
 from ...database.crud_agents import get_agent
 from ...database.crud_relationships import (
     upsert_relationship,
-    get_relationship_graph,
     get_agent_relationships,
 )
+from ...database.relationship_analytics import get_relationship_analytics
+from ...database.relationship_graph import get_relationship_graph_cache
 from ... import models
 
 router = APIRouter(prefix="/relationships", tags=["relationships"])
@@ -18,9 +21,44 @@ def create_or_update_relationship(rel: models.RelationshipCreate, db: Session =
     return upsert_relationship(db, rel)
 
 
-@router.get("", response_model=models.RelationshipGraph)
-def get_all_relationships(db: Session = Depends(get_db)):
-    return get_relationship_graph(db)
+@router.get("", response_model=models.RelationshipGraph, responses={304: {"description": "Graph unchanged"}})
+def get_all_relationships(request: Request, response: Response, db: Session = Depends(get_db)):
+    version, graph = get_relationship_graph_cache().graph(db)
+    return _with_etag(request, response, version, graph)
+
+
+def _with_etag(request: Request, response: Response, version: int, body):
+    etag = get_relationship_graph_cache().etag(version)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return body
+
+
+@router.get("/stats", response_model=list[models.RelationshipAgentStats], responses={304: {"description": "Graph unchanged"}})
+def get_relationship_stats(request: Request, response: Response, db: Session = Depends(get_db)):
+    version, stats = get_relationship_analytics().stats(db)
+    return _with_etag(request, response, version, stats)
+
+
+@router.get("/clusters", response_model=list[models.RelationshipCluster], responses={304: {"description": "Graph unchanged"}})
+def get_relationship_clusters(
+    request: Request,
+    response: Response,
+    kind: Literal["friends", "enemies"] = "friends",
+    db: Session = Depends(get_db),
+):
+    version, clusters = get_relationship_analytics().clusters(db, kind)
+    return _with_etag(request, response, version, clusters)
+
+
+@router.get("/bonds", response_model=list[models.RelationshipGraphEdge])
+def get_relationship_bonds(
+    kind: Literal["friends", "enemies"] = "friends",
+    limit: int = Query(10, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    return get_relationship_analytics().bonds(db, limit, kind)[1]
 
 
 @router.get("/agents/{agent_id}", response_model=list[models.RelationshipResponse])
@@ -30,3 +68,11 @@ def get_agent_relationships_by_id(agent_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Agent not found")
     relationships = get_agent_relationships(db, agent_id)
     return [models.RelationshipResponse.model_validate(r) for r in relationships]
+
+
+@router.get("/agents/{agent_id}/stats", response_model=models.RelationshipAgentStats)
+def get_agent_relationship_stats(agent_id: int, db: Session = Depends(get_db)):
+    stats = get_relationship_analytics().agent_stats(db, agent_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return stats
@@ -1,10 +1,12 @@
-﻿from fastapi import APIRouter, Depends
+﻿from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from ...database import get_db
 from ...database.crud_environment import get_or_create_environment, update_time_speed as crud_update_time_speed
 from ...llm.simulation import get_simulation
+from ...metrics import get_metrics
 
 router = APIRouter(prefix="/simulation", tags=["simulation"])
 
@@ -42,6 +44,16 @@ def simulation_status():
     }
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def simulation_metrics():
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/metrics/ticks")
+def simulation_tick_metrics(limit: int = Query(default=50, ge=1, le=1000)):
+    return {"ticks": get_simulation().tick_history(limit)}
+
+
 @router.post("/speed")
 def set_simulation_speed(request: SpeedRequest, db: Session = Depends(get_db)):
     env = crud_update_time_speed(db, request.speed)
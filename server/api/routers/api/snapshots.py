@@ -0,0 +1,56 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from ...llm.simulation import get_simulation
+from ...websocket.agents_hub import agents_hub
+from ...world.snapshot import (
+    SnapshotError,
+    list_snapshots,
+    restore_snapshot,
+    save_snapshot,
+    snapshot_path,
+)
+
+router = APIRouter(prefix="/snapshots", tags=["snapshots"])
+
+
+class SnapshotRequest(BaseModel):
+    name: Optional[str] = None
+
+
+@router.get("")
+def get_snapshots():
+    return list_snapshots()
+
+
+@router.post("")
+async def create_snapshot(request: SnapshotRequest):
+    name = request.name or datetime.utcnow().strftime("world-%Y%m%dT%H%M%S")
+    return await asyncio.to_thread(save_snapshot, snapshot_path(name))
+
+
+@router.post("/{name}/restore")
+async def restore_world_snapshot(name: str):
+    path = snapshot_path(name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+    sim = get_simulation()
+    was_running = sim.is_running
+    if was_running:
+        await sim.stop()
+    try:
+        result = await asyncio.to_thread(restore_snapshot, path)
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if was_running:
+            await sim.start()
+
+    await agents_hub.send_agents_update()
+    return result
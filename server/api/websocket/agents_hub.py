@@ -1,12 +1,21 @@
 ﻿from __future__ import annotations
 
 import json
+import time
 from typing import Any, Set
 
 from fastapi import WebSocket
 from .. import models
 from ..database.database import SessionLocal
 from ..database.crud_agents import get_agents
+from ..metrics import get_metrics
+
+
+WS_FANOUT_SECONDS = get_metrics().histogram(
+    "vworld_ws_fanout_seconds",
+    "Time to serialize and send one websocket broadcast to all clients.",
+    labels=("channel",),
+)
 
 
 class AgentsHub:
@@ -24,6 +33,7 @@ class AgentsHub:
         if not self.active_connections:
             return
 
+        started = time.perf_counter()
         payload = json.dumps({"type": event_type, "data": data}, default=str)
         disconnected: list[WebSocket] = []
         for ws in self.active_connections:
@@ -34,8 +44,12 @@ class AgentsHub:
 
         for ws in disconnected:
             self.disconnect(ws)
+        WS_FANOUT_SECONDS.observe(time.perf_counter() - started, channel="agents")
 
     async def send_agents_update(self) -> None:
+        if not self.active_connections:
+            return
+
         db = SessionLocal()
         try:
             agents = get_agents(db, skip=0, limit=1000)
@@ -55,8 +69,8 @@ class AgentsHub:
     async def send_agent_deleted(self, agent_id: int) -> None:
         await self.broadcast("agent_deleted", {"agentId": agent_id})
 
-    async def send_agent_mood_changed(self, agent_id: int, mood: str) -> None:
-        await self.broadcast("agent_mood_changed", {"agentId": agent_id, "mood": mood})
+    async def send_agent_mood_changed(self, agent_id: int, mood: models.Mood) -> None:
+        await self.broadcast("agent_mood_changed", {"agentId": agent_id, "mood": mood.to_json()})
 
     async def send_agent_moved(self, agent_id: int, x: float, y: float) -> None:
         await self.broadcast("agent_moved", {"agentId": agent_id, "x": x, "y": y})
@@ -75,6 +89,27 @@ class AgentsHub:
             "messages": messages,
         })
 
+    async def send_agent_dialogue_delta(
+        self,
+        conversation_id: str,
+        turn: int,
+        agent_id: int, name: str,
+        partner_id: int,
+        delta: str,
+        text: str,
+        done: bool,
+    ) -> None:
+        await self.broadcast("agent_dialogue_delta", {
+            "conversationId": conversation_id,
+            "turn": turn,
+            "agentId": agent_id,
+            "name": name,
+            "partnerId": partner_id,
+            "delta": delta,
+            "text": text,
+            "done": done,
+        })
+
     async def send_agent_thought(self, agent_id: int, thought: str) -> None:
         await self.broadcast("agent_thought", {"agentId": agent_id, "thought": thought})
 
@@ -1,8 +1,8 @@
 ﻿from fastapi import WebSocket
 from typing import Dict, Set
 import json
-import random
 import math
+import time
 from sqlalchemy.orm import Session
 
 from api.database import get_db
@@ -12,6 +12,8 @@ from api.database.crud_points import (
     update_point_position,
     update_point_target
 )
+from api.websocket.agents_hub import WS_FANOUT_SECONDS
+from api.world.rng import get_rng
 
 POINT_DEFAULT_SPEED = 1.5
 
@@ -59,7 +61,7 @@ class ConnectionManager:
         self.point_counter += 1
         
         radius = 30
-        angle = random.uniform(0, 2 * math.pi)
+        angle = get_rng("movement").uniform(0, 2 * math.pi)
         target_x = x + radius * math.cos(angle)
         target_y = y + radius * math.sin(angle)
         
@@ -112,10 +114,21 @@ class ConnectionManager:
         finally:
             db.close()
 
+    def export_state(self) -> dict:
+        return {
+            "point_counter": self.point_counter,
+            "points": [dict(p) for p in self.points.values()],
+        }
+
+    def import_state(self, state: dict):
+        self.points = {p["id"]: dict(p) for p in state.get("points", [])}
+        self.point_counter = int(state.get("point_counter", self.point_counter))
+
     async def broadcast_points(self):
         if not self.active_connections:
             return
         
+        started = time.perf_counter()
         points_for_client = [
             {"id": p["id"], "x": p["x"], "y": p["y"]}
             for p in self.points.values()
@@ -134,3 +147,4 @@ class ConnectionManager:
         
         for conn in disconnected:
             self.disconnect(conn)
+        WS_FANOUT_SECONDS.observe(time.perf_counter() - started, channel="points")
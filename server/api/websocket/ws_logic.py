@@ -1,13 +1,13 @@
 ﻿import asyncio
 import math
 import os
-import random
 
 from sqlalchemy.orm import Session
 
 from api.database import get_db
 from api.database.crud_agents import get_agents
 from api.database.crud_points import update_point_position
+from api.world.rng import get_rng
 
 
 _point_to_agent: dict[str, int] = {}
@@ -32,15 +32,16 @@ def _clamp_to_zone(x: float, y: float) -> tuple[float, float]:
 
 
 def _random_target_in_zone(x: float, y: float, radius: float) -> tuple[float, float]:
+    rng = get_rng("movement")
     for _ in range(16):
-        angle = random.uniform(0, 2 * math.pi)
+        angle = rng.uniform(0, 2 * math.pi)
         tx = x + radius * math.cos(angle)
         ty = y + radius * math.sin(angle)
         for x1, y1, x2, y2 in ROAD_ZONES:
             if x1 <= tx <= x2 and y1 <= ty <= y2:
                 return tx, ty
-    return _clamp_to_zone(x + radius * math.cos(random.uniform(0, 2 * math.pi)),
-                          y + radius * math.sin(random.uniform(0, 2 * math.pi)))
+    return _clamp_to_zone(x + radius * math.cos(rng.uniform(0, 2 * math.pi)),
+                          y + radius * math.sin(rng.uniform(0, 2 * math.pi)))
 
 
 def steer_agent_to_zone(manager, point_id: str, zone_name: str) -> bool:
@@ -48,8 +49,9 @@ def steer_agent_to_zone(manager, point_id: str, zone_name: str) -> bool:
     zone = get_zone_by_name(zone_name)
     if zone is None or point_id not in manager.points:
         return False
-    tx = random.uniform(zone.x1 + 1, zone.x2 - 1)
-    ty = random.uniform(zone.y1 + 1, zone.y2 - 1)
+    rng = get_rng("movement")
+    tx = rng.uniform(zone.x1 + 1, zone.x2 - 1)
+    ty = rng.uniform(zone.y1 + 1, zone.y2 - 1)
     manager.points[point_id]["target_x"] = tx
     manager.points[point_id]["target_y"] = ty
     return True
@@ -61,43 +63,70 @@ def _refresh_point_agent_map(db: Session):
     _point_to_agent = {a.point_id: a.id for a in agents if a.point_id}
 
 
-def update_points(manager):
+def step_points(manager) -> set[str]:
+    """Advance every point by one movement step and return ids whose stored state is stale."""
+    changed: set[str] = set()
+    for point_id, point in list(manager.points.items()):
+        old_x = point["x"]
+        old_y = point["y"]
+
+        dx = point["target_x"] - point["x"]
+        dy = point["target_y"] - point["y"]
+        distance = math.sqrt(dx * dx + dy * dy)
+
+        target_changed = False
+        if distance > 0.5:
+            move_distance = min(point["speed"] * manager.time_speed, distance)
+            point["x"] += (dx / distance) * move_distance
+            point["y"] += (dy / distance) * move_distance
+        else:
+            radius = 2.8 if point_id.startswith("agent_point_") else 4.2
+            old_target_x = point["target_x"]
+            old_target_y = point["target_y"]
+            point["target_x"], point["target_y"] = _random_target_in_zone(point["x"], point["y"], radius)
+            target_changed = (point["target_x"] != old_target_x or point["target_y"] != old_target_y)
+
+        position_changed = abs(point["x"] - old_x) > 0.1 or abs(point["y"] - old_y) > 0.1
+        if position_changed or target_changed:
+            changed.add(point_id)
+    return changed
+
+
+def persist_points(manager, point_ids):
+    if not point_ids:
+        return
     db = next(get_db())
     try:
-        for point_id, point in list(manager.points.items()):
-            old_x = point["x"]
-            old_y = point["y"]
-
-            dx = point["target_x"] - point["x"]
-            dy = point["target_y"] - point["y"]
-            distance = math.sqrt(dx * dx + dy * dy)
-
-            target_changed = False
-            if distance > 0.5:
-                move_distance = min(point["speed"] * manager.time_speed, distance)
-                point["x"] += (dx / distance) * move_distance
-                point["y"] += (dy / distance) * move_distance
-            else:
-                radius = 2.8 if point_id.startswith("agent_point_") else 4.2
-                old_target_x = point["target_x"]
-                old_target_y = point["target_y"]
-                point["target_x"], point["target_y"] = _random_target_in_zone(point["x"], point["y"], radius)
-                target_changed = (point["target_x"] != old_target_x or point["target_y"] != old_target_y)
-
-            position_changed = abs(point["x"] - old_x) > 0.1 or abs(point["y"] - old_y) > 0.1
-            if position_changed or target_changed:
-                update_point_position(
-                    db,
-                    point_id,
-                    point["x"],
-                    point["y"],
-                    point["target_x"],
-                    point["target_y"],
-                )
+        for point_id in point_ids:
+            point = manager.points.get(point_id)
+            if point is None:
+                continue
+            update_point_position(
+                db,
+                point_id,
+                point["x"],
+                point["y"],
+                point["target_x"],
+                point["target_y"],
+            )
     finally:
         db.close()
 
 
+def update_points(manager):
+    persist_points(manager, step_points(manager))
+
+
+def advance_points(manager, dt: float) -> int:
+    """Run ``dt`` seconds of movement in fixed steps and persist the result once."""
+    steps = max(1, round(dt / POINTS_TICK_SECONDS))
+    changed: set[str] = set()
+    for _ in range(steps):
+        changed |= step_points(manager)
+    persist_points(manager, changed)
+    return steps
+
+
 async def points_update_task(manager):
     global _broadcast_counter
 
@@ -0,0 +1 @@
+"""World lifecycle services: retention, startup and persistence."""
@@ -0,0 +1,218 @@
+import asyncio
+import base64
+import gzip
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from ..database.database import engine
+from ..llm import memory_store
+
+
+RETENTION_ENABLED = os.getenv("VWORLD_RETENTION_ENABLED", "1") not in {"0", "false", "False"}
+RETENTION_INTERVAL_SECONDS = float(os.getenv("VWORLD_RETENTION_INTERVAL_SECONDS", "600"))
+RETENTION_BATCH_SIZE = int(os.getenv("VWORLD_RETENTION_BATCH_SIZE", "500"))
+RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("VWORLD_RETENTION_BATCH_PAUSE_SECONDS", "0.05"))
+ARCHIVE_DIR = os.getenv(
+    "VWORLD_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "archive"),
+)
+
+
+def _limit(name: str, default: str) -> int | None:
+    value = int(os.getenv(name, default))
+    return value if value > 0 else None
+
+
+def _age(name: str, default: str) -> float | None:
+    value = float(os.getenv(name, default))
+    return value if value > 0 else None
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limits for one table. ``None`` disables the corresponding rule.
+
+    Rows older than ``max_age_days`` or beyond the newest ``max_rows`` are
+    archived and deleted, except each agent's newest ``keep_last_per_agent``.
+    """
+
+    table: str
+    max_rows: int | None = None
+    max_age_days: float | None = None
+    keep_last_per_agent: int | None = None
+
+
+@dataclass(frozen=True)
+class _TableSpec:
+    database: str
+    agent_column: str | None = None
+    protected: str | None = None
+
+
+_TABLES: dict[str, _TableSpec] = {
+    "events": _TableSpec(database="main"),
+    "memories": _TableSpec(database="main", agent_column="agent_id"),
+    "vector_memories": _TableSpec(
+        database="vector",
+        agent_column="agent_id",
+        protected="memory_type LIKE 'summary%'",
+    ),
+}
+
+
+def default_policies() -> list[RetentionPolicy]:
+    return [
+        RetentionPolicy(
+            table="events",
+            max_rows=_limit("VWORLD_RETENTION_EVENTS_MAX_ROWS", "5000"),
+            max_age_days=_age("VWORLD_RETENTION_EVENTS_MAX_AGE_DAYS", "14"),
+        ),
+        RetentionPolicy(
+            table="memories",
+            max_rows=_limit("VWORLD_RETENTION_MEMORIES_MAX_ROWS", "100000"),
+            max_age_days=_age("VWORLD_RETENTION_MEMORIES_MAX_AGE_DAYS", "30"),
+            keep_last_per_agent=_limit("VWORLD_RETENTION_MEMORIES_KEEP_LAST", "200"),
+        ),
+        RetentionPolicy(
+            table="vector_memories",
+            max_rows=_limit("VWORLD_RETENTION_VECTORS_MAX_ROWS", "100000"),
+            max_age_days=_age("VWORLD_RETENTION_VECTORS_MAX_AGE_DAYS", "30"),
+            keep_last_per_agent=_limit("VWORLD_RETENTION_VECTORS_KEEP_LAST", "200"),
+        ),
+    ]
+
+
+def _connect(database: str):
+    if database == "vector":
+        return sqlite3.connect(memory_store.DB_PATH, timeout=30)
+    return engine.raw_connection()
+
+
+def _candidate_ids(cur, policy: RetentionPolicy, spec: _TableSpec) -> list[int]:
+    if policy.max_rows is None and policy.max_age_days is None:
+        return []
+
+    ranks = ["ROW_NUMBER() OVER (ORDER BY id DESC) AS table_rank"]
+    if spec.agent_column:
+        ranks.append(f"ROW_NUMBER() OVER (PARTITION BY {spec.agent_column} ORDER BY id DESC) AS agent_rank")
+
+    expired: list[str] = []
+    params: list = []
+    if policy.max_age_days is not None:
+        cutoff = datetime.utcnow() - timedelta(days=policy.max_age_days)
+        expired.append("created_at < ?")
+        params.append(cutoff.strftime("%Y-%m-%d %H:%M:%S"))
+    if policy.max_rows is not None:
+        expired.append("table_rank > ?")
+        params.append(policy.max_rows)
+
+    where = [f"({' OR '.join(expired)})"]
+    if spec.agent_column and policy.keep_last_per_agent is not None:
+        where.append("agent_rank > ?")
+        params.append(policy.keep_last_per_agent)
+
+    inner_where = f"WHERE NOT ({spec.protected})" if spec.protected else ""
+    cur.execute(
+        f"SELECT id FROM ("
+        f"SELECT id, created_at, {', '.join(ranks)} FROM {policy.table} {inner_where}"
+        f") WHERE {' AND '.join(where)} ORDER BY id",
+        params,
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _encode_value(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+class RetentionService:
+    """Archives and deletes rows that fall outside the retention policies.
+
+    Work is done in small batches on a worker thread so the simulation keeps
+    getting the write lock between batches.
+    """
+
+    def __init__(self, policies: list[RetentionPolicy] | None = None):
+        self.policies = policies if policies is not None else default_policies()
+        self.batch_size = max(1, RETENTION_BATCH_SIZE)
+        self.archive_dir = ARCHIVE_DIR
+        self.last_report: dict[str, int] = {}
+        self.last_run_at: float | None = None
+
+    def run_once(self) -> dict[str, int]:
+        report = {}
+        for policy in self.policies:
+            spec = _TABLES.get(policy.table)
+            if spec is None:
+                continue
+            report[policy.table] = self._apply(policy, spec)
+        self.last_report = report
+        self.last_run_at = time.time()
+        return report
+
+    def _apply(self, policy: RetentionPolicy, spec: _TableSpec) -> int:
+        con = _connect(spec.database)
+        archive = None
+        removed = 0
+        touched_agents: set[int] = set()
+        try:
+            cur = con.cursor()
+            ids = _candidate_ids(cur, policy, spec)
+            for start in range(0, len(ids), self.batch_size):
+                batch = ids[start:start + self.batch_size]
+                placeholders = ",".join("?" * len(batch))
+                cur.execute(f"SELECT * FROM {policy.table} WHERE id IN ({placeholders})", batch)
+                columns = [c[0] for c in cur.description]
+                rows = cur.fetchall()
+                if archive is None:
+                    archive = self._open_archive(policy.table)
+                for row in rows:
+                    record = {col: _encode_value(val) for col, val in zip(columns, row)}
+                    if spec.agent_column:
+                        touched_agents.add(record[spec.agent_column])
+                    archive.write(json.dumps(record, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+                archive.flush()
+                cur.execute(f"DELETE FROM {policy.table} WHERE id IN ({placeholders})", batch)
+                con.commit()
+                removed += len(batch)
+                time.sleep(RETENTION_BATCH_PAUSE_SECONDS)
+        finally:
+            if archive is not None:
+                archive.close()
+            con.close()
+            if spec.database == "vector" and touched_agents:
+                memory_store.get_memory_store().forget_agents(touched_agents)
+        return removed
+
+    def _open_archive(self, table: str):
+        folder = os.path.join(self.archive_dir, table)
+        os.makedirs(folder, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        return gzip.open(os.path.join(folder, f"{table}-{stamp}.jsonl.gz"), "ab")
+
+
+_retention_service: RetentionService | None = None
+
+
+def get_retention_service() -> RetentionService:
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService()
+    return _retention_service
+
+
+async def retention_task(service: RetentionService):
+    while True:
+        try:
+            report = await asyncio.to_thread(service.run_once)
+            if any(report.values()):
+                print(f"[Retention] Archived rows: {report}")
+        except Exception as e:
+            print(f"[Retention] Error: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
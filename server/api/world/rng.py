@@ -0,0 +1,56 @@
+import hashlib
+import os
+import random
+
+
+STREAMS = ("movement", "social", "zone")
+
+
+def _env_seed() -> int | None:
+    value = os.getenv("VWORLD_SEED", "").strip()
+    return int(value) if value else None
+
+
+class WorldRng:
+    """Named random streams derived from one world seed.
+
+    Each stream is seeded independently from ``sha256(seed:name)``, so drawing
+    more numbers from one stream never shifts the sequence of another.
+    """
+
+    def __init__(self, seed: int | None = None):
+        self.reseed(seed)
+
+    def reseed(self, seed: int | None = None):
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 63)
+        self._streams: dict[str, random.Random] = {}
+
+    def stream(self, name: str) -> random.Random:
+        rng = self._streams.get(name)
+        if rng is None:
+            digest = hashlib.sha256(f"{self.seed}:{name}".encode("utf-8")).digest()
+            rng = self._streams[name] = random.Random(int.from_bytes(digest[:8], "big"))
+        return rng
+
+    def export_state(self) -> dict:
+        streams = {}
+        for name, rng in self._streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def import_state(self, state: dict):
+        self.reseed(state.get("seed"))
+        for name, (version, internal, gauss) in state.get("streams", {}).items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+
+_world_rng = WorldRng(_env_seed())
+
+
+def get_world_rng() -> WorldRng:
+    return _world_rng
+
+
+def get_rng(name: str) -> random.Random:
+    return _world_rng.stream(name)
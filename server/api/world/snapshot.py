@@ -0,0 +1,414 @@
+"""Single-file world snapshots.
+
+Layout: ``MAGIC`` + big-endian u16 format version, followed by a gzip stream of
+framed records (u8 kind, u32 length, payload). Relational rows are stored in
+column-major JSON chunks; vectors are stored as raw float32 matrices next to
+their row metadata. Both writing and reading stream chunk by chunk, so memory
+use is bounded by ``CHUNK_ROWS`` regardless of world size.
+
+CLI::
+
+    python -m api.world.snapshot save snapshots/world.vws
+    python -m api.world.snapshot restore snapshots/world.vws
+    python -m api.world.snapshot info snapshots/world.vws
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import struct
+import time
+from datetime import datetime
+
+import numpy as np
+
+from ..database.database import Base, engine
+from ..database.relationship_graph import get_relationship_graph_cache
+from ..llm import memory_store
+from .rng import get_world_rng
+
+
+MAGIC = b"VWSNAP"
+FORMAT_VERSION = 1
+CHUNK_ROWS = int(os.getenv("VWORLD_SNAPSHOT_CHUNK_ROWS", "2000"))
+SNAPSHOT_DIR = os.getenv(
+    "VWORLD_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "snapshots"),
+)
+
+_RECORD_END = 0
+_RECORD_META = 1
+_RECORD_ROWS = 2
+_RECORD_VECTORS = 3
+_RECORD_STATE = 4
+
+_FRAME = struct.Struct(">BI")
+_VERSION = struct.Struct(">H")
+_JSON_LEN = struct.Struct(">I")
+
+VECTOR_TABLE = "vector_memories"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _main_tables() -> list[str]:
+    from ..database import models  # noqa: F401
+
+    return [table.name for table in Base.metadata.sorted_tables]
+
+
+def _connect(database: str):
+    if database == "vector":
+        memory_store.get_memory_store().flush()
+        return sqlite3.connect(memory_store.DB_PATH, timeout=30)
+    return engine.raw_connection()
+
+
+class _Writer:
+    def __init__(self, fh):
+        fh.write(MAGIC + _VERSION.pack(FORMAT_VERSION))
+        self._stream = gzip.GzipFile(fileobj=fh, mode="wb", compresslevel=6)
+
+    def record(self, kind: int, payload: bytes):
+        self._stream.write(_FRAME.pack(kind, len(payload)))
+        self._stream.write(payload)
+
+    def json(self, kind: int, data):
+        self.record(kind, json.dumps(data, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def close(self):
+        self._stream.close()
+
+
+def _read_records(fh):
+    header = fh.read(len(MAGIC) + _VERSION.size)
+    if header[:len(MAGIC)] != MAGIC:
+        raise SnapshotError("Not a VWorld snapshot")
+    (version,) = _VERSION.unpack(header[len(MAGIC):])
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot format v{version} is newer than supported v{FORMAT_VERSION}")
+
+    stream = gzip.GzipFile(fileobj=fh, mode="rb")
+    while True:
+        frame = stream.read(_FRAME.size)
+        if len(frame) < _FRAME.size:
+            raise SnapshotError("Snapshot is truncated")
+        kind, length = _FRAME.unpack(frame)
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise SnapshotError("Snapshot is truncated")
+        yield kind, payload
+        if kind == _RECORD_END:
+            return
+
+
+def _columnar(columns: list[str], rows: list[tuple]) -> dict:
+    return {col: [row[i] for row in rows] for i, col in enumerate(columns)}
+
+
+def _write_table(writer: _Writer, cur, table: str) -> int:
+    cur.execute(f"SELECT * FROM {table}")
+    columns = [c[0] for c in cur.description]
+    total = 0
+    while True:
+        rows = cur.fetchmany(CHUNK_ROWS)
+        if not rows:
+            return total
+        writer.json(_RECORD_ROWS, {"table": table, "columns": _columnar(columns, rows)})
+        total += len(rows)
+
+
+def _flush_vectors(writer: _Writer, meta: list[tuple], vectors: list[np.ndarray]):
+    dim = vectors[0].shape[0] if vectors else 0
+    header = json.dumps(
+        {
+            "table": VECTOR_TABLE,
+            "dim": dim,
+            "columns": _columnar(["id", "agent_id", "text", "memory_type", "created_at", "extra"], meta),
+        },
+        ensure_ascii=False,
+        default=str,
+    ).encode("utf-8")
+    matrix = np.stack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+    writer.record(_RECORD_VECTORS, _JSON_LEN.pack(len(header)) + header + matrix.tobytes())
+
+
+def _write_vectors(writer: _Writer, cur) -> int:
+    cur.execute(f"SELECT * FROM {VECTOR_TABLE}")
+    columns = [c[0] for c in cur.description]
+    base = ("id", "agent_id", "text", "memory_type", "vector", "created_at")
+    extra_columns = [c for c in columns if c not in base]
+    pos = {c: i for i, c in enumerate(columns)}
+
+    total = 0
+    chunk_dim = 0
+    meta: list[tuple] = []
+    vectors: list[np.ndarray] = []
+    while True:
+        rows = cur.fetchmany(CHUNK_ROWS)
+        if not rows:
+            break
+        for row in rows:
+            blob = row[pos["vector"]]
+            vec = memory_store.decode_vector(blob) if blob is not None else None
+            row_dim = vec.shape[0] if vec is not None else 0
+            if meta and (row_dim != chunk_dim or len(meta) >= CHUNK_ROWS):
+                _flush_vectors(writer, meta, vectors)
+                meta, vectors = [], []
+            chunk_dim = row_dim
+            meta.append((
+                row[pos["id"]],
+                row[pos["agent_id"]],
+                row[pos["text"]],
+                row[pos["memory_type"]],
+                row[pos["created_at"]],
+                {c: row[pos[c]] for c in extra_columns},
+            ))
+            if vec is not None:
+                vectors.append(vec)
+            total += 1
+    if meta:
+        _flush_vectors(writer, meta, vectors)
+    return total
+
+
+def _runtime_state() -> dict:
+    from ..llm.simulation import get_simulation
+    from ..routers.ws.points import manager
+
+    return {
+        "simulation": get_simulation().export_state(),
+        "points": manager.export_state(),
+        "rng": get_world_rng().export_state(),
+    }
+
+
+def save_snapshot(path: str, include_runtime: bool = True) -> dict:
+    """Write the whole world to ``path``. Reads run inside one transaction per database."""
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tables = _main_tables()
+    counts: dict[str, int] = {}
+    tmp_path = path + ".tmp"
+
+    main = _connect("main")
+    vector = _connect("vector")
+    try:
+        main_cur = main.cursor()
+        vector_cur = vector.cursor()
+        main_cur.execute("BEGIN")
+        vector_cur.execute("BEGIN")
+        with open(tmp_path, "wb") as fh:
+            writer = _Writer(fh)
+            writer.json(_RECORD_META, {
+                "format_version": FORMAT_VERSION,
+                "created_at": datetime.utcnow().isoformat(),
+                "tables": tables,
+            })
+            for table in tables:
+                counts[table] = _write_table(writer, main_cur, table)
+            counts[VECTOR_TABLE] = _write_vectors(writer, vector_cur)
+            if include_runtime:
+                writer.json(_RECORD_STATE, _runtime_state())
+            writer.json(_RECORD_END, {"rows": counts})
+            writer.close()
+    finally:
+        main.rollback()
+        vector.rollback()
+        main.close()
+        vector.close()
+    os.replace(tmp_path, path)
+
+    return {
+        "path": path,
+        "size_bytes": os.path.getsize(path),
+        "rows": counts,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _table_columns(cur, table: str) -> set[str]:
+    cur.execute(f"PRAGMA table_info('{table}')")
+    return {row[1] for row in cur.fetchall()}
+
+
+def _split_legacy_mood(data: dict) -> dict:
+    """Older snapshots carry ``agents.mood`` as a JSON string instead of ``mood_*`` columns."""
+    from ..models.mood import EMOTIONS, Mood
+
+    moods = [Mood.parse(mood).as_tuple() for mood in data["mood"]]
+    return {**data, **{f"mood_{name}": [mood[i] for mood in moods] for i, name in enumerate(EMOTIONS)}}
+
+
+def _insert_columnar(cur, table: str, data: dict, allowed: set[str]):
+    if table == "agents" and "mood" in data and "mood_joy" not in data:
+        data = _split_legacy_mood(data)
+    columns = [c for c in data if c in allowed]
+    if not columns:
+        return 0
+    rows = list(zip(*(data[c] for c in columns)))
+    cur.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        rows,
+    )
+    return len(rows)
+
+
+def _insert_vectors(cur, payload: bytes, allowed: set[str]) -> int:
+    (header_len,) = _JSON_LEN.unpack_from(payload)
+    header = json.loads(payload[_JSON_LEN.size:_JSON_LEN.size + header_len].decode("utf-8"))
+    dim = header["dim"]
+    cols = header["columns"]
+    count = len(cols["id"])
+    matrix = None
+    if dim:
+        matrix = np.frombuffer(payload, dtype=np.float32, offset=_JSON_LEN.size + header_len).reshape(count, dim)
+
+    extra_columns = sorted({k for extra in cols["extra"] for k in extra} & allowed)
+    columns = ["id", "agent_id", "text", "memory_type", "created_at", "vector"] + extra_columns
+    rows = []
+    for i in range(count):
+        vector = memory_store.encode_vector(matrix[i]) if matrix is not None else None
+        extra = cols["extra"][i]
+        rows.append(
+            (cols["id"][i], cols["agent_id"][i], cols["text"][i], cols["memory_type"][i], cols["created_at"][i], vector)
+            + tuple(extra.get(c) for c in extra_columns)
+        )
+    cur.executemany(
+        f"INSERT INTO {VECTOR_TABLE} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        rows,
+    )
+    return count
+
+
+def restore_snapshot(path: str, include_runtime: bool = True) -> dict:
+    """Replace the world with the contents of ``path`` in one transaction per database."""
+    started = time.perf_counter()
+    counts: dict[str, int] = {}
+    state = None
+
+    main = _connect("main")
+    vector = _connect("vector")
+    try:
+        main_cur = main.cursor()
+        vector_cur = vector.cursor()
+        main_cur.execute("BEGIN")
+        vector_cur.execute("BEGIN")
+
+        current_tables = set(_main_tables())
+        columns_cache: dict[str, set[str]] = {}
+        with open(path, "rb") as fh:
+            for kind, payload in _read_records(fh):
+                if kind == _RECORD_META:
+                    meta = json.loads(payload.decode("utf-8"))
+                    for table in reversed(_main_tables()):
+                        main_cur.execute(f"DELETE FROM {table}")
+                    vector_cur.execute(f"DELETE FROM {VECTOR_TABLE}")
+                    counts = {table: 0 for table in meta.get("tables", [])}
+                    counts[VECTOR_TABLE] = 0
+                elif kind == _RECORD_ROWS:
+                    chunk = json.loads(payload.decode("utf-8"))
+                    table = chunk["table"]
+                    if table not in current_tables:
+                        continue
+                    if table not in columns_cache:
+                        columns_cache[table] = _table_columns(main_cur, table)
+                    counts[table] += _insert_columnar(main_cur, table, chunk["columns"], columns_cache[table])
+                elif kind == _RECORD_VECTORS:
+                    if VECTOR_TABLE not in columns_cache:
+                        columns_cache[VECTOR_TABLE] = _table_columns(vector_cur, VECTOR_TABLE)
+                    counts[VECTOR_TABLE] += _insert_vectors(vector_cur, payload, columns_cache[VECTOR_TABLE])
+                elif kind == _RECORD_STATE:
+                    state = json.loads(payload.decode("utf-8"))
+        main.commit()
+        vector.commit()
+    except Exception:
+        main.rollback()
+        vector.rollback()
+        raise
+    finally:
+        main.close()
+        vector.close()
+
+    _reset_runtime(state if include_runtime else None)
+    return {
+        "path": path,
+        "rows": counts,
+        "runtime_restored": bool(include_runtime and state),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _reset_runtime(state: dict | None):
+    from ..llm.simulation import get_simulation
+    from ..routers.ws.points import manager
+
+    memory_store.get_memory_store().invalidate()
+    get_relationship_graph_cache().invalidate()
+    if state and "points" in state:
+        manager.import_state(state["points"])
+    else:
+        manager.points.clear()
+        manager.reload_from_db()
+    if state and "simulation" in state:
+        get_simulation().import_state(state["simulation"])
+    if state and "rng" in state:
+        get_world_rng().import_state(state["rng"])
+
+
+def snapshot_info(path: str) -> dict:
+    info: dict = {"path": path, "size_bytes": os.path.getsize(path)}
+    with open(path, "rb") as fh:
+        for kind, payload in _read_records(fh):
+            if kind == _RECORD_META:
+                info.update(json.loads(payload.decode("utf-8")))
+            elif kind == _RECORD_END:
+                info.update(json.loads(payload.decode("utf-8")))
+    return info
+
+
+def list_snapshots() -> list[dict]:
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    items = []
+    for name in sorted(os.listdir(SNAPSHOT_DIR)):
+        if not name.endswith(".vws"):
+            continue
+        full = os.path.join(SNAPSHOT_DIR, name)
+        items.append({"name": name[:-4], "size_bytes": os.path.getsize(full), "modified_at": os.path.getmtime(full)})
+    return items
+
+
+def snapshot_path(name: str) -> str:
+    safe = os.path.basename(name)
+    if not safe.endswith(".vws"):
+        safe += ".vws"
+    return os.path.join(SNAPSHOT_DIR, safe)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m api.world.snapshot", description="VWorld snapshot tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command in ("save", "restore", "info"):
+        cmd = sub.add_parser(command)
+        cmd.add_argument("path")
+    args = parser.parse_args(argv)
+
+    from ..database import init_db
+
+    init_db()
+    if args.command == "save":
+        result = save_snapshot(args.path)
+    elif args.command == "restore":
+        result = restore_snapshot(args.path)
+    else:
+        result = snapshot_info(args.path)
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
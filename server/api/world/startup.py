@@ -0,0 +1,62 @@
+import os
+
+from ..database.database import SessionLocal
+from ..database.models import Memory, Event, Relationship, Agent
+from ..database.relationship_graph import get_relationship_graph_cache
+from ..llm import memory_store
+from ..llm.config import get_embedding_model, get_llm
+
+
+STARTUP_MODES = ("wipe", "keep", "restore")
+STARTUP_MODE = os.getenv("VWORLD_STARTUP_MODE", "keep").strip().lower()
+STARTUP_SNAPSHOT = os.getenv("VWORLD_STARTUP_SNAPSHOT", "")
+WARM_START = os.getenv("VWORLD_WARM_START", "1") not in {"0", "false", "False"}
+
+
+def wipe_world():
+    """Forget everything agents have lived through; agents and points are kept."""
+    db = SessionLocal()
+    try:
+        db.query(Memory).delete()
+        db.query(Event).delete()
+        db.query(Relationship).delete()
+        db.query(Agent).update({"current_plan": ""})
+        db.commit()
+    finally:
+        db.close()
+
+    get_relationship_graph_cache().invalidate()
+    memory_store.get_memory_store().clear()
+
+
+def restore_world(path: str):
+    from .snapshot import restore_snapshot
+
+    result = restore_snapshot(path)
+    print(f"[Startup] Restored snapshot {path} in {result['seconds']}s: {result['rows']}")
+
+
+def prepare_world(mode: str = STARTUP_MODE) -> str:
+    if mode not in STARTUP_MODES:
+        print(f"[Startup] Unknown VWORLD_STARTUP_MODE={mode!r}, keeping the world")
+        mode = "keep"
+    if mode == "restore" and not STARTUP_SNAPSHOT:
+        print("[Startup] VWORLD_STARTUP_SNAPSHOT is not set, keeping the world")
+        mode = "keep"
+
+    if mode == "wipe":
+        wipe_world()
+    elif mode == "restore":
+        restore_world(STARTUP_SNAPSHOT)
+    return mode
+
+
+def warm_start() -> int:
+    """Load models and the vector index up front so the first ticks run at steady-state latency."""
+    get_llm()
+    get_embedding_model()
+    return memory_store.get_memory_store().warm_up()
+
+
+def persist_caches():
+    memory_store.get_memory_store().save_index_cache()
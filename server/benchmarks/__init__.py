@@ -0,0 +1,7 @@
+"""Benchmarks for the server's hot paths.
+
+Run from ``server/``::
+
+    python -m benchmarks                      # run and compare with baseline.json
+    python -m benchmarks --update-baseline    # record a new baseline
+"""
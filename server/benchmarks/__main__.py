@@ -0,0 +1,74 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from .harness import compare, load_results, print_table, write_results
+from .world import WorldSize
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv: list[str] | None = None) -> int:
+    defaults = WorldSize()
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the server's hot paths")
+    parser.add_argument("--agents", type=int, default=defaults.agents)
+    parser.add_argument("--mobs", type=int, default=defaults.mobs)
+    parser.add_argument("--memories", type=int, default=defaults.memories_per_agent, help="vector memories per agent")
+    parser.add_argument("--relationships", type=int, default=defaults.relationships)
+    parser.add_argument("--clients", type=int, default=defaults.clients, help="websocket clients for fan-out")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown vs baseline (0.25 = +25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    size = WorldSize(
+        agents=args.agents,
+        mobs=args.mobs,
+        memories_per_agent=args.memories,
+        relationships=args.relationships,
+        clients=args.clients,
+    )
+    config = {**size.__dict__, "repeats": args.repeats, "seed": args.seed}
+
+    workdir = tempfile.mkdtemp(prefix="vworld-bench-")
+    os.environ["VWORLD_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'vworld.db')}"
+    os.environ["VWORLD_VECTOR_DB_PATH"] = os.path.join(workdir, "vector_memory.db")
+    os.environ["VWORLD_AUTO_START_SIMULATION"] = "0"
+
+    from . import hot_paths
+
+    try:
+        results = hot_paths.run(size, args.repeats, seed=args.seed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        write_results(args.output, config, results)
+    if args.update_baseline:
+        write_results(args.baseline, config, results)
+        print_table(results)
+        print(f"[Bench] Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_results(args.baseline)
+    print_table(results, baseline)
+    if baseline is None:
+        print(f"[Bench] No baseline at {args.baseline}; run with --update-baseline")
+        return 0
+    if baseline.get("config") != config:
+        print("[Bench] Warning: baseline was recorded with a different world size; ratios are not comparable")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for r in regressions:
+        print(f"[Bench] REGRESSION {r['name']}: {r['baseline_ms']:.3f} ms -> {r['median_ms']:.3f} ms (x{r['ratio']})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Recall and latency of the IVF memory index against exact search.
+
+    python -m benchmarks.ann --rows 100000 --dim 384 --nprobe 4,8,16
+
+Vectors are drawn from a Gaussian mixture so they cluster the way sentence
+embeddings do; queries are perturbed copies of stored rows.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from .harness import measure, print_table
+
+
+def _clustered(rng: np.random.Generator, rows: int, dim: int, clusters: int, spread: float) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    return centers[labels] + spread * rng.normal(size=(rows, dim)).astype(np.float32)
+
+
+def _top_k(index, query: np.ndarray, k: int, positions: np.ndarray | None = None) -> np.ndarray:
+    sims = index.similarities(query, positions)
+    top = min(k, sims.shape[0])
+    best = np.argpartition(-sims, top - 1)[:top]
+    return best if positions is None else positions[best]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ann", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=1000, help="mixture components in the synthetic data")
+    parser.add_argument("--spread", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="4,8,16")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from api.llm.ann_index import IVFIndex
+    from api.llm.memory_store import _AgentIndex
+
+    rng = np.random.default_rng(args.seed)
+    vectors = _clustered(rng, args.rows, args.dim, args.clusters, args.spread)
+    picks = rng.integers(0, args.rows, size=args.queries)
+    queries = vectors[picks] + args.spread * 0.5 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    index = _AgentIndex(args.dim)
+    started = time.perf_counter()
+    for i, vec in enumerate(vectors):
+        index.add(i, "", "episode", vec, 0.5, 0.0)
+    load_s = time.perf_counter() - started
+    started = time.perf_counter()
+    ann = IVFIndex.train(index.matrix(), seed=args.seed)
+    train_s = time.perf_counter() - started
+    print(f"[Bench] {args.rows} rows x {args.dim}: load {load_s:.2f}s, IVF train {train_s:.2f}s ({ann.nlist} lists)")
+
+    exact = [set(_top_k(index, q, args.k).tolist()) for q in queries]
+    cursor = iter(range(1 << 62))
+    results = [measure("exact", lambda: _top_k(index, queries[next(cursor) % args.queries], args.k), args.queries)]
+    recalls = {}
+    for nprobe in [int(n) for n in args.nprobe.split(",") if n]:
+        hits = 0
+        for q, truth in zip(queries, exact):
+            hits += len(truth & set(_top_k(index, q, args.k, ann.candidates(q, nprobe)).tolist()))
+        recalls[nprobe] = hits / (args.k * args.queries)
+        results.append(measure(
+            f"ivf nprobe={nprobe}",
+            lambda: _top_k(index, q := queries[next(cursor) % args.queries], args.k, ann.candidates(q, nprobe)),
+            args.queries,
+        ))
+
+    print_table(results)
+    for nprobe, recall in recalls.items():
+        print(f"[Bench] nprobe={nprobe}: recall@{args.k} {recall:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+import asyncio
+import inspect
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class Result:
+    name: str
+    repeats: int
+    median_ms: float
+    p95_ms: float
+    mean_ms: float
+    min_ms: float
+
+
+def measure(name: str, fn, repeats: int, warmup: int = 1) -> Result:
+    """Time ``fn`` ``repeats`` times; coroutine functions run on a private loop."""
+    loop = asyncio.new_event_loop() if inspect.iscoroutinefunction(fn) else None
+    call = (lambda: loop.run_until_complete(fn())) if loop else fn
+    try:
+        for _ in range(warmup):
+            call()
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        if loop:
+            loop.close()
+
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    return Result(
+        name=name,
+        repeats=repeats,
+        median_ms=round(statistics.median(samples), 4),
+        p95_ms=round(p95, 4),
+        mean_ms=round(statistics.fmean(samples), 4),
+        min_ms=round(samples[0], 4),
+    )
+
+
+def write_results(path: str, config: dict, results: list[Result]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "results": [asdict(r) for r in results]}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results: list[Result], baseline: dict, threshold: float, min_delta_ms: float = 0.0) -> list[dict]:
+    """Return benchmarks whose median is slower than baseline by more than ``threshold``.
+
+    Slowdowns smaller than ``min_delta_ms`` in absolute terms are treated as noise.
+    """
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get(result.name)
+        if not base or base["median_ms"] <= 0:
+            continue
+        ratio = result.median_ms / base["median_ms"]
+        if ratio > 1 + threshold and result.median_ms - base["median_ms"] >= min_delta_ms:
+            regressions.append({
+                "name": result.name,
+                "baseline_ms": base["median_ms"],
+                "median_ms": result.median_ms,
+                "ratio": round(ratio, 2),
+            })
+    return regressions
+
+
+def print_table(results: list[Result], baseline: dict | None = None):
+    previous = {r["name"]: r for r in (baseline or {}).get("results", [])}
+    print(f"{'benchmark':<34}{'median ms':>12}{'p95 ms':>12}{'baseline':>12}{'ratio':>8}")
+    for r in results:
+        base = previous.get(r.name)
+        base_ms = f"{base['median_ms']:.3f}" if base else "-"
+        ratio = f"{r.median_ms / base['median_ms']:.2f}" if base and base["median_ms"] > 0 else "-"
+        print(f"{r.name:<34}{r.median_ms:>12.3f}{r.p95_ms:>12.3f}{base_ms:>12}{ratio:>8}")
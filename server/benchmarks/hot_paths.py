@@ -0,0 +1,89 @@
+"""Hot paths of a running world: memory search and writes, movement, fan-out and a full tick."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .harness import measure
+from .world import WorldSize, build_world
+
+
+class _NullSocket:
+    """Websocket stand-in that accepts and drops every frame."""
+
+    async def send_text(self, payload: str):
+        pass
+
+
+def run(size: WorldSize, repeats: int, seed: int = 0) -> list:
+    from api.database.crud_relationships import get_relationship_graph
+    from api.database.database import SessionLocal
+    from api.headless import VirtualClock
+    from api.llm.config import get_embedding_model, set_llm
+    from api.llm.memory_store import get_memory_store
+    from api.llm.simulation import SimulationLoop
+    from api.llm.stub import StubLLM
+    from api.websocket.agents_hub import AgentsHub
+    from api.websocket.manager import ConnectionManager
+    from api.websocket.ws_logic import update_points
+    from api.world.rng import get_world_rng
+
+    get_world_rng().reseed(seed)
+    world = build_world(size, seed=seed)
+    set_llm(StubLLM())
+    store = get_memory_store()
+    embeddings = get_embedding_model()
+    agent_ids = world["agent_ids"]
+    queries = [embeddings.embed_query(f"погода парк встреча {i}") for i in range(len(agent_ids))]
+    store.warm_up()
+
+    results = []
+    cursor = iter(range(10 ** 9))
+
+    def search():
+        i = next(cursor) % len(agent_ids)
+        store.search(agent_ids[i], queries[i], k=5)
+
+    results.append(measure("vector_search", search, repeats * 10))
+
+    writers = ThreadPoolExecutor(max_workers=8)
+
+    def write_memories(worker: int):
+        for i in range(25):
+            agent_id = agent_ids[(worker * 25 + i) % len(agent_ids)]
+            store.add_memory(agent_id, f"bench memory {worker}-{i}", queries[i % len(queries)])
+
+    def parallel_writes():
+        list(writers.map(write_memories, range(8)))
+        store.flush()
+
+    results.append(measure("memory_writes_parallel", parallel_writes, repeats))
+    writers.shutdown()
+
+    points = ConnectionManager()
+    points.reload_from_db()
+    results.append(measure("update_points", lambda: update_points(points), repeats))
+
+    points.active_connections = {_NullSocket() for _ in range(size.clients)}
+    results.append(measure("broadcast_points", points.broadcast_points, repeats * 10))
+
+    hub = AgentsHub()
+    hub.active_connections = {_NullSocket() for _ in range(size.clients)}
+    results.append(measure("send_agents_update", hub.send_agents_update, repeats))
+
+    def relationship_graph():
+        db = SessionLocal()
+        try:
+            get_relationship_graph(db)
+        finally:
+            db.close()
+
+    results.append(measure("get_relationship_graph", relationship_graph, repeats))
+
+    clock = VirtualClock()
+    sim = SimulationLoop(clock=clock.time)
+
+    async def tick():
+        await sim._tick()
+        clock.advance(sim.tick_interval)
+
+    results.append(measure("simulation_tick", tick, repeats))
+    return results
@@ -0,0 +1,116 @@
+"""Per-message cost of the keyword heuristics behind every dialogue line.
+
+    python -m benchmarks.text_analysis --messages 2000
+
+Each message pays for what the heuristics run on a chat line: the
+blocked-marker filter, the incomplete-line check, sympathy and emotion cues, and
+plan zone cues. Three implementations are timed over the same keyword tables:
+
+- the previous per-function tuple scans, each function calling ``lower()`` itself;
+- one alternation regex per table, with a lookahead so overlapping keywords count;
+- the shared ``api.llm.text_analysis`` matchers.
+
+All three must agree on every message.
+"""
+
+import argparse
+import random
+import re
+
+from .harness import measure, print_table
+
+
+def _messages(rng: random.Random, count: int, cues: list[str]) -> list[str]:
+    from api.llm.stub import stub_completion
+
+    messages = []
+    for i in range(count):
+        words = stub_completion(f"prompt {i}").split()
+        for _ in range(rng.randint(0, 3)):
+            cue = rng.choice(cues)
+            words.insert(rng.randrange(len(words) + 1), cue.upper() if rng.random() < 0.2 else cue)
+        messages.append(" ".join(words))
+    return messages
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.text_analysis", description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from api.llm.text_analysis import (
+        BLOCKED_CHAT_MARKERS,
+        DANGLING_WORDS,
+        EMOTION_CUES,
+        SYMPATHY_CUES,
+        ZONE_CUES,
+        is_incomplete,
+        normalize,
+    )
+
+    tables = (EMOTION_CUES, SYMPATHY_CUES, ZONE_CUES)
+    blocked = BLOCKED_CHAT_MARKERS.keywords["blocked"]
+    cues = [k for m in (BLOCKED_CHAT_MARKERS, *tables) for keywords in m.keywords.values() for k in keywords]
+    messages = _messages(random.Random(args.seed), args.messages, cues)
+
+    def previous(text: str):
+        lowered = text.lower()
+        is_blocked = any(marker in lowered for marker in blocked)
+        stripped = text.strip().lower()
+        parts = stripped.replace("!", ".").replace("?", ".").split()
+        incomplete = (
+            stripped.endswith(",") or stripped.endswith(";") or stripped.endswith(":")
+            or not parts or len(parts) < 4 or parts[-1] in DANGLING_WORDS
+            or stripped.endswith("не.") or stripped.endswith("не!") or stripped.endswith("не?")
+        )
+        counts = []
+        for table in tables:
+            lower = text.lower()
+            counts.append({c: sum(1 for k in keywords if k in lower) for c, keywords in table.keywords.items()})
+        return is_blocked, incomplete, counts
+
+    def compile_table(table):
+        categories = {k: c for c, keywords in table.keywords.items() for k in keywords}
+        alternation = "|".join(re.escape(k) for k in sorted(categories, key=len, reverse=True))
+        # Only the longest keyword is reported at an offset; keyword prefixes of it are implied.
+        implied = {k: [o for o in categories if o != k and k.startswith(o)] for k in categories}
+        return re.compile(f"(?=({alternation}))"), categories, implied
+
+    blocked_regex = re.compile("|".join(re.escape(marker) for marker in blocked))
+    compiled = [compile_table(table) for table in tables]
+
+    def regex(text: str):
+        lowered = normalize(text)
+        counts = []
+        for (pattern, categories, implied), table in zip(compiled, tables):
+            found = set()
+            for keyword in pattern.findall(lowered):
+                found.add(keyword)
+                found.update(implied[keyword])
+            table_counts = dict.fromkeys(table.categories, 0)
+            for keyword in found:
+                table_counts[categories[keyword]] += 1
+            counts.append(table_counts)
+        return blocked_regex.search(lowered) is not None, is_incomplete(text), counts
+
+    def shared(text: str):
+        lowered = normalize(text)
+        return BLOCKED_CHAT_MARKERS.search(lowered), is_incomplete(text), [table.counts(lowered) for table in tables]
+
+    for text in messages:
+        assert previous(text) == regex(text) == shared(text), text
+
+    results = [
+        measure(name, lambda fn=fn: [fn(text) for text in messages], args.repeats)
+        for name, fn in (("previous scans", previous), ("alternation regex", regex), ("shared matchers", shared))
+    ]
+    print_table(results)
+    for result in results:
+        print(f"[Bench] {result.name}: {result.median_ms * 1000 / len(messages):.2f} us/message")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+import random
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class WorldSize:
+    agents: int = 50
+    mobs: int = 10
+    memories_per_agent: int = 200
+    relationships: int = 1000
+    clients: int = 20
+
+
+_TOPICS = ("погода", "площадь", "парк", "дорога", "встреча", "рынок", "дождь", "друзья", "работа", "ночь")
+
+
+def _memory_text(rng: random.Random, agent_id: int, i: int) -> str:
+    words = rng.sample(_TOPICS, 4)
+    return f"Агент {agent_id} запомнил эпизод {i}: {' '.join(words)}"
+
+
+def build_world(size: WorldSize, seed: int = 0) -> dict:
+    """Populate the configured (empty) databases with a synthetic world."""
+    from api import models
+    from api.database import init_db
+    from api.database.crud_agents import create_agent
+    from api.database.database import SessionLocal
+    from api.database.models import Relationship
+    from api.llm.config import EmbeddingModel, set_embedding_model
+    from api.llm.memory_store import get_memory_store
+
+    init_db()
+    rng = random.Random(seed)
+    embeddings = EmbeddingModel(load_model=False)
+    set_embedding_model(embeddings)
+
+    db = SessionLocal()
+    try:
+        agent_ids = [
+            create_agent(db, models.AgentCreate(name=f"Agent {i}", personality="Synthetic benchmark agent.")).id
+            for i in range(size.agents)
+        ]
+        for i in range(size.mobs):
+            create_agent(db, models.AgentCreate(name=f"Mob {i}", type="mob", personality="Synthetic mob."))
+
+        pairs = [(a, b) for a in agent_ids for b in agent_ids if a != b]
+        chosen = rng.sample(pairs, min(size.relationships, len(pairs)))
+        db.add_all(
+            Relationship(agent_from_id=a, agent_to_id=b, sympathy=rng.randint(-10, 10))
+            for a, b in chosen
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    rows = []
+    for agent_id in agent_ids:
+        for i in range(size.memories_per_agent):
+            text = _memory_text(rng, agent_id, i)
+            rows.append((agent_id, text, embeddings.embed_query(text), "episode"))
+    get_memory_store().add_memories(rows)
+
+    return {"agent_ids": agent_ids, "memories": len(rows), "relationships": len(chosen)}
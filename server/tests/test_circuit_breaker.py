@@ -0,0 +1,153 @@
+from api.llm.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _tripped(clock: FakeClock, probes: int = 1) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, half_open_probes=probes, clock=clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+
+def test_closed_until_threshold():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_open_rejects_until_reset_timeout():
+    clock = FakeClock()
+    breaker = _tripped(clock)
+    assert breaker.state == OPEN and not breaker.available
+    assert not breaker.allow()
+    clock.now = 9.9
+    assert not breaker.allow()
+    clock.now = 10.0
+    assert breaker.state == HALF_OPEN and breaker.available
+
+
+def test_half_open_probe_success_closes():
+    clock = FakeClock()
+    breaker = _tripped(clock)
+    clock.now = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_half_open_probe_failure_reopens():
+    clock = FakeClock()
+    breaker = _tripped(clock)
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    clock.now = 20.0
+    assert breaker.allow()
+
+
+def test_released_probe_can_be_taken_again():
+    clock = FakeClock()
+    breaker = _tripped(clock)
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_probe_without_result_is_not_leaked_by_callers():
+    clock = FakeClock()
+    breaker = _tripped(clock, probes=2)
+    clock.now = 10.0
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()
+    breaker.release_probe()
+    breaker.release_probe()
+    breaker.release_probe()
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()
+
+
+def test_release_probe_outside_half_open_is_a_no_op():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+    breaker.release_probe()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    breaker.release_probe()
+    assert breaker.state == OPEN and not breaker.allow()
+
+
+class _Scheduler:
+    def __init__(self, admit: bool = True):
+        self.admit = admit
+
+    def acquire(self, priority=None, timeout=None) -> bool:
+        return self.admit
+
+    def release(self, status=None, retry_after=None):
+        pass
+
+
+class _Response:
+    status_code = 200
+    headers = {}
+
+    def json(self):
+        raise ValueError("not json")
+
+
+class _Session:
+    def post(self, *args, **kwargs):
+        return _Response()
+
+
+def _llm(monkeypatch, scheduler: _Scheduler):
+    from api.llm import config
+
+    monkeypatch.setattr(config, "GENAPI_API_KEY", "test")
+    monkeypatch.setattr(config, "get_scheduler", lambda: scheduler)
+    llm = config.GenApiLLM()
+    llm.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=FakeClock())
+    llm._session = _Session()
+    return llm
+
+
+def test_queue_timeout_hands_the_probe_back(monkeypatch):
+    scheduler = _Scheduler(admit=False)
+    llm = _llm(monkeypatch, scheduler)
+    clock = llm.breaker._clock
+    for _ in range(2):
+        llm.breaker.record_failure()
+    clock.now = 10.0
+    assert llm._invoke("hi", 1).content == "[GenAPI error: LLM queue timeout]"
+    assert llm.breaker.allow()
+
+
+def test_unparseable_success_body_counts_one_failure(monkeypatch):
+    llm = _llm(monkeypatch, _Scheduler())
+    assert llm._invoke("hi", 1).content == "[GenAPI error: invalid JSON body]"
+    assert llm.breaker._failures == 1
+    assert llm.breaker.state == CLOSED
@@ -0,0 +1,68 @@
+from api.llm.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+
+
+class _Clock:
+    def __call__(self) -> float:
+        return 0.0
+
+
+class _Scheduler:
+    def acquire(self, priority=None, timeout=None) -> bool:
+        return True
+
+    def release(self, status=None, retry_after=None):
+        pass
+
+
+class _StreamResponse:
+    def __init__(self, status: int, lines: list[str] = ()):
+        self.status_code = status
+        self.headers = {"Content-Type": "text/event-stream"}
+        self._lines = list(lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self._lines)
+
+
+class _ScriptedSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def post(self, *args, **kwargs):
+        return self.responses.pop(0)
+
+
+def _llm(monkeypatch, *responses):
+    from api.llm import config
+
+    monkeypatch.setattr(config, "GENAPI_API_KEY", "test")
+    monkeypatch.setattr(config, "LLM_STREAMING", True)
+    monkeypatch.setattr(config, "LLM_RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(config, "get_scheduler", _Scheduler)
+    llm = config.GenApiLLM()
+    llm.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=_Clock())
+    llm._session = _ScriptedSession(*responses)
+    return llm
+
+
+def test_stream_retries_before_the_first_chunk(monkeypatch):
+    llm = _llm(
+        monkeypatch,
+        _StreamResponse(429),
+        _StreamResponse(503),
+        _StreamResponse(200, ['data: {"delta": "При"}', 'data: {"delta": "вет"}', "data: [DONE]"]),
+    )
+    assert list(llm.stream("hi", 3)) == ["При", "вет"]
+    assert llm.breaker.state == CLOSED and llm.breaker._failures == 0
+
+
+def test_stream_returns_the_error_after_the_last_attempt(monkeypatch):
+    llm = _llm(monkeypatch, _StreamResponse(502), _StreamResponse(502))
+    assert list(llm.stream("hi", 2)) == ["[GenAPI error: HTTP 502]"]
+    assert llm.breaker.state == OPEN